@@ -3,69 +3,37 @@ import pdfplumber
 import requests
 import string
 from pathlib import Path
-from sentence_transformers import SentenceTransformer
 import faiss
 import numpy as np
-import subprocess
-from flask import Flask, render_template, request, jsonify, send_from_directory, send_file
+from flask import Flask, render_template, request, jsonify, send_from_directory, send_file, Response, stream_with_context
 from flask_cors import CORS
-import pandas as pd
 import subprocess
 import time
+import socket
 import move_file
 from move_file import run_task
 import threading
 app = Flask(__name__)
 DOWNLOAD_FOLDER = os.getcwd()
 import rag_agent
-from rag_agent import monitor_and_run_rag
+from scrape_engine import scrape_keywords, get_pool, SCRAPE_MODE
+from download_manager import get_manager
+from bid_store import get_store
+from bid_table import get_table, get_context_index
+from bid_filter import BidFilter
+from concurrent.futures import wait
+import orjson
+from job_events import bus, sse_stream, StageTimer, format_sse
+from model_registry import registry, default_embedding_name
 from rag_agent import process_with_langchain_agent 
 import csv
-from io import BytesIO
+from io import StringIO
 CORS(app)
-from io import BytesIO
 from urllib.parse import urlparse
 
 
 
-file_path1 = 'latest_moved_path.txt'
-
-# Overwrite the file with an empty string to clear its contents
-with open(file_path1, mode='w', encoding='utf-8') as outfile:
-    outfile.write('')
-
-
-# print(f"Cleared all data from {file_path1}, header preserved.")
-
-file_path = 'filtered_bid_results.csv'  # Replace with your actual file path
-
-# Step 1: Read the header (column names)
-with open(file_path, mode='r', newline='', encoding='utf-8') as infile:
-    reader = csv.reader(infile)
-    headers = next(reader)  # Get the first row (header)
-
-# Step 2: Write only the header back to the file (clear the rest)
-with open(file_path, mode='w', newline='', encoding='utf-8') as outfile:
-    writer = csv.writer(outfile)
-    writer.writerow(headers)
-
-print(f"Cleared all data from {file_path}, header preserved.")
-def clear_csv_file(filepath):
-    try:
-        with open(filepath, mode='r', newline='', encoding='utf-8') as infile:
-            reader = csv.reader(infile)
-            headers = next(reader)
-
-        with open(filepath, mode='w', newline='', encoding='utf-8') as outfile:
-            writer = csv.writer(outfile)
-            writer.writerow(headers)
-
-        print(f"Cleared all data from {filepath}, header preserved.")
-    except Exception as e:
-        print(f"Failed to clear {filepath}: {e}")
-
 os.environ["TOKENIZERS_PARALLELISM"] = "false"
-embedder = SentenceTransformer('all-MiniLM-L6-v2')
 ALL_TEXT_CACHE = ""  # cache for all text to avoid re-processing
 from rag_agent import (
     extract_text_and_links,
@@ -106,18 +74,12 @@ def download():
     try:
         print(f"Downloading from: {pdf_url}")
         print(f"Saving to: {filepath}")
+        StageTimer(os.path.splitext(filename)[0]).stage("downloading", url=pdf_url)
 
-        response = requests.get(pdf_url, stream=True, timeout=20)
-        response.raise_for_status()
-
-        # Optional: check content-type if you want, but without headers no need to enforce
-        # content_type = response.headers.get("Content-Type", "")
-        # if "application/pdf" not in content_type:
-        #     return f"Expected PDF, but got: {content_type}", 400
-
-        with open(filepath, 'wb') as f:
-            for chunk in response.iter_content(chunk_size=8192):
-                f.write(chunk)
+        _, error = get_manager().download(pdf_url, save_dir, filename=filename, require_pdf=False)
+        if error:
+            print(f"❌ Request error: {error}")
+            return f"Request error: {error}", 500
 
         print("✅ Download complete.")
 
@@ -136,9 +98,11 @@ def download():
 
 @app.route('/ask_question', methods=['POST'])
 def ask_question():
-    bid="GEM/2025/B/6055240"
     data = request.get_json()
     question = data.get("question")
+    doc_id = data.get("doc_id")
+    # Optional bid number (or list of bid numbers) to search across the corpus index
+    bids = data.get("bid") or data.get("bids")
     # context = data.get("context")
 
     if not question:
@@ -148,142 +112,139 @@ def ask_question():
 
     try:
         # Call the RAG processing function with question and context
-        answer = process_with_langchain_agent(question)
+        answer = process_with_langchain_agent(question, doc_id=doc_id, bids=bids)
         print("success")
         return jsonify({"success": True, "answer": answer})
     except Exception as e:
         print(e)
         return jsonify({"success": False, "error": str(e)}), 500
 
+@app.route('/ask_question/stream', methods=['POST'])
+def ask_question_stream():
+    """SSE variant of /ask_question: sources first, then answer tokens as they are generated."""
+    data = request.get_json()
+    question = data.get("question")
+    if not question:
+        return jsonify({"success": False, "error": "No question provided."}), 400
+    # deepseek-r1's <think> block is dropped server-side unless the client asks for it
+    hide_reasoning = data.get("hide_reasoning", True)
+
+    events = rag_agent.stream_answer(
+        question,
+        doc_id=data.get("doc_id"),
+        bids=data.get("bid") or data.get("bids"),
+        hide_reasoning=hide_reasoning,
+    )
+    response = Response(stream_with_context(format_sse(e) for e in events), mimetype="text/event-stream")
+    response.headers["Cache-Control"] = "no-cache"
+    response.headers["X-Accel-Buffering"] = "no"
+    return response
+
 @app.route("/status.txt")
 def get_status():
-    return send_file("status.txt")
+    # Kept for older clients; the UI listens on /events instead
+    return bus.latest_status()
+
+
+@app.route("/jobs/metrics")
+def job_metrics():
+    return jsonify({
+        **rag_agent.document_queue.metrics(),
+        "models": registry.status(),
+        "embedding_cache": rag_agent.embedding_model.cache.stats(),
+    })
+
+
+@app.route("/events")
+def events():
+    """Server-sent stream of per-document stage transitions with timings."""
+    response = Response(stream_with_context(sse_stream()), mimetype="text/event-stream")
+    response.headers["Cache-Control"] = "no-cache"
+    response.headers["X-Accel-Buffering"] = "no"
+    return response
     
 
 def download_files(url, save_dir):
-    os.makedirs(save_dir, exist_ok=True)
     print(f"📥 Downloading file from URL: {url}")
-
-    try:
-        headers = {
-            "User-Agent": "Mozilla/5.0",
-            "Accept": "*/*",
-        }
-        response = requests.get(url, headers=headers, stream=True, timeout=20, allow_redirects=True)
-        print(f"🔁 Status Code: {response.status_code}")
-        content_type = response.headers.get("Content-Type", "")
-        print(f"🧾 Content-Type: {content_type}")
-
-        if "application/pdf" not in content_type:
-            # Not a PDF; save HTML to debug
-            debug_path = os.path.join(save_dir, "debug_response.html")
-            with open(debug_path, "wb") as f:
-                f.write(response.content)
-            return None, f"⚠️ Not a PDF. Saved debug HTML to {debug_path}"
-
-        filename = os.path.basename(urlparse(url).path)
-        if not filename.endswith(".pdf"):
-            filename += ".pdf"
-        filepath = os.path.join(save_dir, filename)
-
-        with open(filepath, 'wb') as f:
-            for chunk in response.iter_content(chunk_size=8192):
-                if chunk:
-                    f.write(chunk)
-        print(f"✅ Saved to: {filepath}")
-        return filename, None
-
-    except Exception as e:
-        return None, f"❌ Exception: {str(e)}"
+    return get_manager().download(url, save_dir)
 
 @app.route('/scrape', methods=['POST'])
 def scrape():
     keywords_input = request.form.get('keyword', '')
-    clear_csv_file('bid_results.csv')
-    clear_csv_file('filtered_bid_results.csv')
     
     if not keywords_input.strip():
         return "No keywords provided", 400
 
     # Split the keywords by comma and strip whitespace
     keywords = tuple(kw.strip() for kw in keywords_input.split(',') if kw.strip())
+    store = get_store()
+    manager = get_manager()
+    save_dir = '/home/kartikeyapatel/Videos/gem/first_extracted_data'
+    # Each search is a run; /data shows the bids of the latest run
+    run_id = store.start_run(keywords)
 
-    # 1. Run scrap.py for each keyword
-    for keyword in keywords:
+    def download_bid(row):
+        url = row.get('Downloadable File URL', '').strip()
+        if not url:
+            return
         try:
-            print(f"Scraping for: {keyword}")
-            result = subprocess.run(['python3', 'scrap.py', keyword], check=True, capture_output=True, text=True)
-        except subprocess.CalledProcessError as e:
-            print(f"Error scraping '{keyword}': {e}")
-            return f"Scraper error for '{keyword}': {e.stderr}", 500
-
-    # 2. Run remove_rows.py after all keywords are scraped
+            filename, error = manager.download(url, save_dir)
+        except Exception as e:
+            # Runs on the download pool: an uncaught error would be lost with its future
+            print(f"❌ Download failed for {row['Bid Number']}: {e}")
+            filename, error = None, str(e)
+        store.record_download(row['Bid Number'], url, filename=filename, error=None if filename else error)
+
+    # Scrape all keywords concurrently; every result page goes through the
+    # dedup/keyword filter as it arrives and matched bids start downloading
+    # while the remaining pages are still being scraped
+    print(f"Scraping for: {', '.join(keywords)}")
+    # Downloads run on the manager's long-lived pool so its keep-alive sessions outlive this request
+    downloads = []
+    bid_filter = BidFilter(run_id, store, on_match=lambda row: downloads.append(manager.submit(download_bid, row)))
     try:
-        print("Running row filter...")
-        filter_result = subprocess.run(['python3', 'remove_rows.py'], check=True, capture_output=True, text=True)
-        clear_csv_file('bid_results.csv')
-    except subprocess.CalledProcessError as e:
-        print(f"Error filtering rows: {e}")
-        return f"Filter error: {e.stderr}", 500
-
-    # 3. Optional delay for write buffer
-    time.sleep(0.5)
-
-    # 4. Read filtered_bid_results.csv and download all files from "Downloadable File URL"
-    filtered_csv = 'filtered_bid_results.csv'
-    save_dir = '/home/kartikeyapatel/Videos/gem/first_extracted_data'
-
-    # Read all rows
-    with open(filtered_csv, 'r', newline='', encoding='utf-8') as f:
-        reader = csv.DictReader(f)
-        rows = list(reader)
-        fieldnames = reader.fieldnames or []
+        scraped_rows, failed_keywords = scrape_keywords(list(keywords), on_page=bid_filter.process)
+    finally:
+        wait(downloads)
+    print(f"Filter: {bid_filter.stats}")
 
-    # Add a new column if not present
-    if 'Downloaded Filename' not in fieldnames:
-        fieldnames.append('Downloaded Filename')
-
-    # Download files and add filename info
-    for row in rows:
-        url = row.get('Downloadable File URL', '').strip()
-        if url:
-            print(f"Downloading file from URL: {url}")
-            filename, error = download_files(url, save_dir)
-            if filename:
-                row['Downloaded Filename'] = filename
-            else:
-                row['Downloaded Filename'] = f"ERROR: {error}"
-        else:
-            row['Downloaded Filename'] = 'No URL'
-
-    # Write back the CSV with new column
-    with open(filtered_csv, 'w', newline='', encoding='utf-8') as f:
-        writer = csv.DictWriter(f, fieldnames=fieldnames)
-        writer.writeheader()
-        writer.writerows(rows)
+    if failed_keywords:
+        print(f"Error scraping: {failed_keywords}")
+        return f"Scraper error for '{', '.join(failed_keywords)}'", 500
 
     return f"Scraping completed for: {', '.join(keywords)} and files downloaded.", 200
 
 
 
-from flask import request, jsonify
-import csv
-import os
-
-
 
 
 
 @app.route('/data')
 def data():
+    """One page of the latest run's bids, filtered and sorted server-side.
+
+    Query args: page, page_size, sort, order (asc|desc), q (global search),
+    bid_number, items, quantity (">5", "<=10", "3"), department,
+    start_date, end_date (YYYY-MM-DD).
+    """
     try:
-        df = pd.read_csv("filtered_bid_results.csv")
-        df.fillna("Not Available", inplace=True)
-        return jsonify({"data": df.to_dict(orient="records")})
+        return Response(orjson.dumps(get_table().query(request.args)), mimetype="application/json")
     except Exception as e:
         print(e)
         return jsonify({"error": str(e)}), 500
 
+@app.route('/data/export')
+def data_export():
+    """All rows matching the /data filters as CSV."""
+    rows = get_table().export(request.args)
+    output = StringIO()
+    if rows:
+        writer = csv.DictWriter(output, fieldnames=list(rows[0]))
+        writer.writeheader()
+        writer.writerows(rows)
+    return Response(output.getvalue(), mimetype="text/csv",
+                    headers={"Content-Disposition": "attachment; filename=filtered_bid_results.csv"})
+
 @app.route('/download/<filename>')
 def download_file(filename):
     try:
@@ -300,40 +261,70 @@ def get_context_data():
     if not bid:
         return jsonify({"status": "error", "message": "Missing 'bid' parameter"}), 400
 
-    if not os.path.exists("static/final_bid_results.csv"):
-        return jsonify({"status": "error", "message": "CSV file not found"}), 500
-
     try:
-        with open("static/final_bid_results.csv", newline='', encoding='utf-8') as csvfile:
-            reader = csv.DictReader(csvfile)
-            for row in reader:
-                if row["Bid Number"].strip().lower() == bid.strip().lower():
-                    return jsonify({"status": "success", "row": row})
+        row = get_context_index().get(bid)
+        if row:
+            return jsonify({"status": "success", "row": row})
     except Exception as e:
-        print(f"Error reading CSV or processing bid: {e}")  # 👈 This will show up in your Flask logs
+        print(f"Error reading bid store or processing bid: {e}")  # 👈 This will show up in your Flask logs
         return jsonify({"status": "error", "message": str(e)}), 500
 
     return jsonify({"status": "not found"})
 
-ALL_TEXT_CACHE = ""  # optional: to speed things up
+@app.route("/context_data/batch", methods=["GET", "POST"])
+def get_context_data_batch():
+    """Context rows for many bids at once: ?bids=a,b or JSON {"bids": [...]}.
+
+    Returns {"status": "success", "rows": {bid: row or null}}.
+    """
+    if request.method == "POST":
+        bids = (request.get_json(silent=True) or {}).get("bids") or []
+    else:
+        bids = [b for b in request.args.get("bids", "").split(",") if b.strip()]
+    if not bids:
+        return jsonify({"status": "error", "message": "Missing 'bids'"}), 400
+
+    try:
+        rows = get_context_index().get_many(bids)
+    except Exception as e:
+        print(f"Error reading bid store or processing bids: {e}")
+        return jsonify({"status": "error", "message": str(e)}), 500
+    return Response(orjson.dumps({"status": "success", "rows": rows}), mimetype="application/json")
+
  # Track whether a file has been successfully processed
 
 
-def safe_thread(target_func):
-    def wrapper():
+def is_serving_process():
+    # With debug=True the Werkzeug reloader imports this module in a watching
+    # parent and again in the child that serves requests. The event bus lives
+    # in one process, so background services start in the child only.
+    return os.environ.get("WERKZEUG_RUN_MAIN") == "true"
+
+
+def warm_after_startup(port, poll_seconds=0.2):
+    """Once the server accepts connections, load the embedding model and, in
+    selenium mode, start the headless browsers (http mode starts them only on
+    fallback), so startup is not held up and the first request is fast."""
+    while True:
         try:
-            target_func()
-        except Exception as e:
-            print(f"Exception in thread {target_func.__name__}: {e}")
-    return wrapper
+            socket.create_connection(("127.0.0.1", port), timeout=1).close()
+            break
+        except OSError:
+            time.sleep(poll_seconds)
+    registry.warm_in_background([default_embedding_name()])
+    if SCRAPE_MODE == "selenium":
+        get_pool().warm()
+
 
 if __name__ == '__main__':
-    thread = threading.Thread(target=safe_thread(move_file.run_task))
-    # thread.daemon = True
-    thread1 = threading.Thread(target=safe_thread(monitor_and_run_rag))
-    # thread1.daemon = True
-    thread.start()
-    thread1.start()
+    observer = None
+    if is_serving_process():
+        # Document processing runs on the bounded job queue; the Downloads watcher
+        # (watchdog observer thread) feeds it through the event bus
+        rag_agent.start_document_workers()
+        observer = move_file.start_watcher()
+        threading.Thread(target=warm_after_startup, args=(8080,), name="warmup", daemon=True).start()
     app.run(host='0.0.0.0', port=8080, debug=True)
+    if observer:
+        observer.stop()
     print("Flask App exitec")
-    
\ No newline at end of file
@@ -0,0 +1,87 @@
+import os
+import sys
+import time
+import numpy as np
+from model_registry import get_model
+from page_store import extract_pages
+from summarizer import split_for_summary
+
+# Compares the PyTorch and int8 ONNX bge-small backends on real tender text:
+# throughput (chunks/s) and how often both return the same top-k chunks.
+#   python bench_embeddings.py [pdf_dir] [max_chunks]
+PDF_DIR = sys.argv[1] if len(sys.argv) > 1 else "linked_pdfs"
+MAX_CHUNKS = int(sys.argv[2]) if len(sys.argv) > 2 else 2000
+TOP_K = 5
+QUERIES = [
+    "What is the EMD amount?",
+    "What is the bid end date?",
+    "What is the estimated bid value?",
+    "What documents are required from the bidder?",
+    "What is the eligibility criteria and minimum turnover?",
+    "What is the scope of work?",
+    "What are the technical specifications?",
+    "What is the delivery period?",
+    "Who is the contact person for this bid?",
+    "What is the performance security percentage?",
+]
+
+
+def load_chunks(pdf_dir, limit):
+    chunks = []
+    for name in sorted(os.listdir(pdf_dir)):
+        if not name.lower().endswith(".pdf"):
+            continue
+        try:
+            text = "\n".join(page["text"] for page in extract_pages(os.path.join(pdf_dir, name)))
+        except Exception as e:
+            print(f"⚠️ Skipping {name}: {e}")
+            continue
+        chunks += split_for_summary(text, chunk_size=900, overlap=85)
+        if len(chunks) >= limit:
+            break
+    return chunks[:limit]
+
+
+def timed_embed(model, texts):
+    model.embed_documents(texts[:8])  # warm-up: first session.run / forward pass allocates
+    started = time.perf_counter()
+    vectors = np.asarray(model.embed_documents(texts), dtype=np.float32)
+    return vectors, time.perf_counter() - started
+
+
+def top_k(doc_vectors, query_vectors, k):
+    scores = query_vectors @ doc_vectors.T
+    return np.argsort(-scores, axis=1)[:, :k]
+
+
+def main():
+    chunks = load_chunks(PDF_DIR, MAX_CHUNKS)
+    if not chunks:
+        print(f"No PDF text found in {PDF_DIR}")
+        return
+    print(f"📄 {len(chunks)} chunks from {PDF_DIR}")
+
+    results = {}
+    for backend, name in (("torch", "bge-small"), ("onnx", "bge-small-onnx")):
+        model = get_model(name)
+        vectors, seconds = timed_embed(model, chunks)
+        queries = np.asarray([model.embed_query(q) for q in QUERIES], dtype=np.float32)
+        results[backend] = (vectors, queries)
+        print(f"⏱️ {backend}: {seconds:.2f}s, {len(chunks) / seconds:.1f} chunks/s")
+
+    torch_docs, torch_queries = results["torch"]
+    onnx_docs, onnx_queries = results["onnx"]
+    cosine = np.sum(torch_docs * onnx_docs, axis=1) / (
+        np.linalg.norm(torch_docs, axis=1) * np.linalg.norm(onnx_docs, axis=1))
+    print(f"📐 Per-chunk cosine torch vs onnx: mean {cosine.mean():.4f}, min {cosine.min():.4f}")
+
+    k = min(TOP_K, len(chunks))
+    torch_hits = top_k(torch_docs, torch_queries, k)
+    onnx_hits = top_k(onnx_docs, onnx_queries, k)
+    overlap = [len(set(a) & set(b)) / k for a, b in zip(torch_hits, onnx_hits)]
+    top1 = np.mean(torch_hits[:, 0] == onnx_hits[:, 0])
+    print(f"🎯 Retrieval agreement: top-{k} overlap {np.mean(overlap):.3f}, top-1 match {top1:.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+import os
+import re
+import hashlib
+import threading
+from bid_store import get_store, normalize_bid
+from job_events import bus
+
+# Streaming dedup/filter stage between the scraper and the downloader. Pages
+# of scraped rows are fed in as they arrive; each new bid is matched once,
+# the decision is stored with the bid together with a key for the filter
+# setup that made it, and matched bids are handed on immediately. A bid seen
+# in an earlier search keeps its decision while the setup is unchanged;
+# changing the mode, keywords, profiles or threshold decides it again.
+# FILTER_MODE "relevance" ranks new bids with relevance.RelevanceScorer
+# (embedding similarity to capability profiles + fuzzy keyword hits);
+# "keywords" is the plain substring match on 'Items'. Keyword matches made
+# only because scoring failed are stored with an empty key and never reused.
+FILTER_MODE = os.environ.get("FILTER_MODE", "relevance")
+
+# Keywords for selective matching in 'Items'
+KEYWORDS = ['software', 'consultancy', 'custom', 'development', 'learning', 'web development', 'blockchain',
+            'application development', 'backend', 'mobile application', 'platform development',
+            'artificial intelligence', 'cyber security', 'security compliance']
+
+
+def compile_keywords(keywords):
+    # Longest first so the alternation reports the most specific keyword
+    return re.compile("|".join(re.escape(k.lower()) for k in sorted(keywords, key=len, reverse=True)))
+
+
+def keyword_filter_key(keywords):
+    """Filter key of keyword-mode decisions; changes whenever the keyword list does."""
+    joined = "\n".join(sorted(k.lower() for k in keywords))
+    return "keywords:" + hashlib.sha1(joined.encode("utf-8")).hexdigest()[:12]
+
+
+class BidFilter:
+    def __init__(self, run_id, store=None, keywords=KEYWORDS, on_match=None, mode=FILTER_MODE):
+        self.run_id = run_id
+        self.mode = mode
+        self.store = store or get_store()
+        self.pattern = compile_keywords(keywords)
+        self.on_match = on_match
+        self.scorer = None
+        if mode == "relevance":
+            try:
+                from relevance import get_scorer
+                self.scorer = get_scorer()
+            except Exception as e:
+                print(f"⚠️ Relevance scorer unavailable, using keyword match: {e}")
+        if self.scorer is not None:
+            self.filter_key = self.scorer.fingerprint()
+        elif mode == "relevance":
+            self.filter_key = ""  # fallback decisions are not reused
+        else:
+            self.filter_key = keyword_filter_key(keywords)
+        # Persistent seen-bid set with outcomes, for the current filter setup only
+        self.decisions = self.store.filter_decisions(self.filter_key)
+        self.run_seen = set()
+        self.stats = {"scraped": 0, "duplicates": 0, "new": 0, "matched": 0}
+        self._lock = threading.Lock()
+
+    def matches(self, row):
+        return self.pattern.search((row.get('Items') or '').lower()) is not None
+
+    def decide(self, rows):
+        """Decisions for new bids: ({bid: bool}, {bid: (score, profile)}, filter key)."""
+        bids = [normalize_bid(row['Bid Number']) for row in rows]
+        if self.scorer is not None:
+            try:
+                results = self.scorer.score_rows(rows)
+                return ({bid: self.scorer.is_relevant(r) for bid, r in zip(bids, results)},
+                        {bid: (r["score"], r["profile"]) for bid, r in zip(bids, results)},
+                        self.filter_key)
+            except Exception as e:
+                print(f"⚠️ Relevance scoring failed, using keyword match: {e}")
+        # A keyword match standing in for a failed scorer gets no key, so it is redone next time
+        key = "" if self.scorer is not None else self.filter_key
+        return {bid: self.matches(row) for bid, row in zip(bids, rows)}, {bid: (None, "") for bid in bids}, key
+
+    def process(self, rows):
+        """Dedup, match and store one page of scraped rows. Returns the matched rows."""
+        # The lock covers dedup and the store write only; scoring runs outside
+        # it so pages from different keyword threads are embedded in parallel
+        with self._lock:
+            page, new_rows = [], []
+            for row in rows:
+                bid = normalize_bid(row.get('Bid Number'))
+                self.stats["scraped"] += 1
+                if not bid or bid == "NOT FOUND" or bid in self.run_seen:
+                    self.stats["duplicates"] += 1
+                    continue
+                self.run_seen.add(bid)
+                if bid not in self.decisions:
+                    new_rows.append(row)
+                page.append(row)
+            self.stats["new"] += len(new_rows)
+        if not page:
+            return []
+
+        # New bids are scored as one batch per page
+        new_decisions, scores, key = self.decide(new_rows)
+
+        with self._lock:
+            if key:
+                self.decisions.update(new_decisions)
+            decided, keys = {}, {}
+            for row in page:
+                bid = normalize_bid(row['Bid Number'])
+                if bid in new_decisions:
+                    decided[bid], keys[bid] = new_decisions[bid], key
+                else:
+                    decided[bid], keys[bid] = self.decisions[bid], self.filter_key
+            self.store.upsert_bids(page, run_id=self.run_id, matched=decided, filter_keys=keys)
+            if scores:
+                self.store.set_relevance(scores)
+            matched = [row for row in page if decided[normalize_bid(row['Bid Number'])]]
+            self.stats["matched"] += len(matched)
+            total_matched = self.stats["matched"]
+
+        bus.publish("bids_filtered", run_id=self.run_id, matched=len(matched), total_matched=total_matched)
+        if self.on_match:
+            for row in matched:
+                self.on_match(row)
+        return matched
@@ -0,0 +1,358 @@
+import os
+import re
+import csv
+import time
+import sqlite3
+import threading
+
+# Persistent bid store (SQLite, WAL). Replaces the CSV handshake files between
+# the scraper, row filter, downloader, field extractor and the Flask endpoints:
+#   bids       - scraped bid rows, upserted by Bid Number, with the scrape run
+#                that last saw them, whether they pass the filter and which
+#                filter setup decided that (see bid_filter)
+#   downloads  - the bid document downloaded for each bid (or the error)
+#   extracted  - fields extracted from the bid document
+# Rows go in and out with the same column labels the CSVs used. The first
+# get_store() imports the old CSV files once and renames them to *.imported.
+BID_STORE_PATH = os.environ.get("BID_STORE_PATH", "bids.sqlite")
+LEGACY_FILTERED_CSV = "filtered_bid_results.csv"
+# Extracted-field CSVs, oldest first: /context_data used to read static/final_bid_results.csv
+LEGACY_EXTRACTED_CSVS = ("static/final_bid_results.csv", "final_extracted_data.csv")
+
+BID_COLUMNS = {
+    "Bid Number": "bid_number",
+    "Items": "items",
+    "Quantity": "quantity",
+    "Department": "department",
+    "Start Date": "start_date",
+    "End Date": "end_date",
+    "Downloadable File URL": "url",
+}
+EXTRACTED_COLUMNS = {
+    "Bid Number": "bid_number",
+    "Ministry Name": "ministry_name",
+    "Downloaded Filename": "filename",
+    "EMD Amount": "emd_amount",
+    "Type of Bid": "type_of_bid",
+    "Estimated Bid Value": "estimated_bid_value",
+    "Minimum Average Annual Turnover": "min_turnover",
+}
+
+
+def normalize_bid(bid):
+    return (bid or "").strip().upper()
+
+
+def doc_key(value):
+    """Trailing document number of a download URL or filename ("…/showbidDocument/7830687" -> "7830687")."""
+    stem = os.path.splitext(os.path.basename((value or "").rstrip("/")))[0]
+    match = re.search(r"(\d+)$", stem)
+    return match.group(1) if match else stem
+
+
+class BidStore:
+    def __init__(self, path=BID_STORE_PATH):
+        self.path = path
+        self._local = threading.local()
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript("""
+                CREATE TABLE IF NOT EXISTS runs (
+                    run_id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    keywords TEXT NOT NULL,
+                    started_at REAL NOT NULL
+                );
+                CREATE TABLE IF NOT EXISTS bids (
+                    bid_number TEXT PRIMARY KEY,
+                    items TEXT NOT NULL DEFAULT '',
+                    quantity TEXT NOT NULL DEFAULT '',
+                    department TEXT NOT NULL DEFAULT '',
+                    start_date TEXT NOT NULL DEFAULT '',
+                    end_date TEXT NOT NULL DEFAULT '',
+                    url TEXT NOT NULL DEFAULT '',
+                    doc_key TEXT NOT NULL DEFAULT '',
+                    matched INTEGER,
+                    last_run INTEGER,
+                    updated_at REAL NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS bids_last_run ON bids (last_run, matched);
+                CREATE INDEX IF NOT EXISTS bids_doc_key ON bids (doc_key);
+                CREATE TABLE IF NOT EXISTS downloads (
+                    bid_number TEXT PRIMARY KEY,
+                    url TEXT NOT NULL,
+                    filename TEXT NOT NULL DEFAULT '',
+                    doc_key TEXT NOT NULL DEFAULT '',
+                    error TEXT NOT NULL DEFAULT '',
+                    updated_at REAL NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS downloads_doc_key ON downloads (doc_key);
+                CREATE TABLE IF NOT EXISTS extracted (
+                    bid_number TEXT PRIMARY KEY,
+                    ministry_name TEXT NOT NULL DEFAULT '',
+                    filename TEXT NOT NULL DEFAULT '',
+                    emd_amount TEXT NOT NULL DEFAULT '',
+                    type_of_bid TEXT NOT NULL DEFAULT '',
+                    estimated_bid_value TEXT NOT NULL DEFAULT '',
+                    min_turnover TEXT NOT NULL DEFAULT '',
+                    updated_at REAL NOT NULL
+                );
+                CREATE TABLE IF NOT EXISTS versions (
+                    name TEXT PRIMARY KEY,
+                    value INTEGER NOT NULL
+                );
+                CREATE TABLE IF NOT EXISTS meta (
+                    name TEXT PRIMARY KEY,
+                    value TEXT NOT NULL
+                );
+            """)
+            columns = [row[1] for row in conn.execute("PRAGMA table_info(bids)")]
+            if "relevance" not in columns:
+                conn.execute("ALTER TABLE bids ADD COLUMN relevance REAL")
+                conn.execute("ALTER TABLE bids ADD COLUMN profile TEXT NOT NULL DEFAULT ''")
+            if "filter_key" not in columns:
+                conn.execute("ALTER TABLE bids ADD COLUMN filter_key TEXT NOT NULL DEFAULT ''")
+
+    def _connect(self):
+        # sqlite connections are per thread; other processes (extractor, filter) open their own
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.row_factory = sqlite3.Row
+            self._local.conn = conn
+        return conn
+
+    # ====== change counters ======
+    # "bids" moves on every change to runs / bids / downloads, "extracted" on
+    # every extracted-fields write, so in-memory views can reload cheaply.
+    def _bump(self, conn, name):
+        conn.execute("INSERT INTO versions (name, value) VALUES (?, 1) "
+                     "ON CONFLICT(name) DO UPDATE SET value = value + 1", (name,))
+
+    def version(self, name="bids"):
+        row = self._connect().execute("SELECT value FROM versions WHERE name = ?", (name,)).fetchone()
+        return row[0] if row else 0
+
+    # ====== scrape runs ======
+    def start_run(self, keywords):
+        with self._connect() as conn:
+            cursor = conn.execute("INSERT INTO runs (keywords, started_at) VALUES (?, ?)",
+                                  (",".join(keywords), time.time()))
+            self._bump(conn, "bids")
+            return cursor.lastrowid
+
+    def latest_run(self):
+        row = self._connect().execute("SELECT MAX(run_id) FROM runs").fetchone()
+        return row[0]
+
+    # ====== bids ======
+    def upsert_bids(self, rows, run_id=None, matched=None, filter_keys=None):
+        """Insert or update scraped rows (CSV labels) by Bid Number. Returns the number written.
+
+        matched ({bid_number: bool}) records filter decisions in the same write,
+        filter_keys ({bid_number: key}) the filter setup behind each decision.
+        """
+        records = []
+        now = time.time()
+        for row in rows:
+            bid = normalize_bid(row.get("Bid Number"))
+            if not bid or bid == "NOT FOUND":
+                continue
+            values = {col: (row.get(label) or "").strip() for label, col in BID_COLUMNS.items()}
+            values.update(bid_number=bid, doc_key=doc_key(values["url"]), last_run=run_id, updated_at=now)
+            if matched is not None:
+                values["matched"] = int(bool(matched.get(bid)))
+                values["filter_key"] = (filter_keys or {}).get(bid, "")
+            records.append(values)
+        if not records:
+            return 0
+        columns = list(records[0])
+        updates = ", ".join(f"{c} = excluded.{c}" for c in columns if c != "bid_number")
+        with self._connect() as conn:
+            conn.executemany(
+                f"INSERT INTO bids ({', '.join(columns)}) VALUES ({', '.join(':' + c for c in columns)}) "
+                f"ON CONFLICT(bid_number) DO UPDATE SET {updates}",
+                records,
+            )
+            self._bump(conn, "bids")
+        return len(records)
+
+    def filter_decisions(self, filter_key):
+        """{bid_number: matched} for every bid already decided by the filter setup filter_key.
+
+        Decisions made under other settings (or by a fallback, stored with an
+        empty key) are left out, so those bids are decided again.
+        """
+        if not filter_key:
+            return {}
+        rows = self._connect().execute(
+            "SELECT bid_number, matched FROM bids WHERE matched IS NOT NULL AND filter_key = ?", (filter_key,)).fetchall()
+        return {bid: bool(matched) for bid, matched in rows}
+
+    def set_relevance(self, scores):
+        """scores: {bid_number: (score, profile name)} from the relevance scorer."""
+        with self._connect() as conn:
+            conn.executemany("UPDATE bids SET relevance = ?, profile = ? WHERE bid_number = ?",
+                             [(score, profile, normalize_bid(b)) for b, (score, profile) in scores.items()])
+            self._bump(conn, "bids")
+
+    def run_bids(self, run_id):
+        """bid_number and items of every bid in a run, matched or not."""
+        rows = self._connect().execute("SELECT bid_number, items FROM bids WHERE last_run = ?", (run_id,)).fetchall()
+        return [dict(r) for r in rows]
+
+    def unfiltered_bids(self, run_id):
+        """Bids of a run the keyword filter has not looked at yet."""
+        rows = self._connect().execute(
+            "SELECT bid_number, items FROM bids WHERE last_run = ? AND matched IS NULL", (run_id,)).fetchall()
+        return [dict(r) for r in rows]
+
+    def set_matched(self, decisions, filter_key=""):
+        """decisions: {bid_number: bool}"""
+        with self._connect() as conn:
+            conn.executemany("UPDATE bids SET matched = ?, filter_key = ? WHERE bid_number = ?",
+                             [(int(bool(m)), filter_key, normalize_bid(b)) for b, m in decisions.items()])
+            self._bump(conn, "bids")
+
+    def matched_bids(self, run_id=None):
+        """Bids of a run (default: latest) that passed the filter, with their download, as CSV-labelled rows.
+
+        Most relevant first when the relevance scorer ran.
+        """
+        run_id = run_id if run_id is not None else self.latest_run()
+        rows = self._connect().execute("""
+            SELECT b.*, d.filename AS download_filename, d.error AS download_error
+            FROM bids b LEFT JOIN downloads d ON d.bid_number = b.bid_number
+            WHERE b.last_run = ? AND b.matched = 1
+            ORDER BY b.relevance IS NULL, b.relevance DESC, b.rowid
+        """, (run_id,)).fetchall()
+        return [self._bid_row(r) for r in rows]
+
+    def _bid_row(self, r):
+        row = {label: r[col] for label, col in BID_COLUMNS.items()}
+        if r["download_filename"]:
+            row["Downloaded Filename"] = r["download_filename"]
+        elif r["download_error"]:
+            row["Downloaded Filename"] = f"ERROR: {r['download_error']}"
+        else:
+            row["Downloaded Filename"] = "" if r["url"] else "No URL"
+        # Bids decided by keyword match have no score; the columns are always present
+        row["Relevance"] = round(r["relevance"], 3) if r["relevance"] is not None else ""
+        row["Profile"] = r["profile"] if r["relevance"] is not None else ""
+        return row
+
+    # ====== downloads ======
+    def record_download(self, bid_number, url, filename=None, error=None):
+        with self._connect() as conn:
+            conn.execute("""
+                INSERT INTO downloads (bid_number, url, filename, doc_key, error, updated_at)
+                VALUES (?, ?, ?, ?, ?, ?)
+                ON CONFLICT(bid_number) DO UPDATE SET url = excluded.url, filename = excluded.filename,
+                    doc_key = excluded.doc_key, error = excluded.error, updated_at = excluded.updated_at
+            """, (normalize_bid(bid_number), url, filename or "", doc_key(filename or url), error or "", time.time()))
+            self._bump(conn, "bids")
+
+    def find_by_document(self, pdf_path):
+        """Bid row whose downloaded file or download URL matches a bid PDF, or None."""
+        key = doc_key(pdf_path)
+        row = self._connect().execute("""
+            SELECT b.bid_number, b.department FROM bids b
+            WHERE b.doc_key = ?
+               OR b.bid_number IN (SELECT bid_number FROM downloads WHERE doc_key = ?)
+            LIMIT 1
+        """, (key, key)).fetchone()
+        return dict(row) if row else None
+
+    def is_extracted(self, bid_number):
+        row = self._connect().execute("SELECT 1 FROM extracted WHERE bid_number = ?",
+                                      (normalize_bid(bid_number),)).fetchone()
+        return row is not None
+
+    # ====== extracted fields ======
+    def upsert_extracted(self, row):
+        values = {col: (row.get(label) or "").strip() for label, col in EXTRACTED_COLUMNS.items()}
+        values.update(bid_number=normalize_bid(values["bid_number"]), updated_at=time.time())
+        columns = list(values)
+        updates = ", ".join(f"{c} = excluded.{c}" for c in columns if c != "bid_number")
+        with self._connect() as conn:
+            conn.execute(
+                f"INSERT INTO extracted ({', '.join(columns)}) VALUES ({', '.join(':' + c for c in columns)}) "
+                f"ON CONFLICT(bid_number) DO UPDATE SET {updates}",
+                values,
+            )
+            self._bump(conn, "extracted")
+
+    def get_extracted(self, bid_number):
+        row = self._connect().execute("SELECT * FROM extracted WHERE bid_number = ?",
+                                      (normalize_bid(bid_number),)).fetchone()
+        return {label: row[col] for label, col in EXTRACTED_COLUMNS.items()} if row else None
+
+    def all_extracted(self):
+        rows = self._connect().execute("SELECT * FROM extracted ORDER BY updated_at").fetchall()
+        return [{label: r[col] for label, col in EXTRACTED_COLUMNS.items()} for r in rows]
+
+    # ====== one-time import of the old CSV handshake files ======
+    def import_legacy_once(self, filtered_csv=LEGACY_FILTERED_CSV, extracted_csvs=LEGACY_EXTRACTED_CSVS):
+        """Import the legacy CSVs if this store never has; imported files are renamed to *.imported."""
+        with self._connect() as conn:
+            claimed = conn.execute("INSERT OR IGNORE INTO meta (name, value) VALUES ('legacy_import', ?)",
+                                   (str(time.time()),)).rowcount
+        if not claimed:
+            return []
+        try:
+            imported = self.import_legacy_csvs(filtered_csv, extracted_csvs)
+        except Exception:
+            with self._connect() as conn:
+                conn.execute("DELETE FROM meta WHERE name = 'legacy_import'")
+            raise
+        for path in imported:
+            os.replace(path, path + ".imported")
+        return imported
+
+    def import_legacy_csvs(self, filtered_csv=LEGACY_FILTERED_CSV, extracted_csvs=LEGACY_EXTRACTED_CSVS):
+        """Import whichever legacy CSVs exist. Returns the paths that were imported."""
+        imported = []
+        if os.path.exists(filtered_csv):
+            with open(filtered_csv, newline="", encoding="utf-8") as f:
+                rows = list(csv.DictReader(f))
+            run_id = self.start_run(["imported"])
+            self.upsert_bids(rows, run_id=run_id)
+            self.set_matched({r["Bid Number"]: True for r in rows if r.get("Bid Number")})
+            for r in rows:
+                filename = (r.get("Downloaded Filename") or "").strip()
+                if filename and filename != "No URL":
+                    error = filename[len("ERROR: "):] if filename.startswith("ERROR") else None
+                    self.record_download(r["Bid Number"], r.get("Downloadable File URL", ""),
+                                         filename=None if error else filename, error=error)
+            print(f"📥 Imported {len(rows)} bids from {filtered_csv}")
+            imported.append(filtered_csv)
+        for extracted_csv in extracted_csvs:
+            if not os.path.exists(extracted_csv):
+                continue
+            with open(extracted_csv, newline="", encoding="utf-8") as f:
+                rows = [r for r in csv.DictReader(f) if r.get("Bid Number")]
+            for r in rows:
+                self.upsert_extracted(r)
+            print(f"📥 Imported {len(rows)} extracted rows from {extracted_csv}")
+            imported.append(extracted_csv)
+        return imported
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_store():
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = BidStore()
+            try:
+                _store.import_legacy_once()
+            except Exception as e:
+                print(f"❌ Legacy CSV import failed, will retry on next start: {e}")
+        return _store
+
+
+if __name__ == "__main__":
+    # Opening the store runs the one-time legacy CSV import
+    get_store()
@@ -0,0 +1,222 @@
+import re
+import threading
+from datetime import datetime
+from bid_store import get_store, normalize_bid
+
+# In-memory view of the latest scrape run for /data. Rows are loaded from the
+# bid store only when its "bids" version changes; filter fields are
+# pre-normalized per row and a sorted row order is cached per sort column, so
+# a request is one pass over the rows plus a page slice.
+MAX_PAGE_SIZE = 500
+DATE_FORMAT = "%d-%m-%Y %I:%M %p"  # "22-04-2025 12:31 PM" as scraped from GeM
+QUANTITY_CONDITION = re.compile(r"^\s*(<=|>=|<|>|=)?\s*(\d+)\s*$")
+
+SORT_KEYS = {
+    "bid_number": lambda r: r["_bid"],
+    "items": lambda r: r["_items"],
+    "quantity": lambda r: (r["_quantity"] is None, r["_quantity"] or 0),
+    "department": lambda r: r["_department"],
+    "start_date": lambda r: (r["_start"] is None, r["_start"] or datetime.min),
+    "end_date": lambda r: (r["_end"] is None, r["_end"] or datetime.min),
+    "relevance": lambda r: (r["_relevance"] is None, r["_relevance"] or 0.0),
+}
+
+
+def parse_date(value):
+    try:
+        return datetime.strptime(value.strip(), DATE_FORMAT)
+    except (AttributeError, ValueError):
+        return None
+
+
+def parse_quantity(value):
+    try:
+        return int(str(value).replace(",", "").strip())
+    except ValueError:
+        return None
+
+
+def parse_quantity_condition(text):
+    """">5", "<=10", "=3" or "3" -> (operator, number); None if not a condition."""
+    match = QUANTITY_CONDITION.match(text or "")
+    if not match:
+        return None
+    return match.group(1) or "=", int(match.group(2))
+
+
+def parse_filter_date(value):
+    """Filter dates come from <input type="date"> as YYYY-MM-DD."""
+    try:
+        return datetime.strptime(value, "%Y-%m-%d") if value else None
+    except ValueError:
+        return None
+
+
+class BidTable:
+    def __init__(self, store=None):
+        self.store = store or get_store()
+        # (version, rows, {(sort, descending): row order}) swapped as one unit on reload
+        self._snapshot = (None, [], {})
+        self._lock = threading.Lock()
+
+    def _index_row(self, row):
+        # Public columns keep the "Not Available" placeholder the table always showed
+        public = {k: (v if v not in ("", None) else "Not Available") for k, v in row.items()}
+        return {
+            **public,
+            "_bid": row["Bid Number"].lower(),
+            "_items": row["Items"].lower(),
+            "_department": row["Department"].lower(),
+            "_all": " ".join(str(v) for v in public.values()).lower(),
+            "_quantity": parse_quantity(row["Quantity"]),
+            "_start": parse_date(row["Start Date"]),
+            "_end": parse_date(row["End Date"]),
+            "_relevance": row["Relevance"] if row["Relevance"] != "" else None,
+        }
+
+    def snapshot(self):
+        """Current (version, rows, orders), reloaded from the bid store only if it changed."""
+        version = self.store.version("bids")
+        if version == self._snapshot[0]:
+            return self._snapshot
+        with self._lock:
+            if version != self._snapshot[0]:
+                rows = [self._index_row(r) for r in self.store.matched_bids()]
+                self._snapshot = (version, rows, {})
+                print(f"📋 Bid table reloaded: {len(rows)} rows (version {version})")
+            return self._snapshot
+
+    @staticmethod
+    def _order(rows, orders, sort, descending):
+        key = (sort, descending)
+        order = orders.get(key)
+        if order is None:
+            keys = [SORT_KEYS[sort](row) for row in rows]
+            order = sorted(range(len(rows)), key=keys.__getitem__, reverse=descending)
+            if descending:
+                # Rows without a value (keys starting with True) stay last in both directions
+                order.sort(key=lambda i: isinstance(keys[i], tuple) and keys[i][0] is True)
+            orders[key] = order
+        return order
+
+    @staticmethod
+    def matches(row, f):
+        if f["q"] and f["q"] not in row["_all"]:
+            return False
+        if f["bid"] and f["bid"] not in row["_bid"]:
+            return False
+        if f["items"] and not any(word in row["_items"] for word in f["items"]):
+            return False
+        if f["department"] and f["department"] not in row["_department"]:
+            return False
+        if f["quantity"]:
+            op, value = f["quantity"]
+            quantity = row["_quantity"]
+            if quantity is None:
+                return False
+            if (op == ">" and quantity <= value) or (op == "<" and quantity >= value) \
+                    or (op == ">=" and quantity < value) or (op == "<=" and quantity > value) \
+                    or (op == "=" and quantity != value):
+                return False
+        # Unparseable dates are kept, as the browser-side filter did
+        if f["start"] and row["_start"] and row["_start"] < f["start"]:
+            return False
+        if f["end"] and row["_end"] and row["_end"] > f["end"]:
+            return False
+        return True
+
+    def filtered(self, args):
+        """Returns (version, rows, matching row indices in sort order) for query-string args."""
+        version, rows, orders = self.snapshot()
+        filters = {
+            "q": (args.get("q") or "").strip().lower(),
+            "bid": (args.get("bid_number") or "").strip().lower(),
+            "items": (args.get("items") or "").strip().lower().split(),
+            "department": (args.get("department") or "").strip().lower(),
+            "quantity": parse_quantity_condition(args.get("quantity")),
+            "start": parse_filter_date(args.get("start_date")),
+            "end": parse_filter_date(args.get("end_date")),
+        }
+        sort = args.get("sort") if args.get("sort") in SORT_KEYS else None
+        order = self._order(rows, orders, sort, args.get("order") == "desc") if sort else range(len(rows))
+        if any(filters.values()):
+            order = [i for i in order if self.matches(rows[i], filters)]
+        return version, rows, order
+
+    def query(self, args):
+        """Filter, sort and page the table."""
+        version, rows, matched = self.filtered(args)
+        try:
+            page_size = min(max(int(args.get("page_size", 20)), 1), MAX_PAGE_SIZE)
+            page = max(int(args.get("page", 1)), 1)
+        except ValueError:
+            page_size, page = 20, 1
+        start = (page - 1) * page_size
+        return {
+            "data": [self.public(rows[i]) for i in matched[start:start + page_size]],
+            "total": len(matched),
+            "page": page,
+            "page_size": page_size,
+            "pages": (len(matched) + page_size - 1) // page_size,
+            "version": version,
+        }
+
+    def export(self, args):
+        """Every filtered row in sort order, for the CSV download."""
+        _, rows, matched = self.filtered(args)
+        return [self.public(rows[i]) for i in matched]
+
+    @staticmethod
+    def public(row):
+        return {k: v for k, v in row.items() if not k.startswith("_")}
+
+
+class ContextIndex:
+    """Extracted fields by normalized Bid Number, for /context_data.
+
+    A dict over the store's extracted table, rebuilt when its "extracted"
+    version changes, so each lookup is a single hash probe.
+    """
+
+    def __init__(self, store=None):
+        self.store = store or get_store()
+        self._snapshot = (None, {})
+        self._lock = threading.Lock()
+
+    def index(self):
+        version = self.store.version("extracted")
+        if version == self._snapshot[0]:
+            return self._snapshot[1]
+        with self._lock:
+            if version != self._snapshot[0]:
+                rows = {normalize_bid(r["Bid Number"]): r for r in self.store.all_extracted()}
+                self._snapshot = (version, rows)
+            return self._snapshot[1]
+
+    def get(self, bid):
+        return self.index().get(normalize_bid(bid))
+
+    def get_many(self, bids):
+        index = self.index()
+        return {bid: index.get(normalize_bid(bid)) for bid in bids}
+
+
+_table = None
+_context_index = None
+_table_lock = threading.Lock()
+
+
+def get_table():
+    global _table
+    with _table_lock:
+        if _table is None:
+            _table = BidTable()
+        return _table
+
+
+def get_context_index():
+    global _context_index
+    with _table_lock:
+        if _context_index is None:
+            _context_index = ContextIndex()
+        return _context_index
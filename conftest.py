@@ -0,0 +1,3 @@
+# The repo's older test*.py files are manual scripts (they drive Firefox or
+# call Ollama at import time); keep pytest to the unit tests.
+collect_ignore = ["test.py", "test_agent.py", "test_download.py", "scrap_test.py", "scrapers/test2.py"]
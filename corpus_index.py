@@ -0,0 +1,126 @@
+import os
+import re
+import threading
+import faiss
+import numpy as np
+from langchain_community.docstore.in_memory import InMemoryDocstore
+from langchain_community.vectorstores import FAISS
+from bid_store import get_store
+
+# Single corpus-wide index over every processed bid PDF and its annexures.
+# Each chunk carries bid_number, department, doc_id, source and page metadata.
+CORPUS_DIR = os.path.join("vectorstores", "corpus")
+
+BID_NUMBER_PATTERN = re.compile(r"GEM/\d{4}/[A-Z]/\d+", re.IGNORECASE)
+DEPARTMENT_PATTERN = re.compile(r"Department\s*Name[^:\n]*:\s*([^\n]+)", re.IGNORECASE)
+
+
+def normalize_bid(bid):
+    return bid.strip().upper()
+
+
+def normalize_bids(bids):
+    """Accept a single bid number, a comma separated string or a list."""
+    if not bids:
+        return []
+    if isinstance(bids, str):
+        bids = bids.split(",")
+    return [normalize_bid(b) for b in bids if b and b.strip()]
+
+
+def lookup_bid_metadata(pdf_path, text=""):
+    """Find Bid Number and Department for a downloaded bid PDF.
+
+    Matches the file against the bid store (by downloaded filename or the
+    document id at the end of the download URL) and falls back to the PDF text.
+    """
+    row = get_store().find_by_document(pdf_path)
+    if row:
+        return {"bid_number": normalize_bid(row["bid_number"]), "department": row["department"].strip()}
+
+    bid_match = BID_NUMBER_PATTERN.search(text)
+    department_match = DEPARTMENT_PATTERN.search(text)
+    return {
+        "bid_number": normalize_bid(bid_match.group(0)) if bid_match else "",
+        "department": department_match.group(1).strip() if department_match else "",
+    }
+
+
+class CorpusIndex:
+    def __init__(self, embedding, path=CORPUS_DIR):
+        self.embedding = embedding
+        self.path = path
+        self._store = None
+        self._bid_positions = None  # bid_number -> index positions, rebuilt after each change
+        self._lock = threading.Lock()
+
+    def _load(self):
+        if self._store is None and os.path.exists(os.path.join(self.path, "index.faiss")):
+            # The index was written by this app, so loading its pickle is safe
+            self._store = FAISS.load_local(self.path, self.embedding, allow_dangerous_deserialization=True)
+        return self._store
+
+    def add_document_index(self, doc_id, doc_store):
+        """Merge an already-embedded per-document index, replacing older chunks of doc_id."""
+        with self._lock:
+            store = self._load()
+            if store is None:
+                self._store = FAISS(
+                    embedding_function=self.embedding,
+                    index=faiss.IndexFlatL2(doc_store.index.d),
+                    docstore=InMemoryDocstore(),
+                    index_to_docstore_id={},
+                )
+                store = self._store
+
+            stale_ids = [i for i in store.index_to_docstore_id.values() if i.startswith(f"{doc_id}:")]
+            if stale_ids:
+                store.delete(stale_ids)
+            store.merge_from(doc_store)
+            store.save_local(self.path)
+            self._bid_positions = None
+        print(f"✅ Corpus index updated with {doc_id} ({store.index.ntotal} chunks total)")
+
+    def _bids_subindex(self, store, bids):
+        """A flat index holding only the chunks of bids, or None if none are indexed.
+
+        Searching it is exact over those bids' vectors, so generic questions
+        cannot be crowded out by closer chunks of other bids.
+        """
+        if self._bid_positions is None:
+            positions = {}
+            for position, docstore_id in store.index_to_docstore_id.items():
+                bid = store.docstore.search(docstore_id).metadata.get("bid_number", "")
+                positions.setdefault(bid, []).append(position)
+            self._bid_positions = positions
+        selected = sorted(p for bid in bids for p in self._bid_positions.get(bid, []))
+        if not selected:
+            return None
+
+        index = faiss.IndexFlatL2(store.index.d)
+        index.add(np.vstack([store.index.reconstruct(p) for p in selected]))
+        ids = [store.index_to_docstore_id[p] for p in selected]
+        return FAISS(
+            embedding_function=self.embedding,
+            index=index,
+            docstore=InMemoryDocstore({i: store.docstore.search(i) for i in ids}),
+            index_to_docstore_id=dict(enumerate(ids)),
+        )
+
+    def as_retriever(self, bids=None, k=5):
+        """Retriever over the whole corpus, or over only the given bids' chunks.
+
+        Returns None when the corpus (or every requested bid) has nothing indexed.
+        """
+        bids = normalize_bids(bids)
+        with self._lock:
+            store = self._load()
+            if store is not None and bids:
+                store = self._bids_subindex(store, bids)
+        if store is None:
+            return None
+        return store.as_retriever(search_type="similarity", search_kwargs={"k": k})
+
+    def search(self, query, bids=None, k=5):
+        retriever = self.as_retriever(bids=bids, k=k)
+        return retriever.invoke(query) if retriever else []
@@ -1,23 +1,65 @@
 import os
-import csv
 import re
-from langchain_huggingface import HuggingFaceEmbeddings
+import json
+import threading
+import ollama
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
 from langchain_community.vectorstores import FAISS
 from langchain.docstore.document import Document
 from langchain.text_splitter import RecursiveCharacterTextSplitter
 from langchain_ollama import OllamaLLM
+from embedding_cache import cached_embeddings
 from langchain.chains import RetrievalQA
-from unstructured.partition.pdf import partition_pdf
+from page_store import extract_pages
+from field_rules import prefill_fields
+from bid_store import get_store
 
-INPUT_CSV = "filtered_bid_results.csv"
-OUTPUT_CSV = "final_extracted_data.csv"
 PDF_DIR = "/home/kartikeyapatel/Videos/gem/first_extracted_data"
 
-# Embedding model
-embedding_model = HuggingFaceEmbeddings(
-    model_name="BAAI/bge-small-en-v1.5",
-    model_kwargs={"device": "cpu"}
-)
+# Pipeline settings: PDF parsing runs in a process pool, chunks of several
+# documents are embedded in one encoder call, and field questions run
+# concurrently against Ollama (set OLLAMA_NUM_PARALLEL on the server to match).
+PARSE_WORKERS = int(os.environ.get("EXTRACT_PARSE_WORKERS", str(os.cpu_count() or 2)))
+EMBED_BATCH_DOCS = int(os.environ.get("EXTRACT_EMBED_BATCH_DOCS", "8"))
+LLM_CONCURRENCY = int(os.environ.get("EXTRACT_LLM_CONCURRENCY", "4"))
+
+QUESTIONS = {
+    "EMD Amount": "What is the EMD Amount/ईएमड ?",
+    "Type of Bid": "Give me the Type of Bid, one packet ,two packet,etc?",
+    "Estimated Bid Value": "What is the Estimated Bid Value?",
+    "Minimum Average Annual Turnover": "What is the Minimum Average Annual Turnover of the bidder (For 3 Years)?"
+}
+
+# "structured" asks for all fields in one JSON-schema constrained generation;
+# "per_field" runs one RetrievalQA call per question with regex cleanup.
+EXTRACT_MODE = os.environ.get("EXTRACT_MODE", "structured")
+LLM_MODEL = "deepseek-r1"
+
+FIELD_KEYS = {
+    "EMD Amount": "emd_amount",
+    "Type of Bid": "type_of_bid",
+    "Estimated Bid Value": "estimated_bid_value",
+    "Minimum Average Annual Turnover": "minimum_average_annual_turnover",
+}
+NUMERIC_FIELDS = ["EMD Amount", "Estimated Bid Value", "Minimum Average Annual Turnover"]
+FIELD_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "emd_amount": {"type": "string", "description": "EMD amount with currency, or empty"},
+        "type_of_bid": {"type": "string", "description": "e.g. Single Packet Bid, Two Packet Bid"},
+        "estimated_bid_value": {"type": "string", "description": "Estimated bid value with currency, or empty"},
+        "minimum_average_annual_turnover": {"type": "string", "description": "Turnover required for 3 years, or empty"},
+    },
+    "required": list(FIELD_KEYS.values()),
+}
+
+_llm = None
+_llm_lock = threading.Lock()
+_llm_slots = threading.BoundedSemaphore(LLM_CONCURRENCY)
+
+# Embedding model (shared registry instance behind the persistent embedding
+# cache; parse workers never load it)
+embedding_model = cached_embeddings()
 
 # Text splitting
 def split_text(text, chunk_size=900, overlap=85):
@@ -31,8 +73,7 @@ def split_text(text, chunk_size=900, overlap=85):
 # Extract text from PDF
 def extract_text_from_pdf(pdf_path):
     try:
-        elements = partition_pdf(filename=pdf_path)
-        return "\n".join(el.text for el in elements if el.text)
+        return "\n".join(page["text"] for page in extract_pages(pdf_path) if page["text"])
     except Exception as e:
         print(f"❌ Failed to extract text from {pdf_path}: {e}")
         return ""
@@ -80,121 +121,265 @@ def clean_textual_answer(text):
 
     return "None"
 
-# Generate structured field answers via LangChain + FAISS
-def extract_fields(text):
-    try:
-        chunks = split_text(text)
-        docs = [Document(page_content=chunk) for chunk in chunks if chunk.strip()]
-        vector_store = FAISS.from_documents(docs, embedding_model)
-        retriever = vector_store.as_retriever(search_type="similarity", search_kwargs={"k": 4})
-        llm = OllamaLLM(model="deepseek-r1")
+def missing_answer(key):
+    return "0" if key in NUMERIC_FIELDS else "None"
+
+
+# Per-field answers are free text (reasoning, prefixes, sentences) and need the regex cleanup
+def normalize_answer(key, raw_text):
+    if key == "Type of Bid":
+        answer = clean_textual_answer(raw_text)
+    else:
+        answer = clean_numeric_answer(raw_text)
+
+    if answer == "None":
+        answer = missing_answer(key)
+    return answer
+
+
+# Structured answers and rule values are already bare field values: only empty ones are mapped
+def structured_answers(raw, fields):
+    """Field values from a schema-constrained JSON answer; ValueError if it does not match the schema."""
+    if not isinstance(raw, dict):
+        raise ValueError(f"expected a JSON object, got {type(raw).__name__}")
+    answers = {}
+    for field in fields:
+        value = raw.get(FIELD_KEYS[field])
+        if not isinstance(value, str):
+            raise ValueError(f"{FIELD_KEYS[field]} is {type(value).__name__}, expected a string")
+        answers[field] = " ".join(value.split()) or missing_answer(field)
+    return answers
+
+
+def get_llm():
+    global _llm
+    with _llm_lock:
+        if _llm is None:
+            _llm = OllamaLLM(model=LLM_MODEL)
+        return _llm
+
+
+# Build a per-document retriever from already computed chunk embeddings
+def build_retriever(chunks, vectors):
+    vector_store = FAISS.from_embeddings(list(zip(chunks, vectors)), embedding_model)
+    return vector_store.as_retriever(search_type="similarity", search_kwargs={"k": 4})
+
 
+def ask_field(qa, key, question):
+    with _llm_slots:
+        response = qa.invoke({"query": question})
+    raw_text = response.get("result", "").strip() if isinstance(response, dict) else str(response).strip()
+    print(f"\n🧠 {key} Raw LLM response: {raw_text}\n")
+    return normalize_answer(key, raw_text)
+
+
+# Ask the field questions for one document concurrently (capped by LLM_CONCURRENCY)
+def answer_fields(retriever, fields=None):
+    fields = fields or list(QUESTIONS)
+    try:
         qa = RetrievalQA.from_chain_type(
-            llm=llm,
+            llm=get_llm(),
             retriever=retriever,
             chain_type="stuff"
         )
+        with ThreadPoolExecutor(max_workers=len(fields)) as executor:
+            futures = {key: executor.submit(ask_field, qa, key, QUESTIONS[key]) for key in fields}
+            return {key: future.result() for key, future in futures.items()}
+    except Exception as e:
+        print(f"❌ Error during field extraction: {e}")
+        return {}
 
-        questions = {
-            "EMD Amount": "What is the EMD Amount/ईएमड ?",
-            "Type of Bid": "Give me the Type of Bid, one packet ,two packet,etc?",
-            "Estimated Bid Value": "What is the Estimated Bid Value?",
-            "Minimum Average Annual Turnover": "What is the Minimum Average Annual Turnover of the bidder (For 3 Years)?"
-        }
-
-        answers = {}
-        for key, question in questions.items():
-            response = qa.invoke({"query": question})
-            raw_text = response.get("result", "").strip() if isinstance(response, dict) else str(response).strip()
-            print(f"\n🧠 {key} Raw LLM response: {raw_text}\n")
-
-            if key == "Type of Bid":
-                answer = clean_textual_answer(raw_text)
-            else:
-                answer = clean_numeric_answer(raw_text)
 
-            if answer == "None" and key in ["EMD Amount", "Estimated Bid Value", "Minimum Average Annual Turnover"]:
-                answer = "0"
+# Retrieve the union of chunks relevant to any field (only the queries are embedded)
+def retrieve_field_context(retriever, fields):
+    seen, docs = set(), []
+    for key in fields:
+        for doc in retriever.invoke(QUESTIONS[key]):
+            if doc.page_content not in seen:
+                seen.add(doc.page_content)
+                docs.append(doc)
+    return "\n\n".join(doc.page_content for doc in docs)
+
 
-            answers[key] = answer
+def field_schema(fields):
+    keys = [FIELD_KEYS[field] for field in fields]
+    return {
+        "type": "object",
+        "properties": {key: FIELD_SCHEMA["properties"][key] for key in keys},
+        "required": keys,
+    }
 
-        return answers
+
+# Ask for all fields at once; Ollama constrains the output to the JSON schema
+def answer_fields_structured(retriever, fields=None):
+    fields = fields or list(QUESTIONS)
+    try:
+        context = retrieve_field_context(retriever, fields)
+        prompt = (
+            "You extract fields from Indian GeM tender documents. Using only the context below, "
+            "fill in every field. Copy amounts exactly as written (keep currency and units). "
+            "Use an empty string when a field is not stated.\n\n"
+            f"Context:\n{context}\n\n"
+            "Fields: " + ", ".join(QUESTIONS[field] for field in fields)
+        )
+        with _llm_slots:
+            response = ollama.generate(model=LLM_MODEL, prompt=prompt, format=field_schema(fields),
+                                       options={"temperature": 0})
+        raw = json.loads(response["response"])
+        print(f"\n🧠 Structured LLM response: {raw}\n")
+        return structured_answers(raw, fields)
+    except (ValueError, KeyError, ollama.ResponseError) as e:
+        print(f"⚠️ Structured extraction failed ({e}), falling back to per-field questions")
+        return answer_fields(retriever, fields)
     except Exception as e:
-        print(f"❌ Error during field extraction: {e}")
+        print(f"❌ Error during structured field extraction: {e}")
         return {}
 
-# Append row to CSV
-def append_to_csv(row, header):
-    file_exists = os.path.isfile(OUTPUT_CSV)
-    with open(OUTPUT_CSV, "a", newline="", encoding="utf-8") as f:
-        writer = csv.DictWriter(f, fieldnames=header)
-        if not file_exists:
-            writer.writeheader()
-        writer.writerow(row)
 
-# Main pipeline
-def main():
-    # Load existing entries from output CSV to skip duplicates
-    processed_keys = set()
-    if os.path.exists(OUTPUT_CSV):
-        with open(OUTPUT_CSV, "r", encoding="utf-8") as f:
-            reader = csv.DictReader(f)
-            for row in reader:
-                key = (row.get("Bid Number", "").strip(), row.get("Ministry Name", "").strip())
-                processed_keys.add(key)
-
-    # Read input and process unprocessed PDFs
-    with open(INPUT_CSV, "r", encoding="utf-8") as infile:
-        reader = csv.DictReader(infile)
-        for row in reader:
-            bid_number = row.get("Bid Number", "").strip()
-            ministry_name = row.get("Department", "").strip()
-            key = (bid_number, ministry_name)
-
-            # Check for duplicates
-            if key in processed_keys:
-                raw_name = row.get("Downloaded Filename", "").strip()
-                filename = raw_name if raw_name.endswith(".pdf") else f"{raw_name}.pdf"
-                pdf_path = os.path.join(PDF_DIR, filename)
-                if os.path.exists(pdf_path):
-                    os.remove(pdf_path)
-                    print(f"⏩ Skipped & deleted duplicate file: {filename}")
-                else:
-                    print(f"⏩ Skipped duplicate (file already missing): {filename}")
-                continue
+def extract_document_fields(retriever, fields=None):
+    if EXTRACT_MODE == "structured":
+        return answer_fields_structured(retriever, fields)
+    return answer_fields(retriever, fields)
 
-            raw_name = row.get("Downloaded Filename", "").strip()
-            if not raw_name or raw_name.startswith("ERROR"):
-                print(f"⏩ Skipping invalid filename: {raw_name}")
-                continue
 
+# Parse stage (runs in the process pool): rules first, full text only if the LLM is needed
+def prepare_document(pdf_path):
+    resolved, unresolved = prefill_fields(pdf_path)
+    text = extract_text_from_pdf(pdf_path) if unresolved else ""
+    return resolved, unresolved, text
+
+
+# Collect the (bid_number, ministry_name, filename, pdf_path) jobs still to process
+def collect_jobs():
+    store = get_store()
+    jobs = []
+    for row in store.matched_bids():
+        bid_number = row.get("Bid Number", "").strip()
+        ministry_name = row.get("Department", "").strip()
+
+        # Skip bids whose fields are already in the store
+        if store.is_extracted(bid_number):
+            raw_name = row.get("Downloaded Filename", "").strip()
             filename = raw_name if raw_name.endswith(".pdf") else f"{raw_name}.pdf"
             pdf_path = os.path.join(PDF_DIR, filename)
-            if not os.path.isfile(pdf_path):
-                print(f"⚠️ File missing: {pdf_path}")
-                continue
+            if os.path.exists(pdf_path):
+                os.remove(pdf_path)
+                print(f"⏩ Skipped & deleted duplicate file: {filename}")
+            else:
+                print(f"⏩ Skipped duplicate (file already missing): {filename}")
+            continue
+
+        raw_name = row.get("Downloaded Filename", "").strip()
+        if not raw_name or raw_name.startswith("ERROR") or raw_name == "No URL":
+            print(f"⏩ Skipping invalid filename: {raw_name}")
+            continue
+
+        filename = raw_name if raw_name.endswith(".pdf") else f"{raw_name}.pdf"
+        pdf_path = os.path.join(PDF_DIR, filename)
+        if not os.path.isfile(pdf_path):
+            print(f"⚠️ File missing: {pdf_path}")
+            continue
+
+        jobs.append((bid_number, ministry_name, filename, pdf_path))
+    return jobs
+
+
+def finish_job(job, extracted, retriever=None, unresolved=()):
+    bid_number, ministry_name, filename, pdf_path = job
+    extracted = {field: " ".join(str(value).split()) or missing_answer(field) for field, value in extracted.items()}
+    if retriever is not None and unresolved:
+        extracted = {**extract_document_fields(retriever, list(unresolved)), **extracted}
+    output_row = {
+        "Bid Number": bid_number,
+        "Ministry Name": ministry_name,
+        "Downloaded Filename": filename,
+        "EMD Amount": extracted.get("EMD Amount", ""),
+        "Type of Bid": extracted.get("Type of Bid", ""),
+        "Estimated Bid Value": extracted.get("Estimated Bid Value", ""),
+        "Minimum Average Annual Turnover": extracted.get("Minimum Average Annual Turnover", "")
+    }
+
+    get_store().upsert_extracted(output_row)
+    os.remove(pdf_path)
+    print(f"✅ Extracted & deleted: {filename}")
+
+
+# Embed a batch of parsed documents in one encoder call, then hand each to the LLM stage
+def embed_batch(batch, llm_executor):
+    all_chunks, spans = [], []
+    for job, text, resolved, unresolved in batch:
+        chunks = [chunk for chunk in split_text(text) if chunk.strip()]
+        spans.append((job, resolved, unresolved, len(all_chunks), len(all_chunks) + len(chunks)))
+        all_chunks.extend(chunks)
+
+    print(f"🧮 Embedding {len(all_chunks)} chunks from {len(batch)} documents")
+    try:
+        vectors = embedding_model.embed_documents(all_chunks)
+    except Exception as e:
+        print(f"❌ Error embedding batch: {e}")
+        return []
+
+    futures = []
+    for job, resolved, unresolved, start, end in spans:
+        if start == end:
+            print(f"⚠️ No chunks in {job[2]}")
+            continue
+        retriever = build_retriever(all_chunks[start:end], vectors[start:end])
+        futures.append(llm_executor.submit(finish_job, job, resolved, retriever, unresolved))
+    return futures
+
 
-            print(f"🔍 Processing {filename}")
-            text = extract_text_from_pdf(pdf_path)
+# Main pipeline: parse + rules (process pool) -> batched embed -> concurrent LLM questions.
+# Documents whose fields are all resolved by field_rules never reach the embed/LLM stages.
+def main():
+    jobs = collect_jobs()
+    if not jobs:
+        print("Nothing to extract.")
+        return
+
+    llm_futures = []
+    batch = []
+    # Structured mode uses one LLM slot per document, per-field mode one per question
+    if EXTRACT_MODE == "structured":
+        doc_workers = LLM_CONCURRENCY
+    else:
+        doc_workers = max(1, LLM_CONCURRENCY // len(QUESTIONS) + 1)
+    with ProcessPoolExecutor(max_workers=PARSE_WORKERS) as parse_executor, \
+            ThreadPoolExecutor(max_workers=doc_workers) as llm_executor:
+        parse_futures = {parse_executor.submit(prepare_document, job[3]): job for job in jobs}
+        for future in as_completed(parse_futures):
+            job = parse_futures[future]
+            try:
+                resolved, unresolved, text = future.result()
+            except Exception as e:
+                # One unreadable PDF must not stop the run
+                print(f"❌ Error parsing {job[2]}: {e}")
+                continue
+            if not unresolved:
+                print(f"⚡ All fields resolved by rules for {job[2]}")
+                finish_job(job, resolved)
+                continue
             if not text.strip():
-                print(f"⚠️ Empty content in {filename}")
+                print(f"⚠️ Empty content in {job[2]}")
                 continue
 
-            extracted = extract_fields(text)
-            output_row = {
-                "Bid Number": bid_number,
-                "Ministry Name": ministry_name,
-                "Downloaded Filename": filename,
-                "EMD Amount": extracted.get("EMD Amount", ""),
-                "Type of Bid": extracted.get("Type of Bid", ""),
-                "Estimated Bid Value": extracted.get("Estimated Bid Value", ""),
-                "Minimum Average Annual Turnover": extracted.get("Minimum Average Annual Turnover", "")
-            }
-
-            append_to_csv(output_row, header=list(output_row.keys()))
-            os.remove(pdf_path)
-            print(f"✅ Extracted & deleted: {filename}")
+            print(f"🔍 Parsed {job[2]} (LLM needed for: {', '.join(unresolved)})")
+            batch.append((job, text, resolved, unresolved))
+            if len(batch) >= EMBED_BATCH_DOCS:
+                llm_futures += embed_batch(batch, llm_executor)
+                batch = []
+
+        if batch:
+            llm_futures += embed_batch(batch, llm_executor)
+
+        for future in as_completed(llm_futures):
+            try:
+                future.result()
+            except Exception as e:
+                print(f"❌ Error finishing document: {e}")
 
+    stats = embedding_model.cache.stats()
+    print(f"🗃️ Embedding cache: {stats['hits']} hits, {stats['misses']} misses, {stats['entries']} entries")
 
 
 if __name__ == "__main__":
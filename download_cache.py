@@ -0,0 +1,201 @@
+import os
+import json
+import time
+import atexit
+import shutil
+import hashlib
+import threading
+
+# Shared content-addressed cache for downloaded bid documents and annexures.
+# Objects live at <CACHE_DIR>/objects/<sha[:2]>/<sha>; index.json maps each URL
+# to its sha256 plus the ETag/Last-Modified validators of the last response.
+CACHE_DIR = os.environ.get("DOWNLOAD_CACHE_DIR", "download_cache")
+MAX_CACHE_BYTES = int(os.environ.get("DOWNLOAD_CACHE_MAX_BYTES", str(2 * 1024 ** 3)))
+# Entries younger than this are served without revalidating with the server
+FRESH_SECONDS = int(os.environ.get("DOWNLOAD_CACHE_FRESH_SECONDS", str(24 * 3600)))
+# Cache hits only update recency in memory; the index is written at most this often for them
+INDEX_FLUSH_SECONDS = 30
+
+
+def sha256_file(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class DownloadCache:
+    def __init__(self, root=CACHE_DIR, max_bytes=MAX_CACHE_BYTES, fresh_seconds=FRESH_SECONDS):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.fresh_seconds = fresh_seconds
+        self.index_path = os.path.join(root, "index.json")
+        self._dirty = False
+        self._last_write = 0.0
+        self._lock = threading.RLock()
+        os.makedirs(os.path.join(root, "objects"), exist_ok=True)
+        os.makedirs(os.path.join(root, "tmp"), exist_ok=True)
+        self._index = self._read_index()
+
+    # ====== index ======
+    def _read_index(self):
+        if os.path.exists(self.index_path):
+            try:
+                with open(self.index_path, encoding="utf-8") as f:
+                    index = json.load(f)
+                index.setdefault("urls", {})
+                index.setdefault("objects", {})
+                return index
+            except (OSError, ValueError) as e:
+                print(f"⚠️ Download cache index unreadable, starting fresh: {e}")
+        return {"urls": {}, "objects": {}}
+
+    def _write_index(self):
+        tmp_path = self.index_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self._index, f)
+        os.replace(tmp_path, self.index_path)
+        self._dirty = False
+        self._last_write = time.time()
+
+    def flush(self):
+        """Write recency updates from cache hits that are still only in memory."""
+        with self._lock:
+            if self._dirty:
+                self._write_index()
+
+    def object_path(self, sha):
+        return os.path.join(self.root, "objects", sha[:2], sha)
+
+    def part_path(self, url):
+        """Stable temp path per URL so interrupted downloads can resume."""
+        return os.path.join(self.root, "tmp", hashlib.sha256(url.encode("utf-8")).hexdigest() + ".part")
+
+    def part_validator(self, url):
+        """Strong ETag or Last-Modified of the response the .part file was started from."""
+        try:
+            with open(self.part_path(url) + ".validator", encoding="utf-8") as f:
+                return f.read().strip() or None
+        except FileNotFoundError:
+            return None
+
+    def set_part_validator(self, url, value):
+        path = self.part_path(url) + ".validator"
+        if value:
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(value)
+        elif os.path.exists(path):
+            os.remove(path)
+
+    def discard_part(self, url):
+        for path in (self.part_path(url), self.part_path(url) + ".validator"):
+            if os.path.exists(path):
+                os.remove(path)
+
+    # ====== lookups ======
+    def lookup(self, url):
+        """Return the index entry for url if its object is still on disk."""
+        with self._lock:
+            entry = self._index["urls"].get(url)
+            if entry and os.path.exists(self.object_path(entry["sha256"])):
+                return dict(entry)
+            return None
+
+    def is_fresh(self, entry):
+        return time.time() - entry.get("fetched_at", 0) < self.fresh_seconds
+
+    def validators(self, entry):
+        headers = {}
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def touch(self, url, revalidated=False):
+        with self._lock:
+            entry = self._index["urls"].get(url)
+            if not entry:
+                return
+            if revalidated:
+                entry["fetched_at"] = time.time()
+            obj = self._index["objects"].get(entry["sha256"])
+            if obj:
+                obj["last_access"] = time.time()
+            self._dirty = True
+            if time.time() - self._last_write >= INDEX_FLUSH_SECONDS:
+                self._write_index()
+
+    # ====== writes ======
+    def store(self, url, part_path, etag=None, last_modified=None, content_type=""):
+        """Move a completed download into the cache and index it. Returns the sha256."""
+        sha = sha256_file(part_path)
+        target = self.object_path(sha)
+        with self._lock:
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            if os.path.exists(target):
+                os.remove(part_path)
+            else:
+                os.replace(part_path, target)
+            if os.path.exists(part_path + ".validator"):
+                os.remove(part_path + ".validator")
+            now = time.time()
+            self._index["objects"][sha] = {"size": os.path.getsize(target), "last_access": now}
+            self._index["urls"][url] = {
+                "sha256": sha,
+                "etag": etag,
+                "last_modified": last_modified,
+                "content_type": content_type,
+                "fetched_at": now,
+            }
+            self._evict(keep=sha)
+            self._write_index()
+        return sha
+
+    def materialize(self, sha, dest_path):
+        """Copy a cached object to dest_path.
+
+        A copy, not a hard link: working directories are moved, edited and
+        deleted, and an in-place write to a link would corrupt the cache.
+        Raises FileNotFoundError if the object was evicted since its lookup.
+        """
+        source = self.object_path(sha)
+        os.makedirs(os.path.dirname(dest_path) or ".", exist_ok=True)
+        shutil.copyfile(source, dest_path)
+        return dest_path
+
+    def _evict(self, keep=None):
+        """Drop least recently used objects until the cache fits in max_bytes."""
+        objects = self._index["objects"]
+        total = sum(o["size"] for o in objects.values())
+        if total <= self.max_bytes:
+            return
+        for sha, obj in sorted(objects.items(), key=lambda item: item[1]["last_access"]):
+            if total <= self.max_bytes:
+                break
+            if sha == keep:
+                continue
+            try:
+                os.remove(self.object_path(sha))
+            except FileNotFoundError:
+                pass
+            total -= obj["size"]
+            del objects[sha]
+        stale_urls = [u for u, e in self._index["urls"].items() if e["sha256"] not in objects]
+        for url in stale_urls:
+            del self._index["urls"][url]
+        print(f"🧹 Download cache evicted to {total / 1024 ** 2:.1f} MB")
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_cache():
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = DownloadCache()
+            atexit.register(_cache.flush)
+        return _cache
@@ -0,0 +1,222 @@
+import os
+import time
+import threading
+from urllib.parse import urlparse
+from concurrent.futures import ThreadPoolExecutor
+import requests
+from requests.adapters import HTTPAdapter
+from download_cache import get_cache
+
+# Concurrent bid-document downloader: one long-lived worker pool whose threads
+# keep their keep-alive sessions across requests, per-host concurrency limits,
+# HTTP Range resume (guarded by If-Range) and retries with backoff.
+# Every download goes through the shared content-addressed download cache.
+MAX_WORKERS = int(os.environ.get("DOWNLOAD_WORKERS", "8"))
+PER_HOST_LIMIT = int(os.environ.get("DOWNLOAD_PER_HOST", "4"))
+MAX_RETRIES = 3
+BACKOFF_SECONDS = 1.0
+TIMEOUT = (10, 60)  # connect, read
+CHUNK_SIZE = 256 * 1024
+
+HEADERS = {
+    "User-Agent": "Mozilla/5.0",
+    "Accept": "*/*",
+}
+
+
+class DownloadError(Exception):
+    pass
+
+
+def pdf_filename(url):
+    filename = os.path.basename(urlparse(url).path) or "downloaded_file"
+    if not filename.endswith(".pdf"):
+        filename += ".pdf"
+    return filename
+
+
+class DownloadManager:
+    def __init__(self, max_workers=MAX_WORKERS, per_host_limit=PER_HOST_LIMIT,
+                 max_retries=MAX_RETRIES, backoff=BACKOFF_SECONDS, cache=None):
+        self.max_workers = max_workers
+        self.per_host_limit = per_host_limit
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.cache = cache or get_cache()
+        self._local = threading.local()
+        self._host_limits = {}
+        self._url_locks = {}  # url -> [lock, number of fetches using it]
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def submit(self, func, *args):
+        """Run func(*args) on the manager's worker pool, created on first use and kept for the process."""
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="download")
+            executor = self._executor
+        return executor.submit(func, *args)
+
+    def _session(self):
+        # One keep-alive session per worker thread (requests.Session is not thread safe)
+        session = getattr(self._local, "session", None)
+        if session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=self.per_host_limit, pool_maxsize=self.per_host_limit)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            session.headers.update(HEADERS)
+            self._local.session = session
+        return session
+
+    def _host_limit(self, url):
+        host = urlparse(url).netloc
+        with self._lock:
+            if host not in self._host_limits:
+                self._host_limits[host] = threading.BoundedSemaphore(self.per_host_limit)
+            return self._host_limits[host]
+
+    def _fetch(self, url, require_pdf=True, verify=True):
+        # Only one worker may write a given URL's .part file at a time; the
+        # lock is dropped once no fetch of the URL is waiting for it
+        with self._lock:
+            holder = self._url_locks.setdefault(url, [threading.Lock(), 0])
+            holder[1] += 1
+        try:
+            with holder[0]:
+                return self._fetch_locked(url, require_pdf=require_pdf, verify=verify)
+        finally:
+            with self._lock:
+                holder[1] -= 1
+                if not holder[1]:
+                    del self._url_locks[url]
+
+    def _fetch_locked(self, url, require_pdf=True, verify=True):
+        """Bring url into the download cache and return its index entry.
+
+        Fresh cache entries cost no network traffic; stale ones are revalidated
+        with ETag/Last-Modified. New downloads resume from the cache's .part file.
+        """
+        entry = self.cache.lookup(url)
+        if entry and self.cache.is_fresh(entry):
+            self.cache.touch(url)
+            return entry
+
+        part_path = self.cache.part_path(url)
+        offset = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+        validator = self.cache.part_validator(url) if offset else None
+        if offset and not validator:
+            # Nothing proves the partial file matches the server's current content
+            self.cache.discard_part(url)
+            offset = 0
+        if offset:
+            # If-Range: the server sends the rest (206) only if the document is unchanged, else all of it (200)
+            headers = {"Range": f"bytes={offset}-", "If-Range": validator}
+        else:
+            headers = self.cache.validators(entry) if entry else {}
+
+        with self._host_limit(url):
+            with self._session().get(url, headers=headers, stream=True, timeout=TIMEOUT,
+                                     allow_redirects=True, verify=verify) as response:
+                if response.status_code == 304 and entry:
+                    self.cache.touch(url, revalidated=True)
+                    return entry
+                if response.status_code == 416:
+                    # Range not satisfiable: the partial file is stale, start over
+                    self.cache.discard_part(url)
+                    raise requests.ConnectionError("Stale partial download discarded")
+                response.raise_for_status()
+
+                content_type = response.headers.get("Content-Type", "")
+                if require_pdf and "application/pdf" not in content_type:
+                    # Not a PDF; save HTML to debug
+                    debug_path = os.path.join(self.cache.root, "debug_response.html")
+                    with open(debug_path, "wb") as f:
+                        f.write(response.content)
+                    raise DownloadError(f"⚠️ Not a PDF. Saved debug HTML to {debug_path}")
+
+                resume = offset and response.status_code == 206
+                if not resume:
+                    # New or changed content (a 200 answer to If-Range): restart the .part file
+                    # and remember which version of the document it holds
+                    etag = response.headers.get("ETag") or ""
+                    strong_etag = etag if etag and not etag.startswith("W/") else None
+                    self.cache.set_part_validator(url, strong_etag or response.headers.get("Last-Modified"))
+                with open(part_path, "ab" if resume else "wb") as f:
+                    for chunk in response.iter_content(chunk_size=CHUNK_SIZE):
+                        if chunk:
+                            f.write(chunk)
+
+                self.cache.store(url, part_path,
+                                 etag=response.headers.get("ETag"),
+                                 last_modified=response.headers.get("Last-Modified"),
+                                 content_type=content_type)
+        return self.cache.lookup(url)
+
+    def fetch(self, url, require_pdf=True, verify=True):
+        """Returns (cache_entry, error), retrying transient failures with backoff."""
+        error = None
+        for attempt in range(1, self.max_retries + 1):
+            try:
+                entry = self._fetch(url, require_pdf=require_pdf, verify=verify)
+                if entry is None:
+                    raise OSError("Cached object disappeared")
+                return entry, None
+            except DownloadError as e:
+                return None, str(e)
+            except requests.HTTPError as e:
+                status = e.response.status_code if e.response is not None else None
+                if status is not None and status < 500 and status != 429:
+                    return None, f"❌ HTTP {status}"
+                error = e
+            except (requests.RequestException, OSError) as e:
+                error = e
+            if attempt < self.max_retries:
+                delay = self.backoff * 2 ** (attempt - 1)
+                print(f"🔁 Retry {attempt}/{self.max_retries - 1} for {url} in {delay:.0f}s: {error}")
+                time.sleep(delay)
+        return None, f"❌ Exception: {error}"
+
+    def fetch_to(self, url, dest_for, require_pdf=True, verify=True):
+        """fetch() and copy the object to dest_for(entry). Returns (dest_path, error).
+
+        An object evicted between the lookup and the copy is a cache miss:
+        the URL is fetched again.
+        """
+        for attempt in range(2):
+            entry, error = self.fetch(url, require_pdf=require_pdf, verify=verify)
+            if error:
+                return None, error
+            try:
+                return self.cache.materialize(entry["sha256"], dest_for(entry)), None
+            except FileNotFoundError:
+                print(f"♻️ {url} was evicted from the download cache before it was copied, fetching again")
+        return None, "❌ Cached object evicted before it could be copied"
+
+    def download(self, url, save_dir, filename=None, require_pdf=True, verify=True):
+        """Returns (filename, error) like app.download_files."""
+        filename = filename or pdf_filename(url)
+        filepath, error = self.fetch_to(url, lambda entry: os.path.join(save_dir, filename),
+                                        require_pdf=require_pdf, verify=verify)
+        if error:
+            return None, error
+        print(f"✅ Saved to: {filepath}")
+        return filename, None
+
+    def download_all(self, urls, save_dir):
+        """Download many URLs concurrently. Returns {url: (filename, error)}."""
+        unique_urls = list(dict.fromkeys(u for u in urls if u))
+        futures = {u: self.submit(self.download, u, save_dir) for u in unique_urls}
+        return {u: future.result() for u, future in futures.items()}
+
+
+_manager = None
+_manager_lock = threading.Lock()
+
+
+def get_manager():
+    global _manager
+    with _manager_lock:
+        if _manager is None:
+            _manager = DownloadManager()
+        return _manager
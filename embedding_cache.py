@@ -0,0 +1,241 @@
+import os
+import re
+import time
+import sqlite3
+import hashlib
+import threading
+from contextlib import contextmanager
+import numpy as np
+from langchain_core.embeddings import Embeddings
+from model_registry import LazyEmbeddings, EMBEDDING_MODEL_NAME, default_embedding_name
+
+try:
+    import fcntl
+except ImportError:  # Windows: only threads of one process are serialized
+    fcntl = None
+
+# Persistent embedding cache. Vectors live in a memory-mapped float32 file of
+# fixed capacity (<root>/<model>/vectors.f32, one row per slot); a SQLite index
+# maps sha256(kind, text) -> slot plus a last-used time for LRU eviction, so a
+# chunk or query that was embedded once is never encoded again. The Flask app
+# and data_extraction_all.py share the files, so slot reads and writes hold a
+# lock file (flock) as well as the in-process lock.
+EMBED_CACHE_DIR = os.environ.get("EMBED_CACHE_DIR", "embedding_cache")
+EMBED_CACHE_MAX_ENTRIES = int(os.environ.get("EMBED_CACHE_MAX_ENTRIES", "200000"))
+EVICT_FRACTION = 0.05  # share of the cache freed at once when it is full
+
+
+class EmbeddingCache:
+    def __init__(self, model_name, root=EMBED_CACHE_DIR, max_entries=EMBED_CACHE_MAX_ENTRIES):
+        self.model_name = model_name
+        self.root = os.path.join(root, re.sub(r"[^A-Za-z0-9._-]+", "_", model_name))
+        self.max_entries = max_entries
+        self.vectors_path = os.path.join(self.root, "vectors.f32")
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._vectors = None
+        self._dim = None
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        os.makedirs(self.root, exist_ok=True)
+        self._lock_file = open(os.path.join(self.root, "cache.lock"), "a")
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS entries (
+                    key TEXT PRIMARY KEY,
+                    slot INTEGER NOT NULL UNIQUE,
+                    last_used REAL NOT NULL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS entries_last_used ON entries (last_used)")
+            conn.execute("CREATE TABLE IF NOT EXISTS free_slots (slot INTEGER PRIMARY KEY)")
+            conn.execute("CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value TEXT NOT NULL)")
+            row = conn.execute("SELECT value FROM meta WHERE name = 'dim'").fetchone()
+            if row:
+                self._open_vectors(int(row[0]))
+
+    def _connect(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(os.path.join(self.root, "index.sqlite"), timeout=30)
+            self._local.conn = conn
+        return conn
+
+    @contextmanager
+    def _locked(self, shared=False):
+        """In-process lock plus the cross-process file lock (shared for reads)."""
+        with self._lock:
+            if fcntl is None:
+                yield
+                return
+            fcntl.flock(self._lock_file, fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(self._lock_file, fcntl.LOCK_UN)
+
+    def _open_vectors(self, dim):
+        # Sized for max_entries up front; the file is sparse until slots are written
+        size = self.max_entries * dim * 4
+        if not os.path.exists(self.vectors_path) or os.path.getsize(self.vectors_path) < size:
+            with open(self.vectors_path, "ab") as f:
+                f.truncate(size)
+        self._vectors = np.memmap(self.vectors_path, dtype=np.float32, mode="r+", shape=(self.max_entries, dim))
+        self._dim = dim
+
+    def key(self, kind, text):
+        return hashlib.sha256(f"{kind}\0{text}".encode("utf-8")).hexdigest()
+
+    def get_many(self, keys):
+        """Returns {key: vector} for the keys that are cached."""
+        if self._vectors is None or not keys:
+            self.misses += len(keys)
+            return {}
+        conn = self._connect()
+        found = {}
+        unique = list(dict.fromkeys(keys))
+        # Slot lookup and vector copy happen under the writers' lock: put_many
+        # (in this or another process) can evict a slot and overwrite it
+        with self._locked(shared=True):
+            for i in range(0, len(unique), 500):
+                batch = unique[i:i + 500]
+                placeholders = ",".join("?" * len(batch))
+                found.update(conn.execute(
+                    f"SELECT key, slot FROM entries WHERE key IN ({placeholders})", batch).fetchall())
+            vectors = {k: np.array(self._vectors[slot]) for k, slot in found.items()}
+        if found:
+            with conn:
+                conn.executemany("UPDATE entries SET last_used = ? WHERE key = ?",
+                                 [(time.time(), k) for k in found])
+        self.hits += sum(1 for k in keys if k in found)
+        self.misses += sum(1 for k in keys if k not in found)
+        return vectors
+
+    def _reserve_slots(self, conn, count):
+        """Take count free slots, evicting least recently used entries when the cache is full."""
+        slots = [slot for (slot,) in conn.execute("SELECT slot FROM free_slots LIMIT ?", (count,))]
+        conn.executemany("DELETE FROM free_slots WHERE slot = ?", [(slot,) for slot in slots])
+
+        row = conn.execute("SELECT value FROM meta WHERE name = 'next_slot'").fetchone()
+        next_slot = int(row[0]) if row else 0
+        fresh = list(range(next_slot, min(next_slot + count - len(slots), self.max_entries)))
+        slots += fresh
+        conn.execute("INSERT OR REPLACE INTO meta (name, value) VALUES ('next_slot', ?)",
+                     (str(next_slot + len(fresh)),))
+
+        missing = count - len(slots)
+        if missing > 0:
+            evict = max(missing, int(self.max_entries * EVICT_FRACTION))
+            victims = [slot for (slot,) in conn.execute(
+                "SELECT slot FROM entries ORDER BY last_used LIMIT ?", (evict,))]
+            conn.executemany("DELETE FROM entries WHERE slot = ?", [(slot,) for slot in victims])
+            self.evictions += len(victims)
+            slots += victims[:missing]
+            conn.executemany("INSERT INTO free_slots (slot) VALUES (?)", [(slot,) for slot in victims[missing:]])
+        return slots
+
+    def put_many(self, items):
+        """Store {key: vector}."""
+        if not items:
+            return
+        with self._locked():
+            conn = self._connect()
+            dim = len(next(iter(items.values())))
+            if self._vectors is None:
+                with conn:
+                    conn.execute("INSERT OR IGNORE INTO meta (name, value) VALUES ('dim', ?)", (str(dim),))
+                self._open_vectors(dim)
+            if dim != self._dim:
+                raise ValueError(f"Embedding dim {dim} does not match cache dim {self._dim}")
+
+            existing = set()
+            keys = list(items)
+            for i in range(0, len(keys), 500):
+                batch = keys[i:i + 500]
+                placeholders = ",".join("?" * len(batch))
+                existing.update(k for (k,) in conn.execute(
+                    f"SELECT key FROM entries WHERE key IN ({placeholders})", batch))
+            new_keys = [k for k in keys if k not in existing][:self.max_entries]
+            if not new_keys:
+                return
+
+            # Slots are reserved (and evicted rows deleted) before vectors are
+            # written, so an interrupted write can never leave an index row
+            # pointing at another text's vector
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                slots = self._reserve_slots(conn, len(new_keys))
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+
+            for key, slot in zip(new_keys, slots):
+                self._vectors[slot] = np.asarray(items[key], dtype=np.float32)
+            self._vectors.flush()
+
+            now = time.time()
+            with conn:
+                conn.executemany("INSERT OR REPLACE INTO entries (key, slot, last_used) VALUES (?, ?, ?)",
+                                 [(key, slot, now) for key, slot in zip(new_keys, slots)])
+
+    def stats(self):
+        total = self.hits + self.misses
+        entries = self._connect().execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+        return {
+            "model": self.model_name,
+            "entries": entries,
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 3) if total else 0.0,
+            "evictions": self.evictions,
+        }
+
+
+class CachedEmbeddings(Embeddings):
+    """Embeddings wrapper that serves repeated texts from an EmbeddingCache."""
+
+    def __init__(self, inner, cache):
+        self.inner = inner
+        self.cache = cache
+
+    def _embed(self, kind, texts, compute):
+        keys = [self.cache.key(kind, t) for t in texts]
+        cached = self.cache.get_many(keys)
+        # Each distinct uncached text is encoded once, even if repeated in the batch
+        todo = {}
+        for key, text in zip(keys, texts):
+            if key not in cached and key not in todo:
+                todo[key] = text
+        if todo:
+            computed = dict(zip(todo, compute(list(todo.values()))))
+            self.cache.put_many(computed)
+            cached.update({k: np.asarray(v, dtype=np.float32) for k, v in computed.items()})
+        return [cached[k].tolist() for k in keys]
+
+    def embed_documents(self, texts):
+        return self._embed("doc", texts, self.inner.embed_documents)
+
+    def embed_query(self, text):
+        return self._embed("query", [text], lambda ts: [self.inner.embed_query(t) for t in ts])[0]
+
+
+_cached = {}
+_cached_lock = threading.Lock()
+
+
+def cached_embeddings(name=None):
+    """Shared cache-wrapped registry embeddings, one per model per process.
+
+    Defaults to the backend selected by EMBEDDING_BACKEND.
+    """
+    name = name or default_embedding_name()
+    with _cached_lock:
+        if name not in _cached:
+            # Each backend gets its own cache; their vectors are close but not identical
+            cache_name = EMBEDDING_MODEL_NAME if name == "bge-small" else f"{EMBEDDING_MODEL_NAME}@{name}"
+            _cached[name] = CachedEmbeddings(LazyEmbeddings(name), EmbeddingCache(cache_name))
+        return _cached[name]
@@ -0,0 +1,125 @@
+import re
+
+# Rule-based extractor for the fixed bilingual GeM bid layout. Labels such as
+# "EMD Amount/ईएमडी राशि" sit in the left cell of a two column table and the
+# value in the right cell, so most fields can be read without an LLM.
+MAX_PAGES = 6
+CONFIDENCE_THRESHOLD = 0.75
+
+FIELD_LABELS = {
+    "EMD Amount": re.compile(r"\bEMD\s*Amount", re.IGNORECASE),
+    "Type of Bid": re.compile(r"\bType\s*of\s*Bid", re.IGNORECASE),
+    "Estimated Bid Value": re.compile(r"\bEstimated\s*Bid\s*Value", re.IGNORECASE),
+    "Minimum Average Annual Turnover": re.compile(r"\bMinimum\s*Average\s*Annual\s*Turnover", re.IGNORECASE),
+}
+
+# An amount needs a currency, a unit or a plausible magnitude; bare small
+# numbers such as "90 (Days)" or the "3" of "(For 3 Years)" are not amounts.
+AMOUNT_PATTERN = re.compile(
+    r"""
+    (?:Rs\.?|INR|₹)\s*\d[\d,]*(?:\.\d+)?(?:\s*(?:lakh|lac|crore|million|billion|rupees)\b)?
+    | \d[\d,]*(?:\.\d+)?\s*(?:lakh|lac|crore|million|billion|rupees)\b
+    | (?<![\d\-/.:])(?:\d{1,3}(?:,\d{2,3})+|\d{4,})(?:\.\d+)?(?![\d\-/:])
+    """,
+    re.IGNORECASE | re.VERBOSE,
+)
+BID_TYPE_PATTERN = re.compile(r"(single|one|two|three)\s*-?\s*packet(?:\s*bid)?", re.IGNORECASE)
+# Rest of a label after its English name: "of the bidder (For 3 Years)/बिडर का ... (3 वर्षों के लिए)"
+LABEL_TAIL = re.compile(r"\([^)]*\)|[^\x00-\x7F₹]+")
+
+# Text-line confidences for a value on the label's line, the next line and the
+# line after. A same-line value sits next to label text and stays below the
+# threshold (the LLM confirms it); a value alone on the next line is the usual
+# PyMuPDF rendering of the two column table.
+TEXT_LINE_CONFIDENCE = (0.7, 0.8, 0.5)
+
+
+def clean_cell(cell):
+    return " ".join((cell or "").split())
+
+
+def match_value(field, value):
+    """Return the normalized value if it looks valid for field, else None."""
+    # Drop the Hindi part of bilingual cells
+    value = re.sub(r"[^\x00-\x7F₹]+", " ", value).strip()
+    if not value:
+        return None
+    if field == "Type of Bid":
+        match = BID_TYPE_PATTERN.search(value)
+        if not match:
+            return None
+        packets = {"one": "Single", "single": "Single", "two": "Two", "three": "Three"}[match.group(1).lower()]
+        return f"{packets} Packet Bid"
+    match = AMOUNT_PATTERN.search(value)
+    return match.group(0).strip() if match else None
+
+
+def extract_table_rows(pdf_path, max_pages=MAX_PAGES):
+    """(label, value) pairs from every table row on the first pages."""
+    import pdfplumber
+    rows = []
+    with pdfplumber.open(pdf_path) as pdf:
+        for page in pdf.pages[:max_pages]:
+            for table in page.extract_tables():
+                for row in table:
+                    cells = [clean_cell(c) for c in row if clean_cell(c)]
+                    if len(cells) >= 2:
+                        rows.append((cells[0], " ".join(cells[1:])))
+    return rows
+
+
+def extract_text_lines(pdf_path, max_pages=MAX_PAGES):
+    import fitz  # PyMuPDF
+    with fitz.open(pdf_path) as doc:
+        text = "\n".join(doc.load_page(i).get_text() for i in range(min(max_pages, len(doc))))
+    return [clean_cell(line) for line in text.splitlines() if line.strip()]
+
+
+def find_fields(table_rows, text_lines):
+    """Return {field: (value, confidence)} for every field a rule could resolve."""
+    found = {}
+    for field, label in FIELD_LABELS.items():
+        # 1. Label cell followed by a valid value cell: the normal GeM layout
+        for label_cell, value_cell in table_rows:
+            if label.search(label_cell):
+                value = match_value(field, value_cell)
+                if value:
+                    found[field] = (value, 0.95)
+                    break
+                found.setdefault(field, (value_cell, 0.4))
+        if found.get(field, (None, 0))[1] >= CONFIDENCE_THRESHOLD:
+            continue
+
+        # 2. Label and value on the same or next text line (tables without ruling lines)
+        for i, line in enumerate(text_lines):
+            match = label.search(line)
+            if not match:
+                continue
+            # Drop the label's own suffix and Hindi part so its digits are never read as the value
+            candidates = [LABEL_TAIL.sub(" ", line[match.end():])] + text_lines[i + 1:i + 3]
+            for confidence, candidate in zip(TEXT_LINE_CONFIDENCE, candidates):
+                value = match_value(field, candidate)
+                if value:
+                    if confidence > found.get(field, (None, 0))[1]:
+                        found[field] = (value, confidence)
+                    break
+            if found.get(field, (None, 0))[1] >= CONFIDENCE_THRESHOLD:
+                break
+    return found
+
+
+def prefill_fields(pdf_path, threshold=CONFIDENCE_THRESHOLD):
+    """Resolve easy fields without the LLM.
+
+    Returns (resolved, unresolved): resolved maps field -> value for fields at or
+    above the confidence threshold, unresolved lists the fields left for the LLM.
+    """
+    try:
+        found = find_fields(extract_table_rows(pdf_path), extract_text_lines(pdf_path))
+    except Exception as e:
+        print(f"⚠️ Rule-based extraction failed for {pdf_path}: {e}")
+        found = {}
+
+    resolved = {field: value for field, (value, confidence) in found.items() if confidence >= threshold}
+    unresolved = [field for field in FIELD_LABELS if field not in resolved]
+    return resolved, unresolved
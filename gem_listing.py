@@ -0,0 +1,218 @@
+import re
+import json
+import threading
+from datetime import datetime
+import requests
+from requests.adapters import HTTPAdapter
+from lxml import html as lxml_html
+
+# HTTP-level fetcher for the GeM all-bids listing. Returns rows in the same shape
+# as the Selenium scraper (scrape_engine.parse_bid_card) without driving a browser.
+BASE_URL = 'https://bidplus.gem.gov.in'
+LISTING_URL = f'{BASE_URL}/all-bids'
+LISTING_DATA_URL = f'{BASE_URL}/all-bids-data'
+DOCUMENT_URL = f'{BASE_URL}/showbidDocument/'
+CSRF_FIELD = 'csrf_bd_gem_nk'
+MAX_PAGES = 500
+
+HEADERS = {
+    "User-Agent": "Mozilla/5.0",
+    "Accept": "application/json, text/javascript, text/html, */*",
+    "X-Requested-With": "XMLHttpRequest",
+}
+
+
+class ListingFetchError(Exception):
+    pass
+
+
+def make_session(pool_size=10):
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers.update(HEADERS)
+    return session
+
+
+_session = None
+_csrf_token = None
+_session_lock = threading.Lock()
+
+
+def get_session():
+    """Shared keep-alive session (and its CSRF token) for all listing requests."""
+    global _session, _csrf_token
+    with _session_lock:
+        if _session is None:
+            _session = make_session()
+        if _csrf_token is None:
+            response = _session.get(LISTING_URL, timeout=20)
+            response.raise_for_status()
+            _csrf_token = extract_csrf_token(response.text)
+        return _session, _csrf_token
+
+
+def reset_session():
+    global _csrf_token
+    with _session_lock:
+        _csrf_token = None
+
+
+def extract_csrf_token(page_html):
+    tree = lxml_html.fromstring(page_html)
+    values = tree.xpath(f"//input[@name='{CSRF_FIELD}']/@value")
+    if values:
+        return values[0]
+    match = re.search(rf"{CSRF_FIELD}['\"]?\s*[:,]\s*['\"]([0-9a-f]+)['\"]", page_html)
+    if match:
+        return match.group(1)
+    raise ListingFetchError("CSRF token not found on the all-bids page")
+
+
+# ====== Parsing ======
+def _first(value, default="Not Found"):
+    if isinstance(value, list):
+        value = value[0] if value else None
+    if value is None or str(value).strip() == "":
+        return default
+    return str(value).strip()
+
+
+def format_listing_date(value):
+    """Convert API timestamps to the 'DD-MM-YYYY hh:mm AM/PM' format shown on the site."""
+    value = _first(value)
+    try:
+        return datetime.strptime(value[:19], "%Y-%m-%dT%H:%M:%S").strftime("%d-%m-%Y %I:%M %p")
+    except ValueError:
+        return value
+
+
+def parse_listing_json(payload):
+    """Parse an all-bids-data JSON response. Returns (rows, total_found)."""
+    if isinstance(payload, (str, bytes)):
+        payload = json.loads(payload)
+    # Error pages come back as lists or with "response" set to a message string;
+    # a ValueError here lets fetch_keyword fall back to Selenium
+    outer = payload.get("response") if isinstance(payload, dict) else None
+    response = outer.get("response") if isinstance(outer, dict) else None
+    docs = response.get("docs", []) if isinstance(response, dict) else None
+    if not isinstance(docs, list) or not all(isinstance(doc, dict) for doc in docs):
+        raise ValueError("Unexpected all-bids-data response shape")
+    rows = []
+    for doc in docs:
+        department = " ".join(
+            part for part in (_first(doc.get("ba_official_details_minName"), ""),
+                              _first(doc.get("ba_official_details_deptName"), "")) if part
+        )
+        doc_id = _first(doc.get("b_id"), "")
+        rows.append({
+            'Bid Number': _first(doc.get("b_bid_number")),
+            'Items': _first(doc.get("b_category_name")),
+            'Quantity': _first(doc.get("b_total_quantity")),
+            'Department': department or "Not Provided",
+            'Start Date': format_listing_date(doc.get("final_start_date_sort")),
+            'End Date': format_listing_date(doc.get("final_end_date_sort")),
+            'Downloadable File URL': DOCUMENT_URL + doc_id if doc_id else "Not Available"
+        })
+    return rows, int(response.get("numFound", len(rows)))
+
+
+def _label_value(card, label):
+    """Text following a '<strong>Label:</strong>' style label inside a card."""
+    nodes = card.xpath(f".//*[contains(text(), '{label}')]")
+    if not nodes:
+        return "Not Found"
+    node = nodes[0]
+    tail = (node.tail or "").strip()
+    if tail:
+        return tail
+    sibling = node.getnext()
+    if sibling is not None and sibling.text_content().strip():
+        return sibling.text_content().strip()
+    parent_text = node.getparent().text_content()
+    return parent_text.split(label, 1)[-1].strip() or "Not Found"
+
+
+def parse_listing_html(page_html):
+    """Parse bid cards from an all-bids HTML page (same fields as the Selenium scraper)."""
+    tree = lxml_html.fromstring(page_html)
+    rows = []
+    # Whole class token, so card-header / card-body divs are not taken for cards
+    for card in tree.xpath("//div[contains(concat(' ', normalize-space(@class), ' '), ' card ')]"):
+        bid_numbers = [t.strip() for t in card.xpath(".//*[contains(@class, 'bid_no')]//a/text()") if t.strip()]
+        if not bid_numbers:
+            match = re.search(r'GEM/[A-Z0-9/\-]+', card.text_content())
+            if not match:
+                continue
+            bid_numbers = [match.group(0)]
+
+        department_nodes = card.xpath(".//*[contains(text(),'Department Name And Address:')]/following::div[1]")
+        department = " ".join(department_nodes[0].text_content().split()) if department_nodes else ""
+        links = card.xpath(".//a/@href")
+
+        items = card.xpath(".//*[contains(text(), 'Items:')]/following-sibling::a[1]/@data-content")
+        rows.append({
+            'Bid Number': bid_numbers[0],
+            'Items': items[0].strip() if items else _label_value(card, "Items:"),
+            'Quantity': _label_value(card, "Quantity:"),
+            'Department': department or "Not Provided",
+            'Start Date': _label_value(card, "Start Date:"),
+            'End Date': _label_value(card, "End Date:"),
+            'Downloadable File URL': requests.compat.urljoin(BASE_URL, links[0]) if links else "Not Available"
+        })
+    return rows
+
+
+# ====== Fetching ======
+def fetch_listing_page(keyword, page):
+    session, token = get_session()
+    payload = {
+        "page": page,
+        "param": {"searchBid": keyword, "searchType": "fullText"},
+        "filter": {"bidStatusType": "ongoing_bids", "byType": "all", "highBidValue": "",
+                   "byEndDate": {"from": "", "to": ""}, "sort": "Bid-End-Date-Oldest"},
+    }
+    response = session.post(
+        LISTING_DATA_URL,
+        data={"payload": json.dumps(payload), CSRF_FIELD: token},
+        timeout=20,
+    )
+    response.raise_for_status()
+    if "json" in response.headers.get("Content-Type", "") or response.text.lstrip().startswith("{"):
+        return parse_listing_json(response.json())
+    rows = parse_listing_html(response.text)
+    if page == 1 and not rows:
+        # An HTML error or expired-CSRF page, not an empty search
+        raise ListingFetchError(f"Page 1 for '{keyword}' returned neither listing JSON nor bid cards")
+    return rows, None
+
+
+def fetch_keyword(keyword, max_pages=MAX_PAGES, on_page=None):
+    """Fetch every listing page for a keyword over HTTP.
+
+    on_page(rows) is called with each page's new rows as soon as it is parsed.
+    """
+    scraped_data = []
+    seen = set()
+    try:
+        for page in range(1, max_pages + 1):
+            rows, total = fetch_listing_page(keyword, page)
+            new_rows = [row for row in rows if row['Bid Number'] not in seen]
+            if not new_rows:
+                break
+            seen.update(row['Bid Number'] for row in new_rows)
+            scraped_data.extend(new_rows)
+            if on_page:
+                on_page(new_rows)
+            if total is not None and len(scraped_data) >= total:
+                break
+    except ListingFetchError:
+        reset_session()
+        raise
+    except (requests.RequestException, ValueError) as e:
+        # Token may have expired; the next call fetches a fresh one
+        reset_session()
+        raise ListingFetchError(f"HTTP listing fetch failed for '{keyword}': {e}") from e
+    print(f"✅ [{keyword}] Fetched {len(scraped_data)} bids over HTTP")
+    return scraped_data
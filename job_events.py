@@ -0,0 +1,114 @@
+import json
+import time
+import queue
+import threading
+
+# In-process event bus. Pipeline stages publish events here; the /events SSE
+# endpoint and background workers subscribe instead of polling handshake files.
+STAGES = ["downloading", "parsing", "embedding", "summarizing", "done"]
+
+
+class EventBus:
+    def __init__(self, max_queue=1000):
+        self.max_queue = max_queue
+        self._subscribers = set()
+        self._listeners = {}  # event type -> callbacks run in the publisher's thread
+        self._latest = {}  # doc_id -> last stage event
+        self._lock = threading.Lock()
+
+    def subscribe(self):
+        q = queue.Queue(maxsize=self.max_queue)
+        with self._lock:
+            self._subscribers.add(q)
+        return q
+
+    def unsubscribe(self, q):
+        with self._lock:
+            self._subscribers.discard(q)
+
+    def add_listener(self, event_type, callback):
+        """Call callback(event) for every event of event_type; keep callbacks quick."""
+        with self._lock:
+            self._listeners.setdefault(event_type, []).append(callback)
+
+    def publish(self, event_type, **data):
+        event = {"type": event_type, "ts": time.time(), **data}
+        with self._lock:
+            if event_type == "stage" and data.get("doc_id"):
+                self._latest[data["doc_id"]] = event
+            subscribers = list(self._subscribers)
+            listeners = list(self._listeners.get(event_type, []))
+        for callback in listeners:
+            try:
+                callback(event)
+            except Exception as e:
+                print(f"❌ Event listener for {event_type} failed: {e}")
+        for q in subscribers:
+            try:
+                q.put_nowait(event)
+            except queue.Full:
+                # Slow consumer: drop its oldest event rather than block the pipeline
+                try:
+                    q.get_nowait()
+                    q.put_nowait(event)
+                except (queue.Empty, queue.Full):
+                    pass
+        return event
+
+    def snapshot(self):
+        """Last known stage of every document, for clients that just connected."""
+        with self._lock:
+            return sorted(self._latest.values(), key=lambda e: e["ts"])
+
+    def latest_status(self):
+        events = self.snapshot()
+        return events[-1]["stage"] if events else ""
+
+
+bus = EventBus()
+
+
+class StageTimer:
+    """Publishes stage transitions for one document with per-stage and total timings."""
+
+    def __init__(self, doc_id, event_bus=None):
+        self.doc_id = doc_id
+        self.bus = event_bus or bus
+        self.started = time.monotonic()
+        self.stage_started = self.started
+        self.current = None
+
+    def stage(self, name, **extra):
+        now = time.monotonic()
+        event = self.bus.publish(
+            "stage",
+            doc_id=self.doc_id,
+            stage=name,
+            previous=self.current,
+            previous_seconds=round(now - self.stage_started, 3) if self.current else None,
+            total_seconds=round(now - self.started, 3),
+            **extra,
+        )
+        self.current = name
+        self.stage_started = now
+        return event
+
+
+def format_sse(event):
+    return f"event: {event['type']}\ndata: {json.dumps(event)}\n\n"
+
+
+def sse_stream(event_bus=None, heartbeat=15):
+    """Generator of SSE messages: current snapshot first, then live events."""
+    event_bus = event_bus or bus
+    q = event_bus.subscribe()
+    try:
+        for event in event_bus.snapshot():
+            yield format_sse(event)
+        while True:
+            try:
+                yield format_sse(q.get(timeout=heartbeat))
+            except queue.Empty:
+                yield ": keep-alive\n\n"
+    finally:
+        event_bus.unsubscribe(q)
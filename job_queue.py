@@ -0,0 +1,155 @@
+import time
+import heapq
+import itertools
+import threading
+
+# Bounded document-processing queue: a fixed set of workers, priorities
+# (interactive uploads before batch work), de-duplication of identical paths,
+# cancellation of superseded jobs and queue-depth / wait-time metrics.
+PRIORITY_INTERACTIVE = 0
+PRIORITY_BATCH = 10
+
+
+class JobCancelled(Exception):
+    pass
+
+
+class Job:
+    def __init__(self, key, func, args, priority, group):
+        self.key = key
+        self.func = func
+        self.args = args
+        self.priority = priority
+        self.group = group
+        self.state = "queued"
+        self.submitted_at = time.monotonic()
+        self.started_at = None
+        self.finished_at = None
+        self._cancelled = threading.Event()
+
+    @property
+    def cancelled(self):
+        return self._cancelled.is_set()
+
+    def cancel(self):
+        self._cancelled.set()
+
+    def check_cancelled(self):
+        """Called by the job between stages; stops work for superseded jobs."""
+        if self._cancelled.is_set():
+            raise JobCancelled(self.key)
+
+
+class JobQueue:
+    def __init__(self, workers=1, name="jobs"):
+        self.workers = workers
+        self.name = name
+        self._heap = []
+        self._seq = itertools.count()
+        self._pending = {}  # key -> Job waiting in the heap
+        self._running = {}  # key -> Job being processed
+        self._cond = threading.Condition()
+        self._threads = []
+        self._stats = {"submitted": 0, "deduplicated": 0, "cancelled": 0, "completed": 0, "failed": 0,
+                       "wait_seconds_total": 0.0, "wait_seconds_max": 0.0, "run_seconds_total": 0.0}
+
+    def start(self):
+        with self._cond:
+            if self._threads:
+                return
+            for i in range(self.workers):
+                thread = threading.Thread(target=self._worker, name=f"{self.name}-{i}", daemon=True)
+                self._threads.append(thread)
+                thread.start()
+
+    def submit(self, key, func, *args, priority=PRIORITY_BATCH, group=None):
+        """Queue func(job, *args) under key.
+
+        An identical key that is already queued is reused (and its priority raised);
+        a new job in a group cancels older queued or running jobs of that group.
+        """
+        with self._cond:
+            existing = self._pending.get(key)
+            if existing and not existing.cancelled:
+                self._stats["deduplicated"] += 1
+                if priority < existing.priority:
+                    existing.priority = priority
+                    heapq.heappush(self._heap, (priority, next(self._seq), existing))
+                return existing
+            running = self._running.get(key)
+            if running and not running.cancelled:
+                self._stats["deduplicated"] += 1
+                return running
+
+            if group is not None:
+                for job in list(self._pending.values()) + list(self._running.values()):
+                    if job.group == group and not job.cancelled:
+                        job.cancel()
+                        self._stats["cancelled"] += 1
+                        print(f"⏹️ Superseded job: {job.key}")
+
+            job = Job(key, func, args, priority, group)
+            self._pending[key] = job
+            heapq.heappush(self._heap, (priority, next(self._seq), job))
+            self._stats["submitted"] += 1
+            self._cond.notify()
+            return job
+
+    def _next_job(self):
+        with self._cond:
+            while True:
+                while self._heap:
+                    priority, _, job = heapq.heappop(self._heap)
+                    # Skip stale heap entries (re-prioritized or cancelled jobs)
+                    if self._pending.get(job.key) is not job or priority != job.priority:
+                        continue
+                    del self._pending[job.key]
+                    if job.cancelled:
+                        continue
+                    job.state = "running"
+                    job.started_at = time.monotonic()
+                    wait = job.started_at - job.submitted_at
+                    self._stats["wait_seconds_total"] += wait
+                    self._stats["wait_seconds_max"] = max(self._stats["wait_seconds_max"], wait)
+                    self._running[job.key] = job
+                    return job
+                self._cond.wait()
+
+    def _worker(self):
+        while True:
+            job = self._next_job()
+            try:
+                job.func(job, *job.args)
+                job.state = "cancelled" if job.cancelled else "done"
+            except JobCancelled:
+                job.state = "cancelled"
+                print(f"⏹️ Cancelled job: {job.key}")
+            except Exception as e:
+                job.state = "failed"
+                print(f"❌ Job {job.key} failed: {e}")
+            finally:
+                job.finished_at = time.monotonic()
+                with self._cond:
+                    if self._running.get(job.key) is job:
+                        del self._running[job.key]
+                    self._stats["run_seconds_total"] += job.finished_at - job.started_at
+                    if job.state == "done":
+                        self._stats["completed"] += 1
+                    elif job.state == "failed":
+                        self._stats["failed"] += 1
+
+    def metrics(self):
+        with self._cond:
+            stats = dict(self._stats)
+            started = stats["completed"] + stats["failed"] + len(self._running)
+            now = time.monotonic()
+            oldest_wait = max((now - j.submitted_at for j in self._pending.values()), default=0.0)
+            return {
+                "workers": self.workers,
+                "queue_depth": sum(1 for j in self._pending.values() if not j.cancelled),
+                "running": [j.key for j in self._running.values()],
+                "oldest_wait_seconds": round(oldest_wait, 3),
+                "avg_wait_seconds": round(stats["wait_seconds_total"] / started, 3) if started else 0.0,
+                "max_wait_seconds": round(stats["wait_seconds_max"], 3),
+                **{k: stats[k] for k in ("submitted", "deduplicated", "cancelled", "completed", "failed")},
+            }
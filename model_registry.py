@@ -0,0 +1,124 @@
+import os
+import time
+import threading
+from langchain_core.embeddings import Embeddings
+
+# Process-wide model registry. Models are loaded on first use (heavy imports
+# such as torch / sentence_transformers happen inside the loaders), every module
+# shares the same instance, and the server can warm them in the background
+# after it has started accepting requests.
+EMBEDDING_MODEL_NAME = os.environ.get("EMBEDDING_MODEL", "BAAI/bge-small-en-v1.5")
+EMBEDDING_DEVICE = os.environ.get("EMBEDDING_DEVICE", "cpu")
+# "torch" (sentence-transformers) or "onnx" (int8-quantized graph on onnxruntime).
+# Vectors differ slightly between backends, so rebuild the vectorstores after switching.
+EMBEDDING_BACKEND = os.environ.get("EMBEDDING_BACKEND", "torch")
+EMBEDDING_MODELS = {"torch": "bge-small", "onnx": "bge-small-onnx"}
+
+
+def _load_bge_small():
+    from langchain_huggingface import HuggingFaceEmbeddings
+    return HuggingFaceEmbeddings(
+        model_name=EMBEDDING_MODEL_NAME,
+        model_kwargs={"device": EMBEDDING_DEVICE}
+    )
+
+
+def _load_bge_small_onnx():
+    from onnx_embeddings import OnnxEmbeddings
+    return OnnxEmbeddings(EMBEDDING_MODEL_NAME)
+
+
+def _load_minilm():
+    from sentence_transformers import SentenceTransformer
+    return SentenceTransformer("all-MiniLM-L6-v2")
+
+
+class ModelRegistry:
+    def __init__(self):
+        self._loaders = {}
+        self._models = {}
+        self._locks = {}
+        self._load_seconds = {}
+        self._lock = threading.Lock()
+
+    def register(self, name, loader):
+        with self._lock:
+            self._loaders[name] = loader
+            self._locks.setdefault(name, threading.Lock())
+
+    def get(self, name):
+        model = self._models.get(name)
+        if model is not None:
+            return model
+        with self._lock:
+            if name not in self._loaders:
+                raise KeyError(f"Unknown model: {name}")
+            lock = self._locks[name]
+        # Per-model lock: concurrent first users wait for one load instead of loading twice
+        with lock:
+            if name not in self._models:
+                print(f"⏳ Loading model {name}...")
+                started = time.monotonic()
+                self._models[name] = self._loaders[name]()
+                self._load_seconds[name] = round(time.monotonic() - started, 2)
+                print(f"✅ Model {name} loaded in {self._load_seconds[name]}s")
+            return self._models[name]
+
+    def is_loaded(self, name):
+        return name in self._models
+
+    def warm(self, names=None):
+        for name in names or list(self._loaders):
+            try:
+                self.get(name)
+            except Exception as e:
+                print(f"❌ Failed to warm model {name}: {e}")
+
+    def warm_in_background(self, names=None):
+        thread = threading.Thread(target=self.warm, args=(names,), name="model-warmup", daemon=True)
+        thread.start()
+        return thread
+
+    def status(self):
+        with self._lock:
+            names = list(self._loaders)
+        return {name: {"loaded": name in self._models, "load_seconds": self._load_seconds.get(name)}
+                for name in names}
+
+
+registry = ModelRegistry()
+registry.register("bge-small", _load_bge_small)
+registry.register("bge-small-onnx", _load_bge_small_onnx)
+registry.register("minilm", _load_minilm)
+
+
+def get_model(name):
+    return registry.get(name)
+
+
+def default_embedding_name():
+    """Registry name of the bge-small backend selected by EMBEDDING_BACKEND."""
+    if EMBEDDING_BACKEND not in EMBEDDING_MODELS:
+        raise ValueError(f"Unknown EMBEDDING_BACKEND {EMBEDDING_BACKEND!r}; use one of {sorted(EMBEDDING_MODELS)}")
+    return EMBEDDING_MODELS[EMBEDDING_BACKEND]
+
+
+class LazyEmbeddings(Embeddings):
+    """Embeddings handle that resolves the shared registry model on first call.
+
+    Safe to create at import time and to hand to FAISS / CorpusIndex before the
+    model is loaded.
+    """
+
+    def __init__(self, name="bge-small"):
+        self.name = name
+
+    @property
+    def model(self):
+        return registry.get(self.name)
+
+    def embed_documents(self, texts):
+        return self.model.embed_documents(texts)
+
+    def embed_query(self, text):
+        return self.model.embed_query(text)
@@ -5,10 +5,10 @@ import time
 import shutil
 from watchdog.observers import Observer
 from watchdog.events import FileSystemEventHandler
+from job_events import bus
 
 downloads_folder = os.path.expanduser('~/Downloads')
 target_folder = '/home/kartikeyapatel/Videos/gem/extracted_data'
-path_file = '/home/kartikeyapatel/Videos/gem/latest_moved_path.txt'  # <- shared path file
 
 class DownloadHandler(FileSystemEventHandler):
     def on_created(self, event):
@@ -34,8 +34,7 @@ class DownloadHandler(FileSystemEventHandler):
                     shutil.move(actual_path, target_path)
                     print(f"Moved file to: {target_path}")
 
-                    with open(path_file, "w") as f:
-                        f.write(target_path)
+                    bus.publish("file_moved", path=target_path)
                 except Exception as e:
                     print(f"Error moving file: {e}")
             else:
@@ -46,19 +45,23 @@ class DownloadHandler(FileSystemEventHandler):
                 try:
                     shutil.move(event.src_path, target_path)
                     print(f"Moved file to: {target_path}")
-                    with open(path_file, "w") as f:
-                        f.write(target_path)
+                    bus.publish("file_moved", path=target_path)
                 except Exception as e:
                     print(f"Error moving direct file: {e}")
 
 
 
-def run_task():
+def start_watcher():
     event_handler = DownloadHandler()
     observer = Observer()
     observer.schedule(event_handler, downloads_folder, recursive=False)
     observer.start()
     print("Watching Downloads folder...")
+    return observer
+
+
+def run_task():
+    observer = start_watcher()
 
     try:
         while True:
@@ -0,0 +1,116 @@
+import os
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+# bge-small-en-v1.5 as an int8-quantized ONNX graph on onnxruntime (CPU).
+# Texts are tokenized once, sorted by length and packed into batches bounded by
+# a token budget, so short chunks are not padded out to the longest one and
+# each batch is one session.run call. Output matches the sentence-transformers
+# model: CLS pooling followed by L2 normalization.
+ONNX_MODEL_DIR = os.environ.get("ONNX_MODEL_DIR", "onnx_models")
+ONNX_MAX_LENGTH = int(os.environ.get("ONNX_MAX_LENGTH", "512"))
+ONNX_MAX_BATCH = int(os.environ.get("ONNX_MAX_BATCH", "64"))
+ONNX_MAX_BATCH_TOKENS = int(os.environ.get("ONNX_MAX_BATCH_TOKENS", "16384"))  # batch size x padded length
+ONNX_THREADS = int(os.environ.get("ONNX_THREADS", str(os.cpu_count() or 1)))
+
+
+def model_dir(model_name, root=ONNX_MODEL_DIR):
+    return os.path.join(root, model_name.replace("/", "__"))
+
+
+def export_onnx(model_name, out_dir):
+    """Export the transformer to ONNX and quantize its weights to int8 (one-time, needs torch)."""
+    import torch
+    from transformers import AutoModel, AutoTokenizer
+    from onnxruntime.quantization import quantize_dynamic, QuantType
+
+    os.makedirs(out_dir, exist_ok=True)
+    fp32_path = os.path.join(out_dir, "model.onnx")
+    int8_path = os.path.join(out_dir, "model.int8.onnx")
+
+    print(f"📦 Exporting {model_name} to ONNX...")
+    tokenizer = AutoTokenizer.from_pretrained(model_name)
+    model = AutoModel.from_pretrained(model_name).eval()
+    sample = tokenizer(["export sample"], return_tensors="pt")
+    input_names = ["input_ids", "attention_mask", "token_type_ids"]
+    dynamic = {"batch": 0, "sequence": 1}
+    with torch.no_grad():
+        torch.onnx.export(
+            model,
+            tuple(sample[name] for name in input_names),
+            fp32_path,
+            input_names=input_names,
+            output_names=["last_hidden_state"],
+            dynamic_axes={**{name: dynamic for name in input_names}, "last_hidden_state": dynamic},
+            opset_version=17,
+        )
+    quantize_dynamic(fp32_path, int8_path, weight_type=QuantType.QInt8)
+    tokenizer.save_pretrained(out_dir)
+    print(f"✅ Quantized ONNX model written to {int8_path}")
+    return int8_path
+
+
+class OnnxEmbeddings(Embeddings):
+    def __init__(self, model_name, root=ONNX_MODEL_DIR, max_length=ONNX_MAX_LENGTH,
+                 max_batch=ONNX_MAX_BATCH, max_batch_tokens=ONNX_MAX_BATCH_TOKENS, threads=ONNX_THREADS):
+        import onnxruntime as ort
+        from tokenizers import Tokenizer
+
+        self.model_name = model_name
+        self.max_batch = max_batch
+        self.max_batch_tokens = max_batch_tokens
+        directory = model_dir(model_name, root)
+        model_path = os.path.join(directory, "model.int8.onnx")
+        if not os.path.exists(model_path):
+            export_onnx(model_name, directory)
+
+        self.tokenizer = Tokenizer.from_file(os.path.join(directory, "tokenizer.json"))
+        self.tokenizer.enable_truncation(max_length=max_length)
+        self.tokenizer.no_padding()
+
+        options = ort.SessionOptions()
+        options.intra_op_num_threads = threads
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.session = ort.InferenceSession(model_path, options, providers=["CPUExecutionProvider"])
+        self.input_names = {i.name for i in self.session.get_inputs()}
+
+    def batches(self, encodings):
+        """Indices of encodings grouped into length-sorted batches within the token budget."""
+        order = sorted(range(len(encodings)), key=lambda i: len(encodings[i].ids))
+        batch = []
+        for i in order:
+            # Sorted ascending, so the newest item sets the padded length of the batch
+            padded = len(encodings[i].ids)
+            if batch and (len(batch) >= self.max_batch or (len(batch) + 1) * padded > self.max_batch_tokens):
+                yield batch
+                batch = []
+            batch.append(i)
+        if batch:
+            yield batch
+
+    def _run(self, encodings):
+        length = max(len(e.ids) for e in encodings)
+        input_ids = np.zeros((len(encodings), length), dtype=np.int64)
+        attention_mask = np.zeros((len(encodings), length), dtype=np.int64)
+        for row, e in enumerate(encodings):
+            input_ids[row, :len(e.ids)] = e.ids
+            attention_mask[row, :len(e.ids)] = 1
+        feeds = {"input_ids": input_ids, "attention_mask": attention_mask}
+        if "token_type_ids" in self.input_names:
+            feeds["token_type_ids"] = np.zeros_like(input_ids)
+        hidden = self.session.run(None, feeds)[0]
+        cls = hidden[:, 0]
+        return cls / np.linalg.norm(cls, axis=1, keepdims=True).clip(min=1e-12)
+
+    def embed_documents(self, texts):
+        if not texts:
+            return []
+        encodings = self.tokenizer.encode_batch(list(texts))
+        vectors = [None] * len(texts)
+        for batch in self.batches(encodings):
+            for i, vector in zip(batch, self._run([encodings[i] for i in batch])):
+                vectors[i] = vector.tolist()
+        return vectors
+
+    def embed_query(self, text):
+        return self.embed_documents([text])[0]
@@ -0,0 +1,93 @@
+import os
+import json
+import sqlite3
+import threading
+import fitz  # PyMuPDF
+from download_cache import sha256_file
+from pdf_extraction import extract_page_records
+
+# Per-page extraction store keyed by (file sha256, page number, extractor version).
+# Holds text, links and layout elements so a PDF that was seen before is never
+# re-parsed, and a partially processed one only parses its missing pages.
+PAGE_STORE_PATH = os.environ.get("PAGE_STORE_PATH", "page_store.sqlite")
+EXTRACTOR = "tiered-v2"  # v2: table text replaces the cell blocks instead of being appended
+
+
+class PageStore:
+    def __init__(self, path=PAGE_STORE_PATH):
+        self.path = path
+        self._local = threading.local()
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS pages (
+                    file_hash TEXT NOT NULL,
+                    page INTEGER NOT NULL,
+                    extractor TEXT NOT NULL,
+                    text TEXT NOT NULL,
+                    links TEXT NOT NULL,
+                    elements TEXT NOT NULL,
+                    tier TEXT NOT NULL DEFAULT '',
+                    PRIMARY KEY (file_hash, extractor, page)
+                )
+            """)
+            columns = [row[1] for row in conn.execute("PRAGMA table_info(pages)")]
+            if "tier" not in columns:
+                conn.execute("ALTER TABLE pages ADD COLUMN tier TEXT NOT NULL DEFAULT ''")
+
+    def _connect(self):
+        # sqlite connections are per thread; parse workers in other processes open their own
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            self._local.conn = conn
+        return conn
+
+    def get_pages(self, file_hash, extractor=EXTRACTOR):
+        rows = self._connect().execute(
+            "SELECT page, text, links, elements, tier FROM pages WHERE file_hash = ? AND extractor = ?",
+            (file_hash, extractor),
+        ).fetchall()
+        return {
+            page: {"page": page, "text": text, "links": json.loads(links), "elements": json.loads(elements), "tier": tier}
+            for page, text, links, elements, tier in rows
+        }
+
+    def put_pages(self, file_hash, records, extractor=EXTRACTOR):
+        with self._connect() as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO pages (file_hash, page, extractor, text, links, elements, tier) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [(file_hash, r["page"], extractor, r["text"], json.dumps(r["links"]), json.dumps(r["elements"]), r["tier"])
+                 for r in records],
+            )
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_store():
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = PageStore()
+        return _store
+
+
+def extract_pages(pdf_path, store=None):
+    """Return [{"page", "text", "links", "elements", "tier"}, ...] in page order, extracting only uncached pages."""
+    store = store or get_store()
+    file_hash = sha256_file(pdf_path)
+    cached = store.get_pages(file_hash)
+
+    with fitz.open(pdf_path) as doc:
+        page_count = len(doc)
+    missing = [n for n in range(1, page_count + 1) if n not in cached]
+
+    if missing:
+        print(f"📄 Extracting {len(missing)}/{page_count} pages of {os.path.basename(pdf_path)} (rest cached)")
+        new_records = extract_page_records(pdf_path, missing)
+        store.put_pages(file_hash, new_records.values())
+        cached.update(new_records)
+
+    return [cached[n] for n in sorted(cached) if n <= page_count]
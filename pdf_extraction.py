@@ -0,0 +1,131 @@
+import os
+import tempfile
+import fitz  # PyMuPDF
+import pdfplumber
+
+# Tiered per-page PDF extraction. Each page takes the cheapest tier that works:
+#   "text"      - PyMuPDF text layer (milliseconds, born-digital GeM pages)
+#   "table"     - text layer with pdfplumber tables in place of the blocks they
+#                 cover, when the page looks tabular
+#   "partition" - unstructured.partition_pdf (layout models / OCR), no text layer
+MIN_TEXT_CHARS = 20  # below this the page is treated as having no text layer
+TABLE_MIN_RULINGS = 6  # horizontal/vertical ruling lines that make a page look tabular
+
+
+def looks_tabular(page):
+    rulings = 0
+    for drawing in page.get_drawings():
+        for item in drawing["items"]:
+            if item[0] == "l":
+                p1, p2 = item[1], item[2]
+                if abs(p1.x - p2.x) < 1 or abs(p1.y - p2.y) < 1:
+                    rulings += 1
+            elif item[0] == "re":
+                rulings += 2
+        if rulings >= TABLE_MIN_RULINGS:
+            return True
+    return False
+
+
+def text_elements(page):
+    """Text blocks of a page as simple layout elements."""
+    elements = []
+    for x0, y0, x1, y1, text, _, block_type in page.get_text("blocks"):
+        if block_type == 0 and text.strip():
+            elements.append({"type": "Text", "text": text.strip(), "bbox": [x0, y0, x1, y1]})
+    return elements
+
+
+def table_elements(plumber_page):
+    elements = []
+    for table in plumber_page.find_tables():
+        rows = [[" ".join((cell or "").split()) for cell in row] for row in table.extract()]
+        rows = [row for row in rows if any(row)]
+        if rows:
+            elements.append({
+                "type": "Table",
+                "text": "\n".join(" | ".join(cell for cell in row if cell) for row in rows),
+                "rows": rows,
+                "bbox": list(table.bbox),
+            })
+    return elements
+
+
+def inside(element, table):
+    """True if the element's centre lies in the table's bbox (both top-left origin, points)."""
+    x0, y0, x1, y1 = element["bbox"]
+    tx0, ty0, tx1, ty1 = table["bbox"]
+    cx, cy = (x0 + x1) / 2, (y0 + y1) / 2
+    return tx0 <= cx <= tx1 and ty0 <= cy <= ty1
+
+
+def merge_tables(elements, tables):
+    """Text elements outside every table, plus the tables, in reading order.
+
+    The text layer already holds the cells as loose blocks; each table
+    replaces the blocks it covers so its content appears once.
+    """
+    kept = [el for el in elements if not any(inside(el, table) for table in tables)]
+    return sorted(kept + tables, key=lambda el: (round(el["bbox"][1]), el["bbox"][0]))
+
+
+def partition_elements(pdf_path, page_numbers):
+    """Run partition_pdf on only the given 1-based pages. Returns {page: [element dicts]}."""
+    # Imported lazily: loading unstructured's layout stack is the expensive part
+    from unstructured.partition.pdf import partition_pdf
+
+    elements_by_page = {n: [] for n in page_numbers}
+    with fitz.open(pdf_path) as doc, fitz.open() as subset:
+        for n in page_numbers:
+            subset.insert_pdf(doc, from_page=n - 1, to_page=n - 1)
+        fd, subset_path = tempfile.mkstemp(suffix=".pdf")
+        os.close(fd)
+        subset.save(subset_path)
+    try:
+        for el in partition_pdf(filename=subset_path):
+            sub_page = getattr(el.metadata, "page_number", None) or 1
+            elements_by_page[page_numbers[sub_page - 1]].append(el.to_dict())
+    finally:
+        os.remove(subset_path)
+    return elements_by_page
+
+
+def extract_page_records(pdf_path, page_numbers):
+    """Extract the given 1-based pages. Returns {page: {"page", "text", "links", "elements", "tier"}}."""
+    records, needs_partition, needs_tables = {}, [], []
+    with fitz.open(pdf_path) as doc:
+        for n in page_numbers:
+            page = doc.load_page(n - 1)
+            links = [link.get("uri") for link in page.get_links() if link.get("uri")]
+            text = page.get_text().strip()
+            records[n] = {"page": n, "text": text, "links": links, "elements": [], "tier": "text"}
+            if len(text) < MIN_TEXT_CHARS:
+                needs_partition.append(n)
+                continue
+            records[n]["elements"] = text_elements(page)
+            if looks_tabular(page):
+                needs_tables.append(n)
+
+    if needs_tables:
+        with pdfplumber.open(pdf_path) as pdf:
+            for n in needs_tables:
+                tables = table_elements(pdf.pages[n - 1])
+                if tables:
+                    elements = merge_tables(records[n]["elements"], tables)
+                    records[n].update(
+                        elements=elements,
+                        text="\n".join(el["text"] for el in elements),
+                        tier="table",
+                    )
+
+    if needs_partition:
+        for n, elements in partition_elements(pdf_path, needs_partition).items():
+            records[n].update(
+                elements=elements,
+                text="\n".join(el["text"] for el in elements if el.get("text")),
+                tier="partition",
+            )
+
+    tiers = [r["tier"] for r in records.values()]
+    print(f"📄 {os.path.basename(pdf_path)}: " + ", ".join(f"{t}={tiers.count(t)}" for t in ("text", "table", "partition") if t in tiers))
+    return records
@@ -1,126 +1,102 @@
-# from langchain_community.embeddings import HuggingFaceEmbeddings
-from langchain_huggingface import HuggingFaceEmbeddings
 from langchain_community.vectorstores import FAISS
 from langchain_community.llms import Ollama
 from langchain.chains.question_answering import load_qa_chain
 from langchain.docstore.document import Document
-from sentence_transformers import SentenceTransformer
 from langchain.chains import RetrievalQA
 from langchain.text_splitter import RecursiveCharacterTextSplitter
 import fitz
 import time
 import string
 import os
+import csv
 import requests
 import numpy as np
 import pytesseract
-from easyocr import Reader
 import threading
 from langchain_ollama import OllamaLLM
 import pdfplumber
-# Load better embedding model (local, no key)
-embedding_model = HuggingFaceEmbeddings(
-    model_name="BAAI/bge-small-en-v1.5",
-    model_kwargs={"device": "cpu"}
-)
-reader = Reader(lang_list=['en'])
+from corpus_index import CorpusIndex, lookup_bid_metadata
+from download_manager import get_manager
+from job_events import bus, StageTimer
+from page_store import extract_pages
+from summarizer import MapReduceSummarizer, split_for_summary
+from job_queue import JobQueue, JobCancelled, PRIORITY_INTERACTIVE
+from embedding_cache import cached_embeddings
+# bge-small (EMBEDDING_BACKEND torch or onnx) from the shared model registry,
+# loaded on the first embed call, behind the persistent embedding cache so no
+# text is encoded twice
+embedding_model = cached_embeddings()
+corpus = CorpusIndex(embedding_model)
 
 # Store final extracted content globally
 all_text_final = ""
+current_doc_id = None
 
-# ✅ Function to extract text and links from PDF using PyMuPDF (fitz)
-from unstructured.partition.pdf import partition_pdf
+# Per-document FAISS indexes are saved under vectorstores/<doc-id> and
+# recorded in processed_files.csv as: doc_id,pdf_path,vectorstore_path
+VECTORSTORE_DIR = "vectorstores"
+PROCESSED_FILES_CSV = "processed_files.csv"
+_index_cache = {}
+_index_lock = threading.Lock()
 
-def extract_text_and_links(pdf_path):
-    text_content = ""
-    links = set()
+DOC_WORKERS = int(os.environ.get("DOC_WORKERS", "1"))
+document_queue = JobQueue(workers=DOC_WORKERS, name="documents")
 
-    try:
-        # Extract links using PyMuPDF as before (unchanged)
-        doc = fitz.open(pdf_path)
-        for i in range(len(doc)):
-            page = doc.load_page(i)
-            print(f'page are :{i}')
-            links.update([link.get('uri') for link in page.get_links() if 'uri' in link])
-
-        # Extract text with unstructured.partition.pdf
-        elements = partition_pdf(filename=pdf_path)
-        for el in elements:
-            # el.text contains the textual content of the element
-            if el.text:
-                text_content += el.text + "\n"
+# ✅ Function to extract text and links from PDF (cached per page in page_store)
 
+def extract_pages_and_links(pdf_path):
+    """Return ([(page_number, text), ...], links) for a PDF."""
+    try:
+        # Pages already parsed (by any process) come from the page store
+        pages = extract_pages(pdf_path)
     except Exception as e:
         print(f"❌ Failed to read {pdf_path} with unstructured: {e}")
-        return "", []
+        return [], []
 
-    return text_content.strip(), list(links)
+    links = {uri for page in pages for uri in page["links"]}
+    return [(page["page"], page["text"]) for page in pages if page["text"]], list(links)
 
 
+def extract_text_and_links(pdf_path):
+    pages, links = extract_pages_and_links(pdf_path)
+    return "\n".join(text for _, text in pages).strip(), links
+
 
-def generate_filenames(n):
-    alphabet = string.ascii_lowercase
-    result, i = [], 0
-    while len(result) < n:
-        name, temp = '', i
-        while True:
-            name = alphabet[temp % 26] + name
-            temp = temp // 26 - 1
-            if temp < 0:
-                break
-        result.append(f"{name}.pdf")
-        i += 1
-    return result
 
-# ✅ Downloads files from links
+# ✅ Downloads files from links through the shared download cache
 def download_linked_files(links, download_dir):
-    os.makedirs(download_dir, exist_ok=True)
+    """Linked files are named by content hash, so one bid never overwrites another's annexures."""
+    manager = get_manager()
     downloaded_files = []
-    filenames = generate_filenames(len(links))
-
-    for idx, link in enumerate(links):
-        try:
-            response = requests.get(link, timeout=15, verify=False)
-            if response.status_code == 200:
-                filepath = os.path.join(download_dir, filenames[idx])
-                with open(filepath, "wb") as f:
-                    f.write(response.content)
-                downloaded_files.append(filepath)
-                print(f"✅ Downloaded: {filepath}")
-            else:
-                print(f"❌ Status {response.status_code}: {link}")
-        except Exception as e:
-            print(f"❌ Error downloading {link}: {e}")
+
+    for link in links:
+        def dest_for(entry):
+            is_pdf = "pdf" in (entry.get("content_type") or "") or link.lower().split("?")[0].endswith(".pdf")
+            ext = ".pdf" if is_pdf else (os.path.splitext(link.split("?")[0])[1] or ".bin")
+            return os.path.join(download_dir, entry["sha256"][:16] + ext)
+
+        filepath, error = manager.fetch_to(link, dest_for, require_pdf=False, verify=False)
+        if error:
+            print(f"❌ Error downloading {link}: {error}")
+            continue
+        downloaded_files.append(filepath)
+        print(f"✅ Downloaded: {filepath}")
     return downloaded_files
 # ✅ Summarize extracted text and save to a file
-def summarize_and_save(full_text, output_file="summary.txt", chunk_size=3000, overlap=350):
+def summarize_and_save(full_text, output_file="summary.txt", chunk_size=3000, overlap=350, check_cancelled=None):
     if not full_text.strip():
         print("⚠️ No text to summarize.")
         return
 
     try:
-        from langchain.text_splitter import RecursiveCharacterTextSplitter
-
         llm = OllamaLLM(model="deepseek-r1")
-
-        splitter = RecursiveCharacterTextSplitter(
-            chunk_size=chunk_size,
-            chunk_overlap=overlap,
-            separators=["\n\n", "\n", ".", " "]
-        )
-        chunks = splitter.split_text(full_text)
-        all_summaries = []
-
+        chunks = split_for_summary(full_text, chunk_size=chunk_size, overlap=overlap)
         print(f"🧩 Splitting into {len(chunks)} chunks for summarization...")
 
-        for i, chunk in enumerate(chunks):
-            prompt = f"Summarize this part of a document:\n\n{chunk}\n\nSummary:"
-            partial_summary = llm.invoke(prompt)
-            all_summaries.append(f"--- Chunk {i+1} Summary ---\n{partial_summary}\n")
-
-        # Optional: summarize all summaries
-        combined_summary_prompt = "Summarize the following combined summaries into a cohesive document summary:\n\n" + "\n".join(all_summaries)
-        final_summary = llm.invoke(combined_summary_prompt)
+        # Chunk summaries run concurrently and are combined in a tree (see summarizer.py)
+        final_summary, chunk_summaries = MapReduceSummarizer(llm, "deepseek-r1").summarize(
+            chunks, check_cancelled=check_cancelled)
+        all_summaries = [f"--- Chunk {i+1} Summary ---\n{summary}\n" for i, summary in enumerate(chunk_summaries)]
 
         with open(output_file, "w", encoding="utf-8") as f:
             f.write("📌 FINAL SUMMARY\n\n")
@@ -130,76 +106,194 @@ def summarize_and_save(full_text, output_file="summary.txt", chunk_size=3000, ov
 
         print(f"✅ Detailed + Final summary saved to {output_file}")
 
+    except JobCancelled:
+        raise
     except Exception as e:
         print(f"❌ Error in smart_summarize_and_save: {e}")
 
 
 
 # ✅ Processes main + linked PDFs
-def handle_pdf_and_links(current_pdf_path):
-    global all_text_final
+def handle_pdf_and_links(current_pdf_path, job=None):
+    global all_text_final, current_doc_id
+    doc_id = get_doc_id(current_pdf_path)
+    timer = StageTimer(doc_id)
+
+    def check_cancelled():
+        if job is not None:
+            job.check_cancelled()
+
     try:
-        update_status_flag("processing")
-        text, links = extract_text_and_links(current_pdf_path)
-        all_text = text
+        timer.stage("parsing", path=current_pdf_path)
+        pages, links = extract_pages_and_links(current_pdf_path)
+        sources = [(current_pdf_path, pages)]
         if links:
+            check_cancelled()
+            timer.stage("downloading", links=len(links))
             downloaded_files = download_linked_files(links, download_dir="linked_pdfs")
+            timer.stage("parsing", files=len(downloaded_files))
             for fpath in downloaded_files:
                 if fpath.endswith(".pdf") and os.path.exists(fpath):
-                    file_text, _ = extract_text_and_links(fpath)
-                    all_text += "\n" + file_text
+                    file_pages, _ = extract_pages_and_links(fpath)
+                    sources.append((fpath, file_pages))
+
+        all_text = "\n".join(text for _, file_pages in sources for _, text in file_pages)
         if not all_text.strip():
-            update_status_flag("error")
+            timer.stage("error", message="No content found")
             print("⚠️ No content found.")
             return
-        
+
+        check_cancelled()
+        timer.stage("embedding")
+        metadata = lookup_bid_metadata(current_pdf_path, all_text)
+        if build_document_index(doc_id, sources, metadata, pdf_path=current_pdf_path) is None:
+            timer.stage("error", message="No chunks to index")
+            print("⚠️ No chunks to index.")
+            return
+
+        check_cancelled()
         all_text_final = all_text
-        update_status_flag("done")
-        summarize_and_save(all_text_final)
+        current_doc_id = doc_id
+        # Questions can be answered from here on; the summary follows
+        timer.stage("summarizing", bid_number=metadata.get("bid_number", ""))
+        summarize_and_save(all_text, check_cancelled=check_cancelled)
+        timer.stage("done")
         print("✅ Extracted content ready.")
+    except JobCancelled:
+        timer.stage("cancelled")
+        raise
     except Exception as e:
-        update_status_flag("error")
+        timer.stage("error", message=str(e))
         print(f"❌ Error processing PDF: {e}")
 
 
-def update_status_flag(status, path="status.txt"):
-    with open(path, "w") as f:
-        f.write(status)
-
-# ✅ Finds relevant chunks with FAISS
-def find_relevant_chunks(text, query, chunk_size=1000, overlap=90, top_k=5):
+def get_doc_id(pdf_path):
+    return os.path.splitext(os.path.basename(pdf_path))[0]
+
+
+def split_into_documents(sources, metadata, doc_id, chunk_size=1000, overlap=90):
+    """Chunk [(path, [(page, text), ...]), ...] into Documents tagged with bid metadata."""
+    splitter = RecursiveCharacterTextSplitter(
+        chunk_size=chunk_size,
+        chunk_overlap=overlap,
+        separators=["\n\n", "\n", ".", " ", "|"]  # add pipe as table column delimiter
+    )
+    docs = []
+    for path, pages in sources:
+        for page_number, text in pages:
+            for chunk in splitter.split_text(text):
+                if len(chunk) > 50:
+                    docs.append(Document(page_content=chunk, metadata={
+                        **metadata,
+                        "doc_id": doc_id,
+                        "source": os.path.basename(path),
+                        "page": page_number,
+                    }))
+    return docs
+
+
+def read_processed_files(path=PROCESSED_FILES_CSV):
+    """Return {doc_id: (pdf_path, vectorstore_path)} in insertion order."""
+    records = {}
+    if not os.path.exists(path):
+        return records
+    with open(path, newline="", encoding="utf-8") as f:
+        for row in csv.reader(f):
+            if len(row) >= 3 and row[0].strip():
+                records[row[0].strip()] = (row[1].strip(), row[2].strip())
+    return records
+
+
+def record_processed_file(doc_id, pdf_path, store_path, path=PROCESSED_FILES_CSV):
+    records = read_processed_files(path)
+    records.pop(doc_id, None)
+    records[doc_id] = (pdf_path, store_path)
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        for key, (pdf, store) in records.items():
+            writer.writerow([key, pdf, store])
+
+
+def latest_processed_doc_id():
+    records = read_processed_files()
+    return next(reversed(records), None) if records else None
+
+
+# ✅ Builds the chunk index once per document, saves it and merges it into the corpus
+def build_document_index(doc_id, sources, metadata, pdf_path=""):
+    docs = split_into_documents(sources, metadata, doc_id)
+    if not docs:
+        return None
+
+    ids = [f"{doc_id}:{i}" for i in range(len(docs))]
+    vector_store = FAISS.from_documents(docs, embedding_model, ids=ids)
+    store_path = os.path.join(VECTORSTORE_DIR, doc_id)
+    vector_store.save_local(store_path)
+    record_processed_file(doc_id, pdf_path, store_path)
+
+    with _index_lock:
+        _index_cache[doc_id] = vector_store
+    corpus.add_document_index(doc_id, vector_store)
+    print(f"✅ Indexed {len(docs)} chunks for {doc_id} at {store_path}")
+    return vector_store
+
+
+# ✅ Loads a saved document index (cached in memory after first load)
+def load_document_index(doc_id):
+    with _index_lock:
+        if doc_id in _index_cache:
+            return _index_cache[doc_id]
+
+    record = read_processed_files().get(doc_id)
+    store_path = record[1] if record else os.path.join(VECTORSTORE_DIR, doc_id)
+    if not os.path.exists(os.path.join(store_path, "index.faiss")):
+        return None
+
+    # The index was written by this app, so loading its pickle is safe
+    vector_store = FAISS.load_local(store_path, embedding_model, allow_dangerous_deserialization=True)
+    with _index_lock:
+        _index_cache[doc_id] = vector_store
+    return vector_store
+
+
+# ✅ Finds relevant chunks in the saved FAISS index (only the query is embedded)
+def find_relevant_chunks(doc_id, query, top_k=5):
     try:
-        if not text.strip():
-            return "❌ No text found after preprocessing."
-
-        splitter = RecursiveCharacterTextSplitter(
-            chunk_size=chunk_size,
-            chunk_overlap=overlap,
-            separators=["\n\n", "\n", ".", " ", "|"]  # add pipe as table column delimiter
-        )
-
-        chunks = splitter.split_text(text)
-        docs = [Document(page_content=chunk) for chunk in chunks if len(chunk) > 50]
-
-        vector_store = FAISS.from_documents(docs, embedding_model)
-        return vector_store.similarity_search(query, top_k=top_k)
+        vector_store = load_document_index(doc_id) if doc_id else None
+        if vector_store is None:
+            return "❌ No indexed document found. Please open a bid document first."
+        return vector_store.similarity_search(query, k=top_k)
     except Exception as e:
         return f"❌ Error while finding relevant chunks: {str(e)}"
 
 # ✅ Answers questions using Ollama (DeepSeek or other)
-def process_with_langchain_agent(question):
+def get_question_retriever(doc_id=None, bids=None, k=5):
+    """Returns (retriever, error_message) for a question about one document or a set of bids."""
+    if bids:
+        # Search only these bids' chunks in the corpus index
+        retriever = corpus.as_retriever(bids=bids, k=k)
+        if retriever is not None:
+            return retriever, None
+        # Bid not indexed yet: answer from the open document instead
+        print(f"⚠️ No corpus chunks for {bids}, using the document index")
+
+    # Search the saved index of the requested (or latest) document
+    doc_id = doc_id or current_doc_id or latest_processed_doc_id()
+    vector_store = load_document_index(doc_id) if doc_id else None
+    if vector_store is None:
+        return None, "❌ No indexed document found. Please open a bid document first."
+    return vector_store.as_retriever(search_type="similarity", search_kwargs={"k": k}), None
+
+
+def process_with_langchain_agent(question, doc_id=None, bids=None):
     print(f"Processing question: {question}")
     try:
         # Initialize Ollama (make sure Ollama + model is running)
         llm = OllamaLLM(model="deepseek-r1")  # or "mistral"
-        
-        # Get the relevant chunks based on the question
-        docs = find_relevant_chunks(all_text_final, question)
-        if isinstance(docs, str):  # error message returned
-            return docs
 
-        # Create the retriever from FAISS vector store
-        retriever = FAISS.from_documents(docs, embedding_model).as_retriever(search_type="similarity", search_kwargs={"k": 5})
+        retriever, error = get_question_retriever(doc_id, bids)
+        if retriever is None:
+            return error
 
         # Initialize the RetrievalQA chain
         qa_chain = RetrievalQA.from_chain_type(
@@ -222,22 +316,146 @@ def process_with_langchain_agent(question):
         return f"❌ Error in process_with_langchain_agent: {str(e)}"
 
 
-# ✅ PDF folder watcher
-def monitor_and_run_rag(poll_interval=3):
-    last_pdf_path = None
-    while True:
-        if not os.path.exists("latest_moved_path.txt"):
-            print("⚠️ latest_moved_path.txt not found. Waiting...")
-            time.sleep(poll_interval)
-            continue
-        with open("latest_moved_path.txt", "r") as f:
-            current_pdf_path = f.read().strip()
-        if current_pdf_path != last_pdf_path:
-            print(f"\n🔄 New file: {current_pdf_path}")
-            last_pdf_path = current_pdf_path
-            threading.Thread(target=handle_pdf_and_links, args=(current_pdf_path,)).start()
-        time.sleep(poll_interval)
+# Same prompt RetrievalQA's "stuff" chain uses, so streamed and blocking answers match
+QA_PROMPT = """Use the following pieces of context to answer the question at the end. If you don't know the answer, just say that you don't know, don't try to make up an answer.
+
+{context}
+
+Question: {question}
+Helpful Answer:"""
+
+
+class ThinkFilter:
+    """Drops deepseek-r1's <think>...</think> reasoning from a token stream.
+
+    Tags can be split across chunks, so a possible partial tag is held back
+    until the next chunk arrives.
+    """
+    OPEN, CLOSE = "<think>", "</think>"
+
+    def __init__(self):
+        self.buffer = ""
+        self.thinking = False
+        self.strip_leading = False
+
+    def _held_back(self, tag):
+        # Length of the longest suffix of the buffer that could start tag
+        for n in range(min(len(tag) - 1, len(self.buffer)), 0, -1):
+            if tag.startswith(self.buffer[-n:]):
+                return n
+        return 0
+
+    def _emit(self, text):
+        # Whitespace right after </think> is the gap between reasoning and answer
+        if self.strip_leading:
+            text = text.lstrip()
+            self.strip_leading = not text
+        return text
+
+    def feed(self, chunk):
+        """Returns (visible_text, events) where events are "think_start" / "think_end"."""
+        self.buffer += chunk
+        visible, events = "", []
+        while self.buffer:
+            tag = self.CLOSE if self.thinking else self.OPEN
+            idx = self.buffer.find(tag)
+            if idx >= 0:
+                if not self.thinking:
+                    visible += self._emit(self.buffer[:idx])
+                self.buffer = self.buffer[idx + len(tag):]
+                self.thinking = not self.thinking
+                self.strip_leading = not self.thinking
+                events.append("think_start" if self.thinking else "think_end")
+                continue
+            keep = self._held_back(tag)
+            if not self.thinking:
+                visible += self._emit(self.buffer[:len(self.buffer) - keep])
+            self.buffer = self.buffer[len(self.buffer) - keep:] if keep else ""
+            break
+        return visible, events
+
+    def flush(self):
+        rest, self.buffer = ("" if self.thinking else self._emit(self.buffer)), ""
+        return rest
+
+
+def describe_sources(docs, snippet_chars=300):
+    return [{
+        "doc_id": d.metadata.get("doc_id"),
+        "bid_number": d.metadata.get("bid_number"),
+        "source": os.path.basename(d.metadata.get("source") or ""),
+        "page": d.metadata.get("page"),
+        "snippet": d.page_content[:snippet_chars],
+    } for d in docs]
+
+
+def stream_answer(question, doc_id=None, bids=None, hide_reasoning=True):
+    """Yield answer events: "sources" first, then "token" chunks as Ollama produces them, then "done".
+
+    With hide_reasoning the <think> block is filtered out here and replaced by
+    "reasoning" start/end events, so clients only receive the answer text.
+    """
+    print(f"Streaming answer for: {question}")
+    started = time.monotonic()
+    try:
+        retriever, error = get_question_retriever(doc_id, bids)
+        if retriever is None:
+            yield {"type": "error", "error": error}
+            return
+        docs = retriever.invoke(question)
+        yield {"type": "sources", "sources": describe_sources(docs),
+               "seconds": round(time.monotonic() - started, 3)}
+
+        llm = OllamaLLM(model="deepseek-r1")
+        prompt = QA_PROMPT.format(context="\n\n".join(d.page_content for d in docs), question=question)
+        think_filter = ThinkFilter() if hide_reasoning else None
+        first_token = None
+        for chunk in llm.stream(prompt):
+            if think_filter:
+                chunk, events = think_filter.feed(chunk)
+                for event in events:
+                    yield {"type": "reasoning", "state": "started" if event == "think_start" else "finished"}
+            if chunk:
+                if first_token is None:
+                    first_token = round(time.monotonic() - started, 3)
+                yield {"type": "token", "text": chunk}
+        if think_filter:
+            rest = think_filter.flush()
+            if rest:
+                yield {"type": "token", "text": rest}
+        yield {"type": "done", "first_token_seconds": first_token,
+               "total_seconds": round(time.monotonic() - started, 3)}
+    except Exception as e:
+        yield {"type": "error", "error": f"❌ Error in stream_answer: {str(e)}"}
+
+
+# ✅ Document processing queue (replaces one thread per moved file)
+def process_document_job(job, pdf_path):
+    handle_pdf_and_links(pdf_path, job=job)
+
+
+def document_group(pdf_path):
+    """Supersession group of a PDF: its bid when the bid store knows the file, else its doc id."""
+    bid_number = lookup_bid_metadata(pdf_path)["bid_number"]
+    return f"bid:{bid_number}" if bid_number else f"doc:{get_doc_id(pdf_path)}"
+
+
+def submit_document(pdf_path):
+    """Queue a PDF; a newer file for the same bid (or document) supersedes the older one."""
+    return document_queue.submit(
+        os.path.abspath(pdf_path), process_document_job, pdf_path,
+        priority=PRIORITY_INTERACTIVE, group=document_group(pdf_path),
+    )
+
+
+def start_document_workers():
+    """Start the queue workers and feed them every file move_file publishes."""
+    document_queue.start()
+    bus.add_listener("file_moved", lambda event: submit_document(event["path"]))
+
 
 # ✅ Main run loop
 if __name__ == "__main__":
-    monitor_and_run_rag()
+    import move_file
+    start_document_workers()
+    move_file.run_task()
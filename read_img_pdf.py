@@ -1,11 +1,17 @@
 import pytesseract
-from pdf2image import convert_from_path
+from pdf2image import convert_from_path, pdfinfo_from_path
 import os
 import cv2
 import numpy as np
 from pytesseract import Output
 from collections import defaultdict
 import re
+from concurrent.futures import ProcessPoolExecutor
+
+# Each worker runs tesseract on one page at a time; keep it at the core count
+OCR_WORKERS = int(os.environ.get("OCR_WORKERS", str(os.cpu_count() or 2)))
+# "batched" runs image_to_data once per table page; "per_row" spawns tesseract per row
+TABLE_OCR_MODE = os.environ.get("TABLE_OCR_MODE", "batched")
 
 def preprocess_image(img):
     """Enhance image contrast, reduce noise for better OCR"""
@@ -50,9 +56,8 @@ def detect_table_rows(image):
     row_boxes = sorted(row_boxes, key=lambda b: b[1])
     return row_boxes
 
-def extract_table_lines(image):
-    """Extract each table row as a line using bounding boxes"""
-    rows = detect_table_rows(image)
+def extract_table_lines_per_row(image, rows):
+    """Extract each table row as a line using bounding boxes (one tesseract call per row)"""
     extracted_lines = []
 
     for x, y, w, h in rows:
@@ -64,36 +69,99 @@ def extract_table_lines(image):
 
     return extracted_lines
 
-def ocr_pdf_clean_lines(pdf_path, output_txt_path, dpi=300):
+def row_bands(rows, image_height):
+    """Region of each detected row, the same crop the per-row path OCRs: (x0, y0, x1, y1)"""
+    return [(x, y, x + w, min(y + h + 10, image_height)) for x, y, w, h in rows]  # +10 as in the per-row crop
+
+def extract_table_lines_batched(image, rows):
+    """Extract table rows with a single image_to_data call per page.
+
+    Words are assigned to the row band containing their vertical centre (and
+    horizontally inside the row), then joined in reading order.
+    """
+    data = pytesseract.image_to_data(image, output_type=Output.DICT, config="--psm 6")
+    bands = row_bands(rows, image.shape[0])
+    row_words = defaultdict(list)
+
+    for i, word in enumerate(data["text"]):
+        if not word.strip():
+            continue
+        left, top, width, height = data["left"][i], data["top"][i], data["width"][i], data["height"][i]
+        cy, cx = top + height / 2, left + width / 2
+        for row_idx, (x0, y0, x1, y1) in enumerate(bands):
+            if y0 <= cy < y1 and x0 <= cx <= x1:
+                line_key = (data["block_num"][i], data["par_num"][i], data["line_num"][i])
+                row_words[row_idx].append((line_key, left, word.strip()))
+                break
+
+    extracted_lines = []
+    for row_idx in sorted(row_words):
+        words = sorted(row_words[row_idx], key=lambda w: (w[0], w[1]))
+        clean = clean_line(" ".join(w[2] for w in words))
+        if clean:
+            extracted_lines.append(clean)
+    return extracted_lines
+
+def extract_table_lines(image, rows=None, mode=TABLE_OCR_MODE):
+    """Extract each table row as a line ("batched": one tesseract call per page, "per_row": one per row)"""
+    rows = rows if rows is not None else detect_table_rows(image)
+    if mode == "per_row":
+        return extract_table_lines_per_row(image, rows)
+    return extract_table_lines_batched(image, rows)
+
+def ocr_image_lines(img):
+    """OCR one page image (RGB array) into cleaned lines"""
+    img = preprocess_image(img)
+
+    # If it's a table-heavy image, segment into rows
+    rows = detect_table_rows(img)
+    if len(rows) > 3:  # Consider as table if 3+ rows detected
+        print("📋 Table detected. Extracting row-wise...")
+        lines = extract_table_lines(img, rows)
+    else:
+        print("🔎 Normal text layout. Using grouped lines...")
+        data = pytesseract.image_to_data(img, output_type=Output.DICT, config="--psm 6")
+        lines = group_words_by_line(data)
+
+    return [clean for clean in (clean_line(line) for line in lines) if clean]
+
+def ocr_page(pdf_path, page_number, dpi=300):
+    """Rasterize and OCR a single page (runs inside a pool worker)"""
+    pil_img = convert_from_path(pdf_path, dpi=dpi, first_page=page_number, last_page=page_number)[0]
+    print(f"📝 Processing Page {page_number}")
+    return ocr_image_lines(np.array(pil_img))
+
+def ocr_pdf_pages(pdf_path, dpi=300, workers=OCR_WORKERS, max_in_flight=None, ocr_func=ocr_page):
+    """Yield (page_number, lines) in page order.
+
+    Pages are rasterized lazily inside the workers (ocr_func(pdf_path, page,
+    dpi)) and at most max_in_flight pages are queued or being processed, so
+    memory stays bounded.
+    """
+    page_count = pdfinfo_from_path(pdf_path)["Pages"]
+    max_in_flight = max_in_flight or workers * 2
+    next_to_submit, next_to_yield = 1, 1
+    futures = {}
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        while next_to_yield <= page_count:
+            while next_to_submit <= page_count and len(futures) < max_in_flight:
+                futures[next_to_submit] = executor.submit(ocr_func, pdf_path, next_to_submit, dpi)
+                next_to_submit += 1
+            yield next_to_yield, futures.pop(next_to_yield).result()
+            next_to_yield += 1
+
+def ocr_pdf_clean_lines(pdf_path, output_txt_path, dpi=300, workers=OCR_WORKERS):
     if not os.path.exists(pdf_path):
         print("❌ PDF not found.")
         return
 
-    print("🔄 Converting PDF pages to images...")
-    images = convert_from_path(pdf_path, dpi=dpi)
-
+    print(f"🔄 OCR of PDF pages on {workers} workers...")
     with open(output_txt_path, "w", encoding="utf-8") as out:
-        for idx, pil_img in enumerate(images):
-            print(f"📝 Processing Page {idx+1}")
-            out.write(f"\n--- Page {idx+1} ---\n")
-
-            img = np.array(pil_img)
-            img = preprocess_image(img)
-
-            # If it's a table-heavy image, segment into rows
-            rows = detect_table_rows(img)
-            if len(rows) > 3:  # Consider as table if 3+ rows detected
-                print("📋 Table detected. Extracting row-wise...")
-                lines = extract_table_lines(img)
-            else:
-                print("🔎 Normal text layout. Using grouped lines...")
-                data = pytesseract.image_to_data(img, output_type=Output.DICT, config="--psm 6")
-                lines = group_words_by_line(data)
-
+        for page_number, lines in ocr_pdf_pages(pdf_path, dpi=dpi, workers=workers):
+            out.write(f"\n--- Page {page_number} ---\n")
             for line in lines:
-                clean = clean_line(line)
-                if clean:
-                    out.write(clean + "\n")
+                out.write(line + "\n")
 
     print(f"✅ Output written to: {output_txt_path}")
 
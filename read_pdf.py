@@ -5,10 +5,7 @@ import fitz  # PyMuPDF
 import faiss
 from pathlib import Path
 from urllib.parse import unquote
-from sentence_transformers import SentenceTransformer
-
-# Load embedder globally for efficiency
-embedder = SentenceTransformer("all-MiniLM-L6-v2")
+from model_registry import get_model
 
 
 def extract_text_and_links(pdf_path):
@@ -66,6 +63,7 @@ def enhance_query(query):
 def find_semantically_relevant_chunks(text, query, top_k=3):
     """Find top-k relevant chunks from text using embeddings and FAISS."""
     chunks = smart_chunk_by_section(text)
+    embedder = get_model("minilm")
     embeddings = embedder.encode(chunks, convert_to_numpy=True)
     enhanced_query = enhance_query(query)
     query_embedding = embedder.encode([enhanced_query], convert_to_numpy=True)
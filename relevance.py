@@ -0,0 +1,143 @@
+import os
+import json
+import hashlib
+import threading
+import numpy as np
+from rapidfuzz import fuzz, process
+from embedding_cache import cached_embeddings
+
+# Relevance scoring for scraped bids. Each bid's Items text is embedded with
+# the shared bge-small model and compared to every capability profile in one
+# matrix multiply; RapidFuzz adds fuzzy keyword hits (typos, word variants).
+#   score = SEMANTIC_WEIGHT * best profile cosine + (1 - SEMANTIC_WEIGHT) * best keyword hit
+# Profiles are read from RELEVANCE_PROFILES (JSON list of {"name",
+# "description", "keywords"}) when that file exists, else DEFAULT_PROFILES.
+PROFILES_PATH = os.environ.get("RELEVANCE_PROFILES", "capability_profiles.json")
+RELEVANCE_THRESHOLD = float(os.environ.get("RELEVANCE_THRESHOLD", "0.62"))
+SEMANTIC_WEIGHT = float(os.environ.get("RELEVANCE_SEMANTIC_WEIGHT", "0.75"))
+FUZZY_SCORE_CUTOFF = 85  # partial_ratio below this counts as no keyword hit
+
+DEFAULT_PROFILES = [
+    {"name": "Software development",
+     "description": "Custom software, web application and backend development, platform development and maintenance",
+     "keywords": ["software", "web development", "application development", "backend", "platform development"]},
+    {"name": "Mobile applications",
+     "description": "Design and development of Android and iOS mobile applications",
+     "keywords": ["mobile application", "mobile app"]},
+    {"name": "Artificial intelligence",
+     "description": "Artificial intelligence, machine learning, data analytics and chatbot solutions",
+     "keywords": ["artificial intelligence", "machine learning", "data analytics"]},
+    {"name": "Cyber security",
+     "description": "Cyber security audit, security compliance, VAPT and information security services",
+     "keywords": ["cyber security", "security compliance", "security audit"]},
+    {"name": "IT consultancy",
+     "description": "IT consultancy, digital transformation and e-governance project consulting services",
+     "keywords": ["consultancy", "it consultancy", "e-governance"]},
+    {"name": "E-learning platforms",
+     "description": "Learning management systems and e-learning software platforms and content development",
+     "keywords": ["learning management system", "e-learning platform"]},
+    {"name": "Blockchain",
+     "description": "Blockchain and distributed ledger application development",
+     "keywords": ["blockchain"]},
+]
+
+
+def load_profiles(path=PROFILES_PATH):
+    if path and os.path.exists(path):
+        with open(path, encoding="utf-8") as f:
+            profiles = json.load(f)
+        print(f"🎯 Loaded {len(profiles)} capability profiles from {path}")
+        return profiles
+    return DEFAULT_PROFILES
+
+
+class RelevanceScorer:
+    def __init__(self, profiles=None, embedding=None, threshold=RELEVANCE_THRESHOLD,
+                 semantic_weight=SEMANTIC_WEIGHT):
+        self.profiles = profiles or load_profiles()
+        self.embedding = embedding or cached_embeddings()
+        self.threshold = threshold
+        self.semantic_weight = semantic_weight
+        self.keywords = sorted({k.lower() for p in self.profiles for k in p.get("keywords", [])})
+        self._profile_matrix = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _normalize(matrix):
+        return matrix / np.linalg.norm(matrix, axis=1, keepdims=True).clip(min=1e-12)
+
+    def profile_matrix(self):
+        """Profile embeddings (profiles x dim), L2-normalized; computed once."""
+        with self._lock:
+            if self._profile_matrix is None:
+                texts = [f"{p['name']}: {p.get('description', '')}" for p in self.profiles]
+                self._profile_matrix = self._normalize(np.asarray(self.embedding.embed_documents(texts), dtype=np.float32))
+            return self._profile_matrix
+
+    def score_texts(self, texts):
+        """Returns [{"score", "semantic", "fuzzy", "profile", "keyword"}] for each text."""
+        if not texts:
+            return []
+        vectors = self._normalize(np.asarray(self.embedding.embed_documents(texts), dtype=np.float32))
+        similarity = vectors @ self.profile_matrix().T  # texts x profiles, one matmul
+        best_profile = similarity.argmax(axis=1)
+        semantic = similarity.max(axis=1)
+
+        if self.keywords:
+            hits = process.cdist([t.lower() for t in texts], self.keywords, scorer=fuzz.partial_ratio,
+                                 score_cutoff=FUZZY_SCORE_CUTOFF, workers=-1) / 100.0
+            fuzzy, best_keyword = hits.max(axis=1), hits.argmax(axis=1)
+        else:
+            fuzzy, best_keyword = np.zeros(len(texts)), None
+
+        scores = self.semantic_weight * semantic + (1 - self.semantic_weight) * fuzzy
+        return [{
+            "score": float(scores[i]),
+            "semantic": float(semantic[i]),
+            "fuzzy": float(fuzzy[i]),
+            "profile": self.profiles[best_profile[i]]["name"],
+            "keyword": self.keywords[best_keyword[i]] if fuzzy[i] > 0 else "",
+        } for i in range(len(texts))]
+
+    def score_rows(self, rows):
+        return self.score_texts([(row.get("Items") or "").strip() for row in rows])
+
+    def is_relevant(self, result):
+        return result["score"] >= self.threshold
+
+    def fingerprint(self):
+        """Short id of the profiles, weights, threshold and embedding model.
+
+        Stored with each filter decision; bids decided under another
+        fingerprint are scored again.
+        """
+        model = getattr(getattr(self.embedding, "cache", None), "model_name", "")
+        settings = json.dumps([self.profiles, self.threshold, self.semantic_weight, FUZZY_SCORE_CUTOFF, model],
+                              sort_keys=True)
+        return "relevance:" + hashlib.sha1(settings.encode("utf-8")).hexdigest()[:12]
+
+
+_scorer = None
+_scorer_lock = threading.Lock()
+
+
+def get_scorer():
+    global _scorer
+    with _scorer_lock:
+        if _scorer is None:
+            _scorer = RelevanceScorer()
+        return _scorer
+
+
+if __name__ == "__main__":
+    # Rank the latest run's bids (including filtered-out ones) to tune profiles and threshold
+    from bid_store import get_store
+    store = get_store()
+    rows = store.run_bids(store.latest_run())
+    scorer = get_scorer()
+    results = scorer.score_texts([r["items"] for r in rows])
+    ranked = sorted(zip(rows, results), key=lambda pair: pair[1]["score"], reverse=True)
+    for row, result in ranked[:50]:
+        mark = "✅" if scorer.is_relevant(result) else "  "
+        print(f"{mark} {result['score']:.3f} (sem {result['semantic']:.3f}, kw {result['fuzzy']:.2f} {result['keyword']!r}) "
+              f"[{result['profile']}] {row['bid_number']}: {row['items'][:80]}")
@@ -1,50 +1,23 @@
-import csv
-import os
+import sys
+from bid_store import get_store
+from bid_filter import KEYWORDS, compile_keywords, keyword_filter_key
 
-input_csv = 'bid_results.csv'
-intermediate_csv = 'filtered_bid_results.csv'
-output_csv = 'filtered_bid_results.csv'
+# Re-runs the keyword filter over bids of a run that were stored without a
+# decision (e.g. by scrap.py). /scrape filters pages in-process as they are
+# scraped (see bid_filter.BidFilter) and no longer calls this script.
+# Usage: python3 remove_rows.py [run_id]   (default: latest run)
 
-# Keywords for selective matching in 'Items'
-keywords = ['software', 'consultancy', 'custom', 'development', 'learning','web development','blockchain','application development','backend','mobile application','platform development','artificial intelligence','cyber security','security compliance']
 
-# Step 1: Read previous filtered data (if any)
-existing_rows = []
-if os.path.exists(intermediate_csv):
-    with open(intermediate_csv, mode='r', newline='', encoding='utf-8') as existing_file:
-        reader = csv.DictReader(existing_file)
-        existing_rows = [row for row in reader]
+def filter_run(store, run_id, keywords=KEYWORDS):
+    pattern = compile_keywords(keywords)
+    rows = store.unfiltered_bids(run_id)
+    decisions = {row['bid_number']: pattern.search(row['items'].lower()) is not None for row in rows}
+    store.set_matched(decisions, filter_key=keyword_filter_key(keywords))
+    return sum(decisions.values()), len(decisions)
 
-# Step 2: Read new bid_results.csv data
-with open(input_csv, mode='r', newline='', encoding='utf-8') as infile:
-    reader = csv.DictReader(infile)
-    new_rows = [row for row in reader]
 
-# Step 3: Combine and filter out rows with 'Not Found' Bid Number
-all_rows = existing_rows + new_rows
-filtered_rows = [row for row in all_rows if row['Bid Number'].strip().lower() != 'not found']
-
-# Step 4: Remove duplicates based on 'Bid Number'
-seen = set()
-unique_rows = []
-for row in filtered_rows:
-    bid = row['Bid Number']
-    if bid not in seen:
-        seen.add(bid)
-        unique_rows.append(row)
-
-# Step 5: Selective match on 'Items' column using keywords
-matched_rows = []
-for row in unique_rows:
-    item_value = row.get('Items', '').lower()
-    if any(keyword in item_value for keyword in keywords):
-        matched_rows.append(row)
-
-# Step 6: Write to final_bid_results.csv
-fieldnames = ['Bid Number', 'Items', 'Quantity', 'Department', 'Start Date', 'End Date', 'Downloadable File URL']
-with open(output_csv, mode='w', newline='', encoding='utf-8') as outfile:
-    writer = csv.DictWriter(outfile, fieldnames=fieldnames)
-    writer.writeheader()
-    writer.writerows(matched_rows)
-
-print(f"Filtered, merged, and keyword-matched data saved to {output_csv}")
+if __name__ == "__main__":
+    store = get_store()
+    run_id = int(sys.argv[1]) if len(sys.argv) > 1 else store.latest_run()
+    matched, total = filter_run(store, run_id)
+    print(f"Keyword-matched {matched} of {total} new bids in run {run_id}")
@@ -0,0 +1,331 @@
+import os
+import re
+import time
+import queue
+import tempfile
+import threading
+import traceback
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
+from selenium import webdriver
+from selenium.webdriver.common.by import By
+from selenium.webdriver.firefox.service import Service
+from selenium.webdriver.firefox.options import Options
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.common.exceptions import TimeoutException, WebDriverException
+import gem_listing
+
+# ====== SETTINGS ======
+GECKODRIVER_PATH = '/usr/local/bin/geckodriver'
+URL = 'https://bidplus.gem.gov.in/all-bids'
+MAX_RETRIES = 3
+POOL_SIZE = int(os.environ.get("SCRAPER_POOL_SIZE", "3"))
+# Longest wait for a busy browser to be returned to the pool
+DRIVER_WAIT_TIMEOUT = int(os.environ.get("SCRAPER_DRIVER_WAIT", "300"))
+# "http" fetches listing pages directly and falls back to Selenium; "selenium" always drives a browser
+SCRAPE_MODE = os.environ.get("SCRAPER_MODE", "http")
+
+
+# ====== Driver setup ======
+def make_driver(headless=True):
+    temp_dir = tempfile.mkdtemp()
+
+    profile = webdriver.FirefoxProfile()
+    profile.set_preference("browser.download.folderList", 2)
+    profile.set_preference("browser.download.dir", temp_dir)
+    profile.set_preference("browser.helperApps.neverAsk.saveToDisk", "application/pdf,application/zip,application/msword,application/vnd.openxmlformats-officedocument.wordprocessingml.document,text/plain")
+    profile.set_preference("pdfjs.disabled", True)
+
+    firefox_options = Options()
+    if headless:
+        firefox_options.add_argument("-headless")
+    firefox_options.profile = profile
+    return webdriver.Firefox(service=Service(GECKODRIVER_PATH), options=firefox_options)
+
+
+class DriverPool:
+    """Keeps warm Firefox drivers so keywords don't pay browser startup each time."""
+
+    def __init__(self, size=POOL_SIZE, headless=True):
+        self.size = size
+        self.headless = headless
+        self._idle = queue.Queue()
+        self._created = 0
+        self._lock = threading.Lock()
+
+    def warm(self):
+        """Start all drivers up front (in parallel) so the first search is fast."""
+        with self._lock:
+            missing = self.size - self._created
+            self._created += missing
+        with ThreadPoolExecutor(max_workers=max(missing, 1)) as executor:
+            for driver in executor.map(lambda _: self._new_driver(), range(missing)):
+                if driver is not None:
+                    self._idle.put(driver)
+
+    def _new_driver(self):
+        try:
+            return make_driver(self.headless)
+        except Exception as e:
+            print(f"[ERROR] Starting driver: {e}")
+            with self._lock:
+                self._created -= 1
+            return None
+
+    def _get(self, timeout=DRIVER_WAIT_TIMEOUT):
+        """An idle driver, a new one if the pool has room, else wait for one to be returned.
+
+        Raises WebDriverException if Firefox cannot be started or no driver
+        frees up within timeout, so callers retry and give up instead of hanging.
+        """
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            can_create = self._created < self.size
+            if can_create:
+                self._created += 1
+        if can_create:
+            driver = self._new_driver()
+            if driver is None:
+                raise WebDriverException("Could not start Firefox/geckodriver")
+            return driver
+        try:
+            return self._idle.get(timeout=timeout)
+        except queue.Empty:
+            raise WebDriverException(f"No browser became free within {timeout}s")
+
+    @contextmanager
+    def driver(self):
+        driver = self._get()
+        healthy = True
+        try:
+            yield driver
+        except WebDriverException:
+            healthy = False
+            raise
+        finally:
+            if healthy:
+                self._idle.put(driver)
+            else:
+                # Broken browser: drop it, a fresh one is started on next demand
+                try:
+                    driver.quit()
+                except Exception:
+                    pass
+                with self._lock:
+                    self._created -= 1
+
+    def close(self):
+        while True:
+            try:
+                driver = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            try:
+                driver.quit()
+            except Exception:
+                pass
+            with self._lock:
+                self._created -= 1
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    """Process-wide driver pool shared across /scrape requests."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = DriverPool()
+        return _pool
+
+
+# ====== Helper Functions ======
+def extract_field(text, label, stop_labels):
+    try:
+        start = text.index(label) + len(label)
+        end = min([text.index(stop, start) for stop in stop_labels if stop in text[start:]] + [len(text)])
+        return text[start:end].strip()
+    except:
+        return "Not Found"
+
+def extract_department_from_html(bid):
+    try:
+        department_div = bid.find_element(By.XPATH, ".//*[contains(text(),'Department Name And Address:')]/following::div[1]")
+        department = department_div.text.strip().replace('\n', ' ').replace('\r', '')
+        return department if department else "Not Provided"
+    except Exception as e:
+        print(f"[ERROR] Extracting department: {e}")
+        return "Not Provided"
+
+def extract_bid_number(bid, bid_text):
+    try:
+        bid_p = bid.find_element(By.CLASS_NAME, "bid_no")
+        bid_anchor = bid_p.find_element(By.TAG_NAME, "a")
+        if bid_anchor:
+            bid_no = bid_anchor.text.strip()
+            if bid_no.startswith("GEM"):
+                return bid_no
+    except Exception as e:
+        print("[DEBUG] Not found via HTML structure:", e)
+
+    regex_match = re.search(r'BID\s*NO[:\-]?\s*(GEM/[A-Z0-9/\-]+)', bid_text, re.IGNORECASE)
+    if regex_match:
+        return regex_match.group(1).strip()
+
+    try:
+        bid_no_element = bid.find_element(By.XPATH, ".//*[contains(translate(text(),'abcdefghijklmnopqrstuvwxyz','ABCDEFGHIJKLMNOPQRSTUVWXYZ'),'BID NO')]")
+        bid_no_text = bid_no_element.text
+        bid_match = re.search(r'GEM/[A-Z0-9/\-]+', bid_no_text)
+        if bid_match:
+            return bid_match.group(0).strip()
+    except Exception as e:
+        print("[DEBUG] XPath fallback failed:", e)
+
+    fallback_match = re.search(r'GEM/[A-Z0-9/\-]+', bid_text)
+    if fallback_match:
+        return fallback_match.group(0).strip()
+
+    print("[WARNING] Could not extract bid number.")
+    return "Not Found"
+
+
+def parse_bid_card(bid):
+    bid_text = bid.text.strip()
+
+    try:
+        link = bid.find_element(By.TAG_NAME, "a").get_attribute("href")
+    except:
+        link = "Not Available"
+
+    return {
+        'Bid Number': extract_bid_number(bid, bid_text),
+        'Items': extract_field(bid_text, "Items:", ["Quantity:", "Department", "\n"]),
+        'Quantity': extract_field(bid_text, "Quantity:", ["Department", "Start Date:", "\n"]),
+        'Department': extract_department_from_html(bid),
+        'Start Date': extract_field(bid_text, "Start Date:", ["End Date:", "\n"]),
+        'End Date': extract_field(bid_text, "End Date:", ["\n"]),
+        'Downloadable File URL': link
+    }
+
+
+# ====== Scraping ======
+def scrape_keyword(driver, keyword, on_page=None):
+    """Run one keyword search on an already running driver and walk all result pages.
+
+    on_page(rows) is called with each page's rows as soon as they are parsed.
+    """
+    driver.get(URL)
+
+    WebDriverWait(driver, 30).until(
+        EC.presence_of_element_located((By.ID, "searchBid"))
+    )
+
+    search_input = driver.find_element(By.ID, "searchBid")
+    search_input.clear()
+    search_input.send_keys(keyword)
+    driver.find_element(By.ID, "searchBidRA").click()
+
+    WebDriverWait(driver, 30).until(
+        EC.presence_of_all_elements_located((By.XPATH, "//div[contains(@class, 'card')]"))
+    )
+
+    scraped_data = []
+    while True:
+        bids = WebDriverWait(driver, 30).until(
+            EC.presence_of_all_elements_located((By.XPATH, "//div[contains(@class, 'card')]"))
+        )
+        print(f"[{keyword}] Found {len(bids)} bid(s) on this page.")
+
+        if not bids:
+            break
+
+        page_rows = []
+        for index, bid in enumerate(bids):
+            try:
+                page_rows.append(parse_bid_card(bid))
+            except Exception as e:
+                print(f"[ERROR] Parsing bid {index + 1}: {e}")
+        scraped_data.extend(page_rows)
+        if on_page and page_rows:
+            on_page(page_rows)
+
+        try:
+            next_button = driver.find_element(By.CSS_SELECTOR, 'a.page-link.next')
+            if "disabled" in next_button.get_attribute("class"):
+                break
+            next_button.click()
+
+            WebDriverWait(driver, 30).until(EC.staleness_of(bids[0]))
+            WebDriverWait(driver, 30).until(
+                EC.presence_of_all_elements_located((By.XPATH, "//div[contains(@class, 'card')]"))
+            )
+        except TimeoutException:
+            print(f"[{keyword}] Timeout waiting for next page.")
+            break
+        except:
+            break
+
+    return scraped_data
+
+
+def scrape_keyword_with_retries(pool, keyword, max_retries=MAX_RETRIES, on_page=None):
+    """Returns the scraped rows, or None if every attempt failed.
+
+    Pages of a failed attempt may already have been passed to on_page, so
+    consumers must tolerate seeing a bid again.
+    """
+    for attempt in range(1, max_retries + 1):
+        try:
+            with pool.driver() as driver:
+                rows = scrape_keyword(driver, keyword, on_page=on_page)
+            print(f"✅ [{keyword}] Scraped {len(rows)} bids")
+            return rows
+        except Exception as e:
+            print(f"[RETRY {attempt}] [{keyword}] Error: {e}")
+            traceback.print_exc()
+            time.sleep(2)
+    print(f"❌ [{keyword}] Failed after maximum retries.")
+    return None
+
+
+def scrape_keyword_any(pool, keyword, mode=SCRAPE_MODE, on_page=None):
+    """Try the HTTP listing fetcher first, fall back to the browser pool."""
+    if mode == "http":
+        try:
+            return gem_listing.fetch_keyword(keyword, on_page=on_page)
+        except gem_listing.ListingFetchError as e:
+            print(f"[WARNING] {e}. Falling back to Selenium.")
+    return scrape_keyword_with_retries(pool, keyword, on_page=on_page)
+
+
+def merge_results(results):
+    """Merge per-keyword rows in order, keeping the first row for each bid number."""
+    merged, seen = [], set()
+    for rows in results:
+        for row in rows or []:
+            bid = row['Bid Number']
+            if bid != "Not Found" and bid in seen:
+                continue
+            seen.add(bid)
+            merged.append(row)
+    return merged
+
+
+def scrape_keywords(keywords, pool=None, mode=SCRAPE_MODE, on_page=None):
+    """Scrape all keywords concurrently (HTTP first, then the driver pool).
+
+    on_page(rows) streams each result page as it arrives (from several
+    threads at once). Returns (merged_rows, failed_keywords).
+    """
+    pool = pool or get_pool()
+    with ThreadPoolExecutor(max_workers=max(1, min(pool.size, len(keywords)))) as executor:
+        results = list(executor.map(lambda kw: scrape_keyword_any(pool, kw, mode, on_page), keywords))
+
+    failed = [kw for kw, rows in zip(keywords, results) if rows is None]
+    return merge_results(results), failed
@@ -14,34 +14,40 @@ let filters = {
     startDate: null,
     endDate: null
 };
-let data = [];
+// Filtering, sorting and paging happen on the server (/data); only one page is held here
+let pageInfo = { total: 0, pages: 0 };
+let sortColumn = null;
+let sortOrder = "asc";
+let currentBid = null;
 let currentPage = 1;
 let rowsPerPage = parseInt(rowsPerPageSelect.value);
 
 const askButton = document.getElementById("askButton");
 
-function readTextFile() {
-    fetch('../status.txt')
-      .then(response => {
-        if (!response.ok) {
-          throw new Error('File not found or inaccessible');
-        }
-        return response.text();
-      })
-      .then(text => {
-        // debugger
-        // console.log(text)
-        document.getElementById("agenttext").textContent = text === "done"? "":  "File is still processing..";
-        askButton.disabled = text === "done"? false : true;
-      })
-      .catch(error => {
-        console.log(error)
-      });
+// Document processing status pushed by the server (see /events in app.py)
+const stageMessages = {
+    downloading: "Downloading document...",
+    parsing: "Reading document...",
+    embedding: "Indexing document...",
+    summarizing: "",
+    done: "",
+    error: "Processing failed. Please try again."
+  };
+
+function handleStageEvent(event) {
+    const info = JSON.parse(event.data);
+    // A superseded document was dropped; the newer one reports its own progress
+    if (info.stage === "cancelled") return;
+    const ready = info.stage === "summarizing" || info.stage === "done";
+    document.getElementById("agenttext").textContent = stageMessages[info.stage] ?? "File is still processing..";
+    askButton.disabled = !ready;
+    if (info.previous_seconds !== null) {
+        console.log(`${info.doc_id}: ${info.previous} took ${info.previous_seconds}s, now ${info.stage} (${info.total_seconds}s total)`);
+    }
   }
 
-  // Call initially and then every 2 seconds
-  readTextFile();
-  setInterval(readTextFile, 2000);
+const stageEvents = new EventSource('/events');
+stageEvents.addEventListener('stage', handleStageEvent);
 
 window.onload = function () {
     spinner.style.display = 'none';
@@ -76,17 +82,9 @@ form.addEventListener('submit', async (e) => {
                 throw new Error(scrapeText || 'Scraping failed');
             }
     
-            const dataRes = await fetch('/data');
-            const dataJson = await dataRes.json();
-    
-            if (dataJson.error) {
-                throw new Error(dataJson.error);
-            }
-    
-            data = dataJson.data;
-            applyFilters();
-            createPagination();
-            showPage(currentPage);
+            curr = 1;
+            currentWindowStart = 1;
+            await showPage(1);
     
             message.className = "alert alert-success mt-3";
             message.textContent = "Scraping and results loaded successfully!";
@@ -100,83 +98,44 @@ form.addEventListener('submit', async (e) => {
         }
     });
 
-// Helper to parse "DD-MM-YYYY hh:mm AM/PM" into a Date object
-function parseCustomDate(dateString) {
-    // Example input: "22-04-2025 12:31 PM"
-    const [datePart, timePart, meridian] = dateString.split(" ");
-    const [day, month, year] = datePart.split("-").map(Number);
-    let [hour, minute] = timePart.split(":").map(Number);
-
-    // Convert 12-hour time to 24-hour time
-    if (meridian === "PM" && hour !== 12) hour += 12;
-    if (meridian === "AM" && hour === 12) hour = 0;
-
-    return new Date(year, month - 1, day, hour, minute);
+// Query string for /data from the current filters, sort and page
+function dataQuery(page, extra = {}) {
+    const params = new URLSearchParams({ page: page, page_size: rowsPerPage, ...extra });
+    const globalSearch = globalSearchInput.value.trim();
+    if (globalSearch) params.set("q", globalSearch);
+    if (filters.bidNumber) params.set("bid_number", filters.bidNumber);
+    if (filters.items) params.set("items", filters.items);
+    if (filters.quantityCondition) params.set("quantity", filters.quantityCondition);
+    if (filters.department) params.set("department", filters.department);
+    if (filters.startDate) params.set("start_date", filters.startDate);
+    if (filters.endDate) params.set("end_date", filters.endDate);
+    if (sortColumn) {
+        params.set("sort", sortColumn);
+        params.set("order", sortOrder);
+    }
+    return params.toString();
 }
 
-function applyFilters() {
-    const globalSearch = globalSearchInput.value.trim().toLowerCase();
-
-    const filteredData = data.filter(row => {
-        if (globalSearch) {
-            const rowValues = Object.values(row).join(" ").toLowerCase();
-            if (!rowValues.includes(globalSearch)) return false;
-        }
-
-        if (filters.bidNumber && !row["Bid Number"].toString().toLowerCase().includes(filters.bidNumber.toLowerCase())) return false;
-
-        if (filters.items) {
-            const itemKeywords = filters.items.toLowerCase().split(/\s+/);
-            const itemContent = row["Items"].toString().toLowerCase();
-            const matchesItem = itemKeywords.some(keyword => itemContent.includes(keyword));
-            if (!matchesItem) return false;
-        }
-
-        if (filters.quantityCondition) {
-            const quantity = row["Quantity"];
-            const [operator, value] = filters.quantityCondition.split(/([<>]=?)/).filter(Boolean);
-            const numericValue = parseInt(value);
-            if (operator === '>' && quantity <= numericValue) return false;
-            if (operator === '<' && quantity >= numericValue) return false;
-            if (operator === '=' && quantity !== numericValue) return false;
-        }
-
-        if (filters.department && !row["Department"].toString().toLowerCase().includes(filters.department.toLowerCase())) return false;
-
-        const rowStartDate = parseCustomDate(row["Start Date"]);
-        const rowEndDate = parseCustomDate(row["End Date"]);
-
-        if (filters.startDate && !filters.endDate) {
-            const filterStart = new Date(filters.startDate);
-            if (rowStartDate < filterStart) return false;
-        }
-
-        if (!filters.startDate && filters.endDate) {
-            const filterEnd = new Date(filters.endDate);
-            if (rowEndDate > filterEnd) return false;
-        }
-
-        if (filters.startDate && filters.endDate) {
-            const filterStart = new Date(filters.startDate);
-            const filterEnd = new Date(filters.endDate);
-            if (rowStartDate < filterStart || rowEndDate > filterEnd) return false;
-        }
-
-        return true;
-    });
-
-    return filteredData;
+// Filters changed: go back to page 1, waiting until typing pauses
+let reloadTimer = null;
+function scheduleReload() {
+    clearTimeout(reloadTimer);
+    reloadTimer = setTimeout(() => {
+        curr = 1;
+        currentWindowStart = 1;
+        showPage(1);
+    }, 250);
 }
 
 // Date input listeners
 document.getElementById('start-date').addEventListener('change', (e) => {
     filters.startDate = e.target.value;
-    showPage(currentPage);
+    scheduleReload();
 });
 
 document.getElementById('end-date').addEventListener('change', (e) => {
     filters.endDate = e.target.value;
-    showPage(currentPage);
+    scheduleReload();
 });
 
 
@@ -185,7 +144,7 @@ let currentWindowStart = 1;
 const windowSize = 10;
 
 function createPagination() {
-    const totalPages = Math.ceil(data.length / rowsPerPage);
+    const totalPages = pageInfo.pages;
     paginationControls.innerHTML = '';
 
     const windowEnd = Math.min(currentWindowStart + windowSize - 1, totalPages);
@@ -230,12 +189,49 @@ function createPagination() {
 }
 
 
-function showPage(page) {
+// Context rows of the visible page, fetched in one request after each render.
+// Only found rows are kept: a bid still being extracted is asked for again on click.
+const contextCache = new Map();
+
+function formatContext(row) {
+    return Object.entries(row)
+        .map(([key, value]) => `<strong>${key}:</strong> ${value}`)
+        .join('<br>');
+}
+
+function prefetchContext(bids) {
+    const missing = bids.filter(bid => bid && !contextCache.has(bid));
+    if (!missing.length) return;
+    fetch('/context_data/batch', {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify({ bids: missing })
+    })
+    .then(response => response.json())
+    .then(data => {
+        if (data.status !== "success") return;
+        Object.entries(data.rows).forEach(([bid, row]) => {
+            if (row) contextCache.set(bid, row);
+        });
+    })
+    .catch(error => console.warn("Context prefetch failed:", error));
+}
+
+async function showPage(page) {
     currentPage = page;
-    const filteredData = applyFilters();
-    const start = (currentPage - 1) * rowsPerPage;
-    const end = start + rowsPerPage;
-    const pageData = filteredData.slice(start, end);
+    let pageData = [];
+    try {
+        const res = await fetch(`/data?${dataQuery(page)}`);
+        const dataJson = await res.json();
+        if (dataJson.error) throw new Error(dataJson.error);
+        pageData = dataJson.data;
+        pageInfo = { total: dataJson.total, pages: dataJson.pages };
+    } catch (err) {
+        message.className = "alert alert-danger mt-3";
+        message.textContent = `Error: ${err.message}`;
+        message.classList.remove('d-none');
+    }
+    createPagination();
     tableBody.innerHTML = '';
 
     pageData.forEach(row => {
@@ -247,13 +243,15 @@ function showPage(page) {
             <td>${row["Department"]}</td>
             <td>${row["Start Date"]}</td>
             <td>${row["End Date"]}</td>
+            <td title="${row["Profile"]}">${row["Relevance"]}</td>
             <td>
-                <a href="${row["Downloadable File URL"]}" class="btn btn-sm btn-outline-primary download-link">
+                <a href="${row["Downloadable File URL"]}" class="btn btn-sm btn-outline-primary download-link" data-bid="${row["Bid Number"]}">
                     <img src="/static/icon.jpg" alt="Chat Icon" style="width: 45px; height: 40px;">
                 </a>
             </td>
             <td>
             <button class="btn btn-sm btn-outline-secondary context-btn" data-bid="${row["Bid Number"]}">Context</button>
+            <button class="btn btn-sm btn-outline-secondary ask-btn" data-bid="${row["Bid Number"]}" title="Ask about this bid's documents without downloading again">Ask</button>
             </td>
 
         `;
@@ -265,6 +263,7 @@ function showPage(page) {
             event.preventDefault();
     
             const originalUrl = link.getAttribute('href');
+            selectBid(link.getAttribute('data-bid'));
             const encodedUrl = encodeURIComponent(originalUrl);
             const flaskDownloadUrl = `/download?url=${encodedUrl}`;
     
@@ -282,6 +281,16 @@ function showPage(page) {
             }, 1500);
         });
     });
+   // Switch the question context to an already downloaded bid; no /download round trip
+   document.querySelectorAll('.ask-btn').forEach(button => {
+    button.addEventListener('click', function () {
+        selectBid(button.getAttribute('data-bid'));
+        openAiPopup();
+    });
+   });
+
+   prefetchContext(pageData.map(row => row["Bid Number"]));
+
    //contect button code snippet
    document.querySelectorAll('.context-btn').forEach(button => {
     button.addEventListener('click', function () {
@@ -291,6 +300,12 @@ function showPage(page) {
             return;
         }
 
+        const cached = contextCache.get(bidNumber);
+        if (cached) {
+            openContextPopup(formatContext(cached));
+            return;
+        }
+
         console.log("Fetching context for Bid Number:", bidNumber);
 
         fetch(`/context_data?bid=${encodeURIComponent(bidNumber)}`)
@@ -304,10 +319,8 @@ function showPage(page) {
                 console.log("Context response:", data);
 
                 if (data && data.status === "success" && data.row) {
-                    const content = Object.entries(data.row)
-                        .map(([key, value]) => `<strong>${key}:</strong> ${value}`)
-                        .join('<br>');
-                    openContextPopup(content);
+                    contextCache.set(bidNumber, data.row);
+                    openContextPopup(formatContext(data.row));
                 } else {
                     openContextPopup("Processing... please wait.");
                 }
@@ -324,85 +337,63 @@ function showPage(page) {
 
 document.getElementById('quantity-filter').addEventListener('input', (e) => {
     filters.quantityCondition = e.target.value;
-    showPage(currentPage);
+    scheduleReload();
 });
 document.getElementById('items-filter').addEventListener('input', (e) => {
     filters.items = e.target.value;
-    showPage(currentPage);
+    scheduleReload();
 });
 document.getElementById('bids-filter').addEventListener('input', (e) => {
     filters.bidNumber = e.target.value;
-    showPage(currentPage);
+    scheduleReload();
 });document.getElementById('department-filter').addEventListener('input', (e) => {
     filters.department = e.target.value;
-    showPage(currentPage);
+    scheduleReload();
 });
 
-document.querySelectorAll('#results-table thead input').forEach(input => {
-    input.addEventListener('input', () => {
-        const column = input.getAttribute('data-col');
-        const value = input.value;
-        filters[column] = value;
-        showPage(currentPage);
+// Click a column title to sort by it; click again to reverse
+const sortColumns = ["bid_number", "items", "quantity", "department", "start_date", "end_date", "relevance"];
+document.querySelectorAll('#results-table thead .filter-btn').forEach(header => {
+    header.style.cursor = 'pointer';
+    header.addEventListener('click', () => {
+        const column = sortColumns[parseInt(header.getAttribute('data-col'))];
+        sortOrder = (sortColumn === column && sortOrder === "asc") ? "desc" : "asc";
+        sortColumn = column;
+        scheduleReload();
     });
 });
 
-document.getElementById('start-date').addEventListener('change', (e) => {
-    filters.startDate = e.target.value;
-    showPage(currentPage);
-});
-
-document.getElementById('end-date').addEventListener('change', (e) => {
-    filters.endDate = e.target.value;
-    showPage(currentPage);
-});
-
 rowsPerPageSelect.addEventListener('change', (e) => {
     rowsPerPage = parseInt(e.target.value);
-    showPage(currentPage);
-    createPagination();
+    scheduleReload();
 });
 
 globalSearchInput.addEventListener('input', () => {
-    currentPage = 1;
-    createPagination();
-    applyFilters()
-    showPage(currentPage);
+    scheduleReload();
 });
 
 document.getElementById('downloadFiltered').addEventListener('click', function () {
-    const filteredData = applyFilters();
-
-    if (!filteredData || filteredData.length === 0) {
+    if (!pageInfo.total) {
         alert("No data available to download.");
         return;
     }
 
-    const headers = Object.keys(filteredData[0]);
-    const csvRows = [headers.join(',')];
-
-    filteredData.forEach(row => {
-        const values = headers.map(header => {
-            const cell = String(row[header] ?? "").replace(/"/g, '""');
-            return `"${cell}"`;
-        });
-        csvRows.push(values.join(','));
-    });
-
-    const csvContent = csvRows.join('\n');
-    const blob = new Blob([csvContent], { type: 'text/csv;charset=utf-8;' });
-    const url = URL.createObjectURL(blob);
-
+    // The server builds the CSV from every row matching the current filters
     const a = document.createElement("a");
-    a.href = url;
+    a.href = `/data/export?${dataQuery(1)}`;
     a.download = "filtered_bid_results.csv";
     document.body.appendChild(a);
     a.click();
     document.body.removeChild(a);
-    URL.revokeObjectURL(url);
 });
 
 
+// Bid whose documents /ask_question/stream searches
+function selectBid(bid) {
+    currentBid = bid;
+    document.getElementById("question-bid").textContent = bid ? ` about ${bid}` : "";
+}
+
 function openAiPopup() {
     const aiPopup = document.getElementById("ai-agent-popup");
     const statusMessage = document.getElementById("status-message");
@@ -418,23 +409,56 @@ document.getElementById("query-form-popup").addEventListener("submit", function(
 
     const question = document.getElementById("question_popup").value;
 
-    fetch('/ask_question', {
+    const answerBox = document.getElementById("popup-answer");
+    answerBox.innerText = "Searching the document...";
+
+    // Streamed answer: sources arrive first, then tokens as the model writes them
+    fetch('/ask_question/stream', {
         method: 'POST',
         headers: {
             'Content-Type': 'application/json'
         },
-        body: JSON.stringify({ question: question })
+        body: JSON.stringify({ question: question, bid: currentBid, hide_reasoning: true })
     })
-    .then(response => response.json())
-    .then(data => {
-        if (data.success) {
-            document.getElementById("popup-answer").innerText = "Answer: " + data.answer;
-        } else {
-            document.getElementById("popup-answer").innerText = "Error: " + data.error;
+    .then(response => {
+        if (!response.ok || !response.body) {
+            return response.json().then(data => { throw new Error(data.error || response.statusText); });
+        }
+        const reader = response.body.getReader();
+        const decoder = new TextDecoder();
+        let buffer = "";
+        let answer = "";
+
+        function handleAnswerEvent(event) {
+            if (event.type === "sources") {
+                answerBox.innerText = `Found ${event.sources.length} relevant passages. Thinking...`;
+            } else if (event.type === "reasoning") {
+                answerBox.innerText = event.state === "started" ? "Reasoning..." : "Answer: ";
+            } else if (event.type === "token") {
+                answer += event.text;
+                answerBox.innerText = "Answer: " + answer;
+            } else if (event.type === "error") {
+                answerBox.innerText = "Error: " + event.error;
+            }
+        }
+
+        function read() {
+            return reader.read().then(({ done, value }) => {
+                if (done) return;
+                buffer += decoder.decode(value, { stream: true });
+                const messages = buffer.split("\n\n");
+                buffer = messages.pop();
+                messages.forEach(message => {
+                    const dataLine = message.split("\n").find(line => line.startsWith("data: "));
+                    if (dataLine) handleAnswerEvent(JSON.parse(dataLine.slice(6)));
+                });
+                return read();
+            });
         }
+        return read();
     })
     .catch(error => {
-        document.getElementById("popup-answer").innerText = "Error occurred: " + error.message;
+        answerBox.innerText = "Error occurred: " + error.message;
     });
 });
 
@@ -0,0 +1,146 @@
+import os
+import re
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from langchain.text_splitter import RecursiveCharacterTextSplitter
+
+# Map-reduce summarizer: chunk summaries run concurrently (capped), summaries
+# are combined in a tree so no prompt outgrows the model context, and chunk
+# summaries are cached on disk by content hash. deepseek-r1's <think> blocks
+# are dropped from every summary before it is cached or combined.
+SUMMARY_CONCURRENCY = int(os.environ.get("SUMMARY_CONCURRENCY", "4"))
+SUMMARY_CACHE_DIR = os.environ.get("SUMMARY_CACHE_DIR", "summary_cache")
+MAX_COMBINE_CHARS = 6000  # largest block of summaries sent in one combine prompt
+MAX_REDUCE_LEVELS = 8  # guard against summaries that never get shorter
+PROMPT_VERSION = "v1"  # bump when prompts change so cached summaries are not reused
+
+MAP_PROMPT = "Summarize this part of a document:\n\n{text}\n\nSummary:"
+REDUCE_PROMPT = "Summarize the following combined summaries into a cohesive document summary:\n\n{text}"
+# Same pattern the extraction answers are cleaned with; an unclosed block is a cut-off answer
+THINK_BLOCK = re.compile(r"<think>.*?(?:</think>|$)", re.DOTALL)
+
+
+def strip_think(text):
+    return THINK_BLOCK.sub("", text).strip()
+
+
+class SummaryCache:
+    def __init__(self, root=SUMMARY_CACHE_DIR):
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+
+    def key(self, model, prompt_kind, text):
+        raw = "\0".join([PROMPT_VERSION, model, prompt_kind, text])
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def get(self, key):
+        path = os.path.join(self.root, key[:2], key + ".txt")
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                return f.read()
+        return None
+
+    def put(self, key, summary):
+        path = os.path.join(self.root, key[:2], key + ".txt")
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(summary)
+        os.replace(tmp_path, path)
+
+
+class MapReduceSummarizer:
+    def __init__(self, llm, model_name, concurrency=SUMMARY_CONCURRENCY,
+                 max_combine_chars=MAX_COMBINE_CHARS, cache=None):
+        self.llm = llm
+        self.model_name = model_name
+        self.concurrency = concurrency
+        self.max_combine_chars = max_combine_chars
+        self.cache = cache or SummaryCache()
+        self.hits = 0
+        self.misses = 0
+
+    def _invoke(self, prompt_kind, template, text):
+        key = self.cache.key(self.model_name, prompt_kind, text)
+        cached = self.cache.get(key)
+        if cached is not None:
+            self.hits += 1
+            return strip_think(cached)
+        self.misses += 1
+        summary = strip_think(str(self.llm.invoke(template.format(text=text))))
+        self.cache.put(key, summary)
+        return summary
+
+    def _map(self, prompt_kind, template, texts, check_cancelled=None):
+        def run(text):
+            # Checked before every LLM call so a superseded document stops within one call
+            if check_cancelled:
+                check_cancelled()
+            return self._invoke(prompt_kind, template, text)
+
+        with ThreadPoolExecutor(max_workers=max(1, min(self.concurrency, len(texts)))) as executor:
+            return list(executor.map(run, texts))
+
+    def split(self, summary):
+        """A summary cut at paragraph/sentence boundaries into pieces of at most
+        half of max_combine_chars, so any two pieces fit in one combine prompt."""
+        limit = (self.max_combine_chars - 1) // 2
+        if len(summary) <= limit:
+            return [summary]
+        return split_for_summary(summary, chunk_size=limit, overlap=0)
+
+    def group(self, summaries):
+        """Pack consecutive summaries into blocks of at most max_combine_chars."""
+        groups, current, size = [], [], 0
+        for summary in summaries:
+            if current and size + len(summary) > self.max_combine_chars:
+                groups.append(current)
+                current, size = [], 0
+            current.append(summary)
+            size += len(summary) + 1
+        if current:
+            groups.append(current)
+        return groups
+
+    def reduce(self, summaries, check_cancelled=None):
+        """Combine level by level until one summary is left.
+
+        Every combine prompt holds at most max_combine_chars of summaries.
+        """
+        level = 0
+        while len(summaries) > 1 and level < MAX_REDUCE_LEVELS:
+            groups = self.group([piece for summary in summaries for piece in self.split(summary)])
+            level += 1
+            print(f"🌲 Reduce level {level}: {len(summaries)} summaries -> {len(groups)}")
+            summaries = self._map("reduce", REDUCE_PROMPT, ["\n".join(g) for g in groups], check_cancelled)
+        if len(summaries) > 1:
+            # The model is not shortening its summaries; give each an equal share of one last prompt
+            share = max(1, (self.max_combine_chars + 1) // len(summaries) - 1)
+            print(f"⚠️ Summaries did not converge after {level} levels; truncating {len(summaries)} to {share} chars each")
+            text = "\n".join(summary[:share] for summary in summaries)
+            return self._map("reduce", REDUCE_PROMPT, [text], check_cancelled)[0]
+        return summaries[0] if summaries else ""
+
+    def summarize(self, chunks, check_cancelled=None):
+        """Returns (final_summary, chunk_summaries).
+
+        check_cancelled is called before each LLM call and may raise to stop
+        the summary (e.g. Job.check_cancelled).
+        """
+        chunk_summaries = self._map("map", MAP_PROMPT, chunks, check_cancelled)
+        if len(chunk_summaries) == 1:
+            final = self._map("reduce", REDUCE_PROMPT, chunk_summaries, check_cancelled)[0]
+        else:
+            final = self.reduce(chunk_summaries, check_cancelled)
+        print(f"🗃️ Summary cache: {self.hits} hits, {self.misses} misses")
+        return final, chunk_summaries
+
+
+def split_for_summary(full_text, chunk_size=3000, overlap=350):
+    splitter = RecursiveCharacterTextSplitter(
+        chunk_size=chunk_size,
+        chunk_overlap=overlap,
+        separators=["\n\n", "\n", ".", " "]
+    )
+    return splitter.split_text(full_text)
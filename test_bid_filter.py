@@ -0,0 +1,113 @@
+import threading
+import pytest
+from bid_store import BidStore
+from bid_filter import BidFilter, keyword_filter_key
+
+
+def row(bid, items):
+    return {"Bid Number": bid, "Items": items, "Quantity": "1", "Department": "MeitY",
+            "Start Date": "01-05-2025 10:00 AM", "End Date": "22-05-2025 06:00 PM",
+            "Downloadable File URL": f"https://bidplus.gem.gov.in/showbidDocument/{bid[-3:]}"}
+
+
+class FakeScorer:
+    def __init__(self, threshold=0.5, fail=False, fingerprint="relevance:test"):
+        self.threshold = threshold
+        self.fail = fail
+        self._fingerprint = fingerprint
+        self.scored = []
+
+    def score_rows(self, rows):
+        if self.fail:
+            raise RuntimeError("embedding backend down")
+        self.scored += [r["Bid Number"] for r in rows]
+        return [{"score": 0.9 if "software" in r["Items"].lower() else 0.1, "profile": "Software development"}
+                for r in rows]
+
+    def is_relevant(self, result):
+        return result["score"] >= self.threshold
+
+    def fingerprint(self):
+        return self._fingerprint
+
+
+@pytest.fixture
+def store(tmp_path):
+    return BidStore(str(tmp_path / "bids.sqlite"))
+
+
+def relevance_filter(store, scorer, run_id=None):
+    bid_filter = BidFilter(run_id or store.start_run(["software"]), store, mode="keywords")
+    bid_filter.mode, bid_filter.scorer = "relevance", scorer
+    bid_filter.filter_key = scorer.fingerprint()
+    bid_filter.decisions = store.filter_decisions(bid_filter.filter_key)
+    return bid_filter
+
+
+def test_keyword_mode_dedups_and_hands_on_matches(store):
+    handed = []
+    bid_filter = BidFilter(store.start_run(["software"]), store, on_match=handed.append, mode="keywords")
+    page = [row("GEM/2025/B/101", "Custom Software Development"), row("GEM/2025/B/102", "Office chairs"),
+            row("GEM/2025/B/101", "Custom Software Development")]
+    matched = bid_filter.process(page)
+    assert [r["Bid Number"] for r in matched] == ["GEM/2025/B/101"]
+    assert handed == matched
+    assert bid_filter.stats == {"scraped": 3, "duplicates": 1, "new": 2, "matched": 1}
+    assert store.filter_decisions(keyword_filter_key(["software"])) == {}
+    assert len(store.filter_decisions(bid_filter.filter_key)) == 2
+
+
+def test_decisions_are_reused_for_the_same_setup(store):
+    scorer = FakeScorer()
+    relevance_filter(store, scorer).process([row("GEM/2025/B/101", "Software")])
+    relevance_filter(store, scorer).process([row("GEM/2025/B/101", "Software")])
+    assert scorer.scored == ["GEM/2025/B/101"]
+
+
+def test_changed_setup_rescores_seen_bids(store):
+    relevance_filter(store, FakeScorer()).process([row("GEM/2025/B/101", "Software")])
+    stricter = FakeScorer(threshold=0.95, fingerprint="relevance:stricter")
+    matched = relevance_filter(store, stricter).process([row("GEM/2025/B/101", "Software")])
+    assert stricter.scored == ["GEM/2025/B/101"]
+    assert matched == []
+    assert store.matched_bids() == []
+
+
+def test_fallback_decisions_are_not_final(store):
+    matched = relevance_filter(store, FakeScorer(fail=True)).process([row("GEM/2025/B/101", "Software")])
+    assert len(matched) == 1  # keyword match stood in for the scorer
+    scorer = FakeScorer()
+    relevance_filter(store, scorer).process([row("GEM/2025/B/101", "Software")])
+    assert scorer.scored == ["GEM/2025/B/101"]
+
+
+def test_matched_bids_always_have_relevance_columns(store):
+    run_id = store.start_run(["software"])
+    relevance_filter(store, FakeScorer(), run_id).process([row("GEM/2025/B/101", "Software")])
+    BidFilter(run_id, store, mode="keywords").process([row("GEM/2025/B/102", "Software licences")])
+    rows = store.matched_bids()
+    assert [r["Bid Number"] for r in rows] == ["GEM/2025/B/101", "GEM/2025/B/102"]
+    assert rows[0]["Relevance"] == 0.9 and rows[0]["Profile"] == "Software development"
+    assert rows[1]["Relevance"] == "" and rows[1]["Profile"] == ""
+    assert list(rows[0]) == list(rows[1])
+
+
+def test_pages_are_scored_outside_the_lock(store):
+    # Both pages must be inside score_rows at once, or the barrier times out
+    barrier = threading.Barrier(2, timeout=5)
+
+    class ConcurrentScorer(FakeScorer):
+        def score_rows(self, rows):
+            barrier.wait()
+            return super().score_rows(rows)
+
+    bid_filter = relevance_filter(store, ConcurrentScorer())
+    threads = [threading.Thread(target=bid_filter.process, args=([row(bid, "Software")],))
+               for bid in ("GEM/2025/B/101", "GEM/2025/B/102")]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert not barrier.broken
+    assert bid_filter.stats == {"scraped": 2, "duplicates": 0, "new": 2, "matched": 2}
+    assert len(store.matched_bids()) == 2
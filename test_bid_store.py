@@ -0,0 +1,76 @@
+import csv
+import os
+import pytest
+from bid_store import BidStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    return BidStore(str(tmp_path / "bids.sqlite"))
+
+
+def row(bid, items="Custom Software Development", url="https://bidplus.gem.gov.in/showbidDocument/7830687"):
+    return {"Bid Number": bid, "Items": items, "Quantity": "1", "Department": "MeitY",
+            "Start Date": "01-05-2025 10:00 AM", "End Date": "22-05-2025 06:00 PM", "Downloadable File URL": url}
+
+
+def write_csv(path, rows):
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=list(rows[0]))
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def test_runs_and_upserts(store):
+    first = store.start_run(["software"])
+    assert store.upsert_bids([row(" gem/2025/b/101 "), row("NOT FOUND"), row("")], run_id=first) == 1
+    second = store.start_run(["software"])
+    assert store.latest_run() == second > first
+    store.upsert_bids([row("GEM/2025/B/101", items="Updated items")], run_id=second, matched={"GEM/2025/B/101": True})
+    rows = store.matched_bids()
+    assert [(r["Bid Number"], r["Items"]) for r in rows] == [("GEM/2025/B/101", "Updated items")]
+    assert store.matched_bids(first) == []
+
+
+def test_record_download(store):
+    run_id = store.start_run(["software"])
+    store.upsert_bids([row("GEM/2025/B/101"), row("GEM/2025/B/102", url="")], run_id=run_id,
+                      matched={"GEM/2025/B/101": True, "GEM/2025/B/102": True})
+    before = store.version("bids")
+    store.record_download("gem/2025/b/101", "https://bidplus.gem.gov.in/showbidDocument/7830687", error="timed out")
+    assert store.version("bids") > before
+    rows = {r["Bid Number"]: r for r in store.matched_bids()}
+    assert rows["GEM/2025/B/101"]["Downloaded Filename"] == "ERROR: timed out"
+    assert rows["GEM/2025/B/102"]["Downloaded Filename"] == "No URL"
+
+    store.record_download("GEM/2025/B/101", "https://bidplus.gem.gov.in/showbidDocument/7830687",
+                          filename="GeM-Bidding-7830687.pdf")
+    rows = {r["Bid Number"]: r for r in store.matched_bids()}
+    assert rows["GEM/2025/B/101"]["Downloaded Filename"] == "GeM-Bidding-7830687.pdf"
+    assert store.find_by_document("downloads/GeM-Bidding-7830687.pdf")["bid_number"] == "GEM/2025/B/101"
+
+
+def test_legacy_import_runs_once(store, tmp_path):
+    filtered = tmp_path / "filtered_bid_results.csv"
+    results = tmp_path / "final_bid_results.csv"
+    extracted = tmp_path / "final_extracted_data.csv"
+    write_csv(filtered, [{**row("GEM/2025/B/101"), "Downloaded Filename": "7830687.pdf"},
+                         {**row("GEM/2025/B/102"), "Downloaded Filename": "ERROR: 404"}])
+    fields = {"Ministry Name": "MeitY", "Downloaded Filename": "7830687.pdf", "EMD Amount": "49,000",
+              "Type of Bid": "Two Packet Bid", "Estimated Bid Value": "0", "Minimum Average Annual Turnover": "3"}
+    write_csv(results, [{"Bid Number": "GEM/2025/B/101", **fields}, {"Bid Number": "GEM/2025/B/103", **fields}])
+    write_csv(extracted, [{"Bid Number": "GEM/2025/B/101", **fields, "EMD Amount": "50,000"}])
+    paths = {"filtered_csv": str(filtered), "extracted_csvs": (str(results), str(extracted))}
+
+    assert store.import_legacy_once(**paths) == [str(filtered), str(results), str(extracted)]
+    rows = {r["Bid Number"]: r for r in store.matched_bids()}
+    assert rows["GEM/2025/B/101"]["Downloaded Filename"] == "7830687.pdf"
+    assert rows["GEM/2025/B/102"]["Downloaded Filename"] == "ERROR: 404"
+    # The extractor's CSV is newer than the static results copy
+    assert store.get_extracted("GEM/2025/B/101")["EMD Amount"] == "50,000"
+    assert store.get_extracted("GEM/2025/B/103")["Type of Bid"] == "Two Packet Bid"
+    assert not filtered.exists() and os.path.exists(str(filtered) + ".imported")
+
+    write_csv(filtered, [{**row("GEM/2025/B/104"), "Downloaded Filename": ""}])
+    assert store.import_legacy_once(**paths) == []
+    assert filtered.exists()
@@ -0,0 +1,70 @@
+import csv
+import io
+import pytest
+from bid_store import BidStore
+from bid_table import BidTable, ContextIndex
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = BidStore(str(tmp_path / "bids.sqlite"))
+    run_id = store.start_run(["software"])
+    rows = [
+        {"Bid Number": "GEM/2025/B/101", "Items": "Custom Software Development", "Quantity": "1",
+         "Department": "Ministry of Defence", "Start Date": "01-05-2025 10:00 AM", "End Date": "22-05-2025 06:00 PM",
+         "Downloadable File URL": "https://bidplus.gem.gov.in/showbidDocument/101"},
+        {"Bid Number": "GEM/2025/B/102", "Items": "Web Development Services", "Quantity": "400",
+         "Department": "Ministry of Railways", "Start Date": "03-05-2025 11:30 AM", "End Date": "30-05-2025 03:00 PM",
+         "Downloadable File URL": "https://bidplus.gem.gov.in/showbidDocument/102"},
+        {"Bid Number": "GEM/2025/B/103", "Items": "Mobile Application Development", "Quantity": "25",
+         "Department": "Ministry of Defence", "Start Date": "", "End Date": "",
+         "Downloadable File URL": ""},
+    ]
+    store.upsert_bids(rows, run_id=run_id, matched={r["Bid Number"]: True for r in rows})
+    store.set_relevance({"GEM/2025/B/102": (0.8, "Software development")})
+    return store
+
+
+def bids(result):
+    return [r["Bid Number"] for r in result["data"]]
+
+
+def test_filters(store):
+    table = BidTable(store)
+    assert bids(table.query({"department": "defence"})) == ["GEM/2025/B/101", "GEM/2025/B/103"]
+    assert bids(table.query({"quantity": ">20"})) == ["GEM/2025/B/102", "GEM/2025/B/103"]
+    assert bids(table.query({"items": "web mobile"})) == ["GEM/2025/B/102", "GEM/2025/B/103"]
+    assert bids(table.query({"q": "railways"})) == ["GEM/2025/B/102"]
+    # Rows without a parseable date are kept by date filters
+    assert bids(table.query({"start_date": "2025-05-02"})) == ["GEM/2025/B/102", "GEM/2025/B/103"]
+
+
+def test_sort_and_page(store):
+    table = BidTable(store)
+    result = table.query({"sort": "quantity", "order": "desc", "page": "2", "page_size": "2"})
+    assert bids(result) == ["GEM/2025/B/101"]
+    assert (result["total"], result["pages"]) == (3, 2)
+    assert bids(table.query({"sort": "relevance", "order": "desc"}))[0] == "GEM/2025/B/102"
+
+
+def test_reloads_when_store_changes(store):
+    table = BidTable(store)
+    assert table.query({})["total"] == 3
+    store.set_matched({"GEM/2025/B/103": False})
+    assert table.query({})["total"] == 2
+
+
+def test_export_mixed_scored_and_unscored_rows(store):
+    rows = BidTable(store).export({})
+    output = io.StringIO()
+    writer = csv.DictWriter(output, fieldnames=list(rows[0]))
+    writer.writeheader()
+    writer.writerows(rows)
+    assert len(output.getvalue().splitlines()) == 4
+
+
+def test_context_index(store):
+    store.upsert_extracted({"Bid Number": "gem/2025/b/101", "EMD Amount": "49000"})
+    index = ContextIndex(store)
+    assert index.get(" GEM/2025/B/101 ")["EMD Amount"] == "49000"
+    assert index.get_many(["GEM/2025/B/102"]) == {"GEM/2025/B/102": None}
@@ -0,0 +1,57 @@
+import pytest
+
+pytest.importorskip("faiss")
+pytest.importorskip("langchain_community")
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_community.vectorstores import FAISS
+from corpus_index import CorpusIndex, normalize_bids
+
+VOCABULARY = ["emd", "turnover", "delivery", "software", "chairs"]
+
+
+class WordCountEmbeddings(Embeddings):
+    """Deterministic toy embedding: one dimension per vocabulary word."""
+
+    def embed_documents(self, texts):
+        return [self.embed_query(t) for t in texts]
+
+    def embed_query(self, text):
+        words = text.lower().split()
+        return [float(words.count(w)) for w in VOCABULARY]
+
+
+def add_bid(corpus, embedding, doc_id, bid, texts):
+    docs = [Document(page_content=t, metadata={"bid_number": bid, "doc_id": doc_id}) for t in texts]
+    doc_store = FAISS.from_documents(docs, embedding, ids=[f"{doc_id}:{i}" for i in range(len(docs))])
+    corpus.add_document_index(doc_id, doc_store)
+
+
+def test_bid_search_only_returns_that_bids_chunks(tmp_path):
+    embedding = WordCountEmbeddings()
+    corpus = CorpusIndex(embedding, path=str(tmp_path / "corpus"))
+    # Many other bids whose chunks are all closer to the question than bid 1's
+    for n in range(2, 40):
+        add_bid(corpus, embedding, f"doc{n}", f"GEM/2025/B/{n}", ["emd emd emd"] * 5)
+    add_bid(corpus, embedding, "doc1", "GEM/2025/B/1", ["emd software delivery", "chairs"])
+
+    docs = corpus.search("emd", bids="gem/2025/b/1", k=5)
+    assert {d.metadata["bid_number"] for d in docs} == {"GEM/2025/B/1"}
+    assert docs[0].page_content == "emd software delivery"
+    assert corpus.as_retriever(bids=["GEM/2025/B/999"]) is None
+    assert len(corpus.search("emd", k=3)) == 3
+
+
+def test_reindexed_document_replaces_its_chunks(tmp_path):
+    embedding = WordCountEmbeddings()
+    corpus = CorpusIndex(embedding, path=str(tmp_path / "corpus"))
+    add_bid(corpus, embedding, "doc1", "GEM/2025/B/1", ["old emd text"])
+    corpus.search("emd", bids="GEM/2025/B/1")
+    add_bid(corpus, embedding, "doc1", "GEM/2025/B/1", ["new emd text", "turnover"])
+    docs = corpus.search("emd", bids="GEM/2025/B/1", k=5)
+    assert sorted(d.page_content for d in docs) == ["new emd text", "turnover"]
+
+
+def test_normalize_bids():
+    assert normalize_bids(" gem/2025/b/1, GEM/2025/B/2 ,") == ["GEM/2025/B/1", "GEM/2025/B/2"]
+    assert normalize_bids(None) == []
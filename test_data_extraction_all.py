@@ -0,0 +1,106 @@
+import pytest
+
+for module in ("ollama", "langchain_ollama", "langchain_community", "fitz", "pdfplumber"):
+    pytest.importorskip(module)
+from data_extraction_all import normalize_answer, structured_answers
+
+FIELDS = ["EMD Amount", "Type of Bid", "Estimated Bid Value", "Minimum Average Annual Turnover"]
+
+
+def test_per_field_answers_are_cleaned():
+    assert normalize_answer("EMD Amount", "<think>EMD is listed in the table</think>\n**Answer:** 49,000") == "49,000"
+    assert normalize_answer("Estimated Bid Value", "Rs. 24,50,000 (approx)") == "Rs. 24,50,000"
+    assert normalize_answer("Type of Bid", "Two Packet Bid") == "Two Packet Bid"
+    assert normalize_answer("EMD Amount", "") == "0"
+    assert normalize_answer("Type of Bid", "") == "None"
+
+
+def test_structured_values_are_kept_as_written():
+    raw = {"emd_amount": "₹ 49,000", "type_of_bid": "Single", "estimated_bid_value": "",
+           "minimum_average_annual_turnover": " 10  Lakh "}
+    assert structured_answers(raw, FIELDS) == {
+        "EMD Amount": "₹ 49,000",
+        "Type of Bid": "Single",
+        "Estimated Bid Value": "0",
+        "Minimum Average Annual Turnover": "10 Lakh",
+    }
+    assert structured_answers({"type_of_bid": ""}, ["Type of Bid"]) == {"Type of Bid": "None"}
+
+
+@pytest.mark.parametrize("raw", [[], "49,000", {"emd_amount": 49000}, {}])
+def test_structured_answers_must_match_schema(raw):
+    with pytest.raises(ValueError):
+        structured_answers(raw, ["EMD Amount"])
+
+
+class StubEmbedder:
+    """Embeds each chunk as [hash]; records one call per batch."""
+
+    def __init__(self):
+        self.calls = []
+        self.cache = self
+
+    def embed_documents(self, texts):
+        self.calls.append(list(texts))
+        return [[float(hash(t) % 1000)] for t in texts]
+
+    def stats(self):
+        return {"hits": 0, "misses": 0, "entries": 0}
+
+
+def test_pipeline_skips_a_failing_pdf_and_extracts_the_rest(monkeypatch, tmp_path):
+    from concurrent.futures import ThreadPoolExecutor
+    from bid_store import BidStore
+    import data_extraction_all as extraction
+
+    store = BidStore(str(tmp_path / "bids.sqlite"))
+    names = ["101.pdf", "broken.pdf", "102.pdf", "rules.pdf", "103.pdf"]
+    jobs = []
+    for i, name in enumerate(names):
+        path = tmp_path / name
+        path.write_bytes(b"%PDF-stub")
+        jobs.append((f"GEM/2025/B/{100 + i}", "MeitY", name, str(path)))
+
+    def prepare(pdf_path):
+        name = pdf_path.rsplit("/", 1)[-1]
+        if name == "broken.pdf":
+            raise RuntimeError("PDF is encrypted")
+        if name == "rules.pdf":
+            return {field: "from rules" for field in FIELDS}, [], ""
+        return {"Type of Bid": "Two Packet Bid"}, ["EMD Amount"], f"Tender {name}. EMD amount for {name}."
+
+    retrievers = []
+
+    def build_retriever(chunks, vectors):
+        retrievers.append((chunks, vectors))
+        return chunks
+
+    def extract_fields(retriever, fields):
+        # The "LLM" reads the document name back out of its own chunks
+        return {field: retriever[0].split(".")[0].replace("Tender ", "EMD of ") for field in fields}
+
+    embedder = StubEmbedder()
+    monkeypatch.setattr(extraction, "ProcessPoolExecutor", ThreadPoolExecutor)
+    monkeypatch.setattr(extraction, "collect_jobs", lambda: jobs)
+    monkeypatch.setattr(extraction, "prepare_document", prepare)
+    monkeypatch.setattr(extraction, "get_store", lambda: store)
+    monkeypatch.setattr(extraction, "embedding_model", embedder)
+    monkeypatch.setattr(extraction, "build_retriever", build_retriever)
+    monkeypatch.setattr(extraction, "extract_document_fields", extract_fields)
+    monkeypatch.setattr(extraction, "EMBED_BATCH_DOCS", 2)
+
+    extraction.main()
+
+    rows = {row["Bid Number"]: row for row in store.all_extracted()}
+    assert sorted(rows) == ["GEM/2025/B/100", "GEM/2025/B/102", "GEM/2025/B/103", "GEM/2025/B/104"]
+    for bid, name in (("GEM/2025/B/100", "101"), ("GEM/2025/B/102", "102"), ("GEM/2025/B/104", "103")):
+        assert rows[bid]["EMD Amount"] == f"EMD of {name}"
+        assert rows[bid]["Type of Bid"] == "Two Packet Bid"  # rule value kept over the LLM answer
+    assert rows["GEM/2025/B/103"]["EMD Amount"] == "from rules"
+    # Three LLM documents in batches of two; every retriever got its own chunks and their vectors
+    assert [len(call) for call in embedder.calls] == [2, 1]
+    for chunks, vectors in retrievers:
+        assert len({chunk.split(".")[0] for chunk in chunks}) == 1
+        assert vectors == [[float(hash(c) % 1000)] for c in chunks]
+    # Extracted PDFs are deleted; the one that failed to parse is left for a retry
+    assert [p.name for p in tmp_path.glob("*.pdf")] == ["broken.pdf"]
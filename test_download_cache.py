@@ -0,0 +1,58 @@
+import json
+import os
+import pytest
+from download_cache import DownloadCache
+
+
+def put(cache, tmp_path, url, data):
+    part = cache.part_path(url)
+    with open(part, "wb") as f:
+        f.write(data)
+    return cache.store(url, part, etag='"e"')
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return DownloadCache(root=str(tmp_path / "cache"), max_bytes=250)
+
+
+def test_least_recently_used_objects_are_evicted(cache, tmp_path):
+    put(cache, tmp_path, "https://a", b"a" * 100)
+    put(cache, tmp_path, "https://b", b"b" * 100)
+    cache.touch("https://a")  # b is now the least recently used
+    put(cache, tmp_path, "https://c", b"c" * 100)
+    assert cache.lookup("https://a") and cache.lookup("https://c")
+    assert cache.lookup("https://b") is None
+
+
+def test_same_content_is_stored_once(cache, tmp_path):
+    sha = put(cache, tmp_path, "https://a", b"same")
+    assert put(cache, tmp_path, "https://mirror", b"same") == sha
+    assert len(cache._index["objects"]) == 1
+
+
+def test_cache_hits_do_not_rewrite_the_index_each_time(cache, tmp_path):
+    put(cache, tmp_path, "https://a", b"a")
+    before = os.path.getmtime(cache.index_path)
+    os.utime(cache.index_path, (before - 100, before - 100))
+    for _ in range(20):
+        cache.touch("https://a")
+    assert os.path.getmtime(cache.index_path) == before - 100
+    cache.flush()
+    with open(cache.index_path, encoding="utf-8") as f:
+        index = json.load(f)
+    assert index["objects"][cache.lookup("https://a")["sha256"]]["last_access"] == \
+        cache._index["objects"][cache.lookup("https://a")["sha256"]]["last_access"]
+
+
+def test_materialized_files_are_independent_copies(cache, tmp_path):
+    sha = put(cache, tmp_path, "https://a", b"%PDF-original")
+    dest = str(tmp_path / "work" / "bid.pdf")
+    cache.materialize(sha, dest)
+    with open(dest, "wb") as f:
+        f.write(b"edited in place")
+    with open(cache.object_path(sha), "rb") as f:
+        assert f.read() == b"%PDF-original"
+    cache.materialize(sha, dest)
+    with open(dest, "rb") as f:
+        assert f.read() == b"%PDF-original"
@@ -0,0 +1,108 @@
+import os
+import pytest
+
+pytest.importorskip("requests")
+from download_cache import DownloadCache, sha256_file
+from download_manager import DownloadManager
+
+
+class FakeResponse:
+    def __init__(self, status, body, headers=None):
+        self.status_code = status
+        self.body = body
+        self.headers = {"Content-Type": "application/pdf", **(headers or {})}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def raise_for_status(self):
+        pass
+
+    def iter_content(self, chunk_size):
+        yield self.body
+
+
+class FakeSession:
+    def __init__(self, responses):
+        self.responses = list(responses)
+        self.requests = []
+
+    def get(self, url, headers=None, **kwargs):
+        self.requests.append(headers or {})
+        return self.responses.pop(0)
+
+
+def manager_with(tmp_path, responses):
+    manager = DownloadManager(cache=DownloadCache(root=str(tmp_path / "cache")), backoff=0)
+    session = FakeSession(responses)
+    manager._session = lambda: session
+    return manager, session
+
+
+def start_partial(manager, url, data, validator):
+    with open(manager.cache.part_path(url), "wb") as f:
+        f.write(data)
+    manager.cache.set_part_validator(url, validator)
+
+
+def test_resume_sends_if_range_and_appends_on_206(tmp_path):
+    url = "https://bidplus.gem.gov.in/showbidDocument/7830687"
+    manager, session = manager_with(tmp_path, [FakeResponse(206, b"-rest", {"ETag": '"v1"'})])
+    start_partial(manager, url, b"%PDF-first", '"v1"')
+    entry, error = manager.fetch(url)
+    assert error is None
+    assert session.requests[0] == {"Range": "bytes=10-", "If-Range": '"v1"'}
+    with open(manager.cache.object_path(entry["sha256"]), "rb") as f:
+        assert f.read() == b"%PDF-first-rest"
+
+
+def test_changed_document_restarts_on_200(tmp_path):
+    url = "https://bidplus.gem.gov.in/showbidDocument/7830687"
+    manager, _ = manager_with(tmp_path, [FakeResponse(200, b"%PDF-new version", {"ETag": '"v2"'})])
+    start_partial(manager, url, b"%PDF-old", '"v1"')
+    entry, _ = manager.fetch(url)
+    with open(manager.cache.object_path(entry["sha256"]), "rb") as f:
+        assert f.read() == b"%PDF-new version"
+    assert manager.cache.part_validator(url) is None
+
+
+def test_partial_without_validator_is_discarded(tmp_path):
+    url = "https://bidplus.gem.gov.in/showbidDocument/7830687"
+    manager, session = manager_with(tmp_path, [FakeResponse(200, b"%PDF-full")])
+    start_partial(manager, url, b"%PDF-fu", None)
+    manager.fetch(url)
+    assert "Range" not in session.requests[0]
+
+
+def test_download_all_uses_the_shared_pool_and_drops_url_locks(tmp_path):
+    urls = [f"https://bidplus.gem.gov.in/showbidDocument/{n}" for n in range(5)]
+    manager, _ = manager_with(tmp_path, [FakeResponse(200, f"%PDF-{n}".encode()) for n in range(5)])
+    results = manager.download_all(urls + urls[:1], str(tmp_path / "out"))
+    assert sorted(results) == sorted(urls)
+    assert all(error is None for _, error in results.values())
+    executor = manager._executor
+    manager.download_all([], str(tmp_path / "out"))
+    assert manager._executor is executor
+    assert manager._url_locks == {}
+    assert sha256_file(str(tmp_path / "out" / "0.pdf")) == manager.cache.lookup(urls[0])["sha256"]
+
+
+def test_object_evicted_before_copy_is_downloaded_again(tmp_path):
+    url = "https://bidplus.gem.gov.in/showbidDocument/7830687"
+    manager, session = manager_with(tmp_path, [FakeResponse(200, b"%PDF-doc"), FakeResponse(200, b"%PDF-doc")])
+    fetch = manager.fetch
+
+    def fetch_then_evict(*args, **kwargs):
+        entry, error = fetch(*args, **kwargs)
+        if len(session.requests) == 1:
+            os.remove(manager.cache.object_path(entry["sha256"]))  # evicted by another download
+        return entry, error
+
+    manager.fetch = fetch_then_evict
+    filename, error = manager.download(url, str(tmp_path / "out"))
+    assert error is None and len(session.requests) == 2
+    with open(tmp_path / "out" / filename, "rb") as f:
+        assert f.read() == b"%PDF-doc"
@@ -0,0 +1,50 @@
+import threading
+import pytest
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("langchain_core")
+from embedding_cache import EmbeddingCache
+
+
+def vector_for(key):
+    # Each key's vector carries its own id, so a vector read from a reused slot is detectable
+    return [float(int(key[:4], 16)), 1.0, 2.0, 3.0]
+
+
+def test_round_trip_and_lru_eviction(tmp_path):
+    cache = EmbeddingCache("test-model", root=str(tmp_path), max_entries=4)
+    keys = [cache.key("doc", f"text {i}") for i in range(6)]
+    cache.put_many({k: vector_for(k) for k in keys[:4]})
+    assert cache.get_many(keys[:1])[keys[0]].tolist() == vector_for(keys[0])
+    cache.put_many({k: vector_for(k) for k in keys[4:]})
+    assert cache.evictions >= 2
+    found = cache.get_many(keys)
+    assert keys[4] in found and keys[5] in found
+    assert all(v.tolist() == vector_for(k) for k, v in found.items())
+
+
+@pytest.mark.parametrize("separate_reader", [False, True], ids=["threads", "processes"])
+def test_reads_never_see_a_reused_slot(tmp_path, separate_reader):
+    # A second instance has its own thread lock and lock-file handle, like another process
+    cache = EmbeddingCache("test-model", root=str(tmp_path), max_entries=8)
+    keys = [cache.key("doc", f"text {i}") for i in range(1000)]
+    cache.put_many({k: vector_for(k) for k in keys[:8]})
+    reader_cache = EmbeddingCache("test-model", root=str(tmp_path), max_entries=8) if separate_reader else cache
+    done = threading.Event()
+    wrong = []
+
+    def read():
+        while not done.is_set():
+            for key, vector in reader_cache.get_many(keys).items():
+                if vector.tolist() != vector_for(key):
+                    wrong.append(key)
+
+    reader = threading.Thread(target=read)
+    reader.start()
+    try:
+        for i in range(8, len(keys), 2):
+            cache.put_many({k: vector_for(k) for k in keys[i:i + 2]})
+    finally:
+        done.set()
+        reader.join()
+    assert wrong == []
@@ -0,0 +1,68 @@
+from field_rules import find_fields, match_value
+
+# Text lines as PyMuPDF renders the first page of a GeM bid document
+GEM_TEXT_LINES = [
+    "Bid Details/बिड विवरण",
+    "Bid End Date/Time/बिड बंद होने की तारीख/समय",
+    "22-05-2025 18:00:00",
+    "Bid Opening Date/Time/बिड खुलने की तारीख/समय",
+    "22-05-2025 18:30:00",
+    "Bid Offer Validity (From End Date)/बिड पेशकश वैधता (बंद होने की तारीख से)",
+    "90 (Days)",
+    "Ministry/State Name/मंत्रालय/राज्य का नाम",
+    "Ministry of Electronics and Information Technology",
+    "Minimum Average Annual Turnover of the bidder (For 3 Years)/बिडर का न्यूनतम औसत वार्षिक टर्नओवर (3 वर्षों के लिए)",
+    "10 Lakh (s)",
+    "Years of Past Experience Required for same/similar service/उसी/समान सेवा के लिए अपेक्षित विगत अनुभव के वर्ष",
+    "3 Year (s)",
+    "Type of Bid/बिड का प्रकार",
+    "Two Packet Bid",
+    "EMD Detail/ईएमडी विवरण",
+    "Required/आवश्यकता",
+    "Yes",
+    "EMD Amount/ईएमडी राशि",
+    "49000",
+]
+
+
+def test_label_suffix_digits_are_not_read_as_turnover():
+    found = find_fields([], GEM_TEXT_LINES)
+    assert found["Minimum Average Annual Turnover"] == ("10 Lakh", 0.8)
+
+
+def test_same_line_value_after_label_suffix():
+    line = ("Minimum Average Annual Turnover of the bidder (For 3 Years)/"
+            "बिडर का न्यूनतम औसत वार्षिक टर्नओवर (3 वर्षों के लिए) 10 Lakh (s)")
+    value, confidence = find_fields([], [line])["Minimum Average Annual Turnover"]
+    assert value == "10 Lakh"
+    assert confidence < 0.75  # left for the LLM to confirm
+
+
+def test_missing_field_does_not_borrow_neighbouring_numbers():
+    lines = ["Estimated Bid Value/अनुमानित बिड मूल्य"] + GEM_TEXT_LINES[5:7]
+    assert "Estimated Bid Value" not in find_fields([], lines)
+
+
+def test_table_cells_resolve_with_high_confidence():
+    rows = [
+        ("EMD Amount/ईएमडी राशि", "49000"),
+        ("Estimated Bid Value/अनुमानित बिड मूल्य", "24,50,000"),
+        ("Type of Bid/बिड का प्रकार", "Two Packet Bid"),
+        ("Minimum Average Annual Turnover of the bidder (For 3 Years)/बिडर का न्यूनतम औसत वार्षिक टर्नओवर (3 वर्षों के लिए)",
+         "10 Lakh (s)"),
+    ]
+    assert find_fields(rows, []) == {
+        "EMD Amount": ("49000", 0.95),
+        "Estimated Bid Value": ("24,50,000", 0.95),
+        "Type of Bid": ("Two Packet Bid", 0.95),
+        "Minimum Average Annual Turnover": ("10 Lakh", 0.95),
+    }
+
+
+def test_amounts_need_currency_unit_or_magnitude():
+    assert match_value("EMD Amount", "₹ 5,000") == "₹ 5,000"
+    assert match_value("EMD Amount", "Rs. 500") == "Rs. 500"
+    assert match_value("Estimated Bid Value", "1.5 crore") == "1.5 crore"
+    assert match_value("Estimated Bid Value", "90 (Days)") is None
+    assert match_value("Estimated Bid Value", "3 Year (s)") is None
+    assert match_value("Estimated Bid Value", "22-05-2025 18:00:00") is None
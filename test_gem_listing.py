@@ -0,0 +1,113 @@
+import os
+import pytest
+
+pytest.importorskip("requests")
+pytest.importorskip("lxml")
+import gem_listing
+from gem_listing import (ListingFetchError, extract_csrf_token, fetch_keyword, parse_listing_html,
+                         parse_listing_json)
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "test_fixtures", "gem_listing")
+
+
+def fixture(name):
+    with open(os.path.join(FIXTURES, name), encoding="utf-8") as f:
+        return f.read()
+
+
+def test_extract_csrf_token():
+    assert extract_csrf_token(fixture("all_bids.html")) == "9f2c4b7a1e0d8c6b5a4f3e2d1c0b9a87"
+    script_only = '<html><script>var csrf = {"csrf_bd_gem_nk": "ab12cd34"};</script></html>'
+    assert extract_csrf_token(script_only) == "ab12cd34"
+    with pytest.raises(ListingFetchError):
+        extract_csrf_token(fixture("session_expired.html"))
+
+
+def test_parse_listing_json():
+    rows, total = parse_listing_json(fixture("all_bids_data.json"))
+    assert total == 2
+    assert rows[0] == {
+        'Bid Number': "GEM/2025/B/6123456",
+        'Items': "Custom Bid for Services - Software Development and Maintenance Services",
+        'Quantity': "1",
+        'Department': "Ministry of Defence Department of Military Affairs",
+        'Start Date': "22-04-2025 12:31 PM",
+        'End Date': "13-05-2025 01:00 PM",
+        'Downloadable File URL': "https://bidplus.gem.gov.in/showbidDocument/7830687",
+    }
+    assert rows[1]['Department'] == "Ministry of Railways"
+    assert rows[1]['End Date'] == "Not Found"
+
+
+@pytest.mark.parametrize("payload", [
+    '{"status": 0, "message": "Invalid request"}',
+    '[{"status": 0}]',
+    '{"response": "Session expired"}',
+    '{"response": {"response": ["docs"]}}',
+    '{"response": {"response": {"docs": "none"}}}',
+])
+def test_parse_listing_json_rejects_unknown_shape(payload):
+    with pytest.raises(ValueError):
+        parse_listing_json(payload)
+
+
+def test_parse_listing_html():
+    rows = parse_listing_html(fixture("all_bids.html"))
+    assert [r['Bid Number'] for r in rows] == ["GEM/2025/B/6123456", "GEM/2025/B/6124001"]
+    assert rows[0]['Items'] == "Custom Bid for Services - Software Development and Maintenance Services"
+    assert rows[0]['Department'] == "Ministry of Defence Department of Military Affairs"
+    assert rows[0]['Downloadable File URL'] == "https://bidplus.gem.gov.in/showbidDocument/7830687"
+    assert rows[1]['Items'] == "Web Portal Development"
+    assert rows[1]['Quantity'] == "400"
+    assert rows[1]['End Date'] == "14-05-2025 11:00 AM"
+    assert parse_listing_html(fixture("session_expired.html")) == []
+
+
+class FakeResponse:
+    def __init__(self, text, content_type):
+        self.text = text
+        self.headers = {"Content-Type": content_type}
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        import json
+        return json.loads(self.text)
+
+
+class FakeSession:
+    def __init__(self, responses):
+        self.responses = list(responses)
+
+    def post(self, url, data=None, timeout=None):
+        return self.responses.pop(0)
+
+
+def use_responses(monkeypatch, *responses):
+    session = FakeSession(responses)
+    monkeypatch.setattr(gem_listing, "get_session", lambda: (session, "token"))
+
+
+def test_fetch_keyword_pages_json(monkeypatch):
+    use_responses(monkeypatch, FakeResponse(fixture("all_bids_data.json"), "application/json"))
+    pages = []
+    rows = fetch_keyword("software", on_page=pages.append)
+    assert len(rows) == 2 and pages == [rows]
+
+
+def test_fetch_keyword_html_error_page_is_a_fetch_error(monkeypatch):
+    use_responses(monkeypatch, FakeResponse(fixture("session_expired.html"), "text/html; charset=UTF-8"))
+    with pytest.raises(ListingFetchError):
+        fetch_keyword("software")
+
+
+def test_fetch_keyword_json_without_json_content_type(monkeypatch):
+    use_responses(monkeypatch, FakeResponse(fixture("all_bids_data.json"), "text/html"))
+    assert len(fetch_keyword("software")) == 2
+
+
+def test_fetch_keyword_unexpected_json_is_a_fetch_error(monkeypatch):
+    use_responses(monkeypatch, FakeResponse(fixture("session_expired.json"), "application/json"))
+    with pytest.raises(ListingFetchError):
+        fetch_keyword("software")
@@ -0,0 +1,50 @@
+import json
+from job_events import EventBus, StageTimer, sse_stream
+
+
+def parse(message):
+    event_line, data_line = message.strip().split("\n")
+    return event_line[len("event: "):], json.loads(data_line[len("data: "):])
+
+
+def test_sse_stream_sends_snapshot_then_live_events():
+    bus = EventBus()
+    StageTimer("doc-1", bus).stage("downloading")
+    stream = sse_stream(bus, heartbeat=0.05)
+    event_type, event = parse(next(stream))
+    assert event_type == "stage" and event["doc_id"] == "doc-1" and event["stage"] == "downloading"
+
+    bus.publish("bids_filtered", run_id=1, matched=2, total_matched=2)
+    event_type, event = parse(next(stream))
+    assert event_type == "bids_filtered" and event["matched"] == 2
+    assert next(stream) == ": keep-alive\n\n"
+
+    stream.close()
+    assert bus._subscribers == set()
+
+
+def test_stage_timer_reports_previous_stage():
+    bus = EventBus()
+    timer = StageTimer("doc-1", bus)
+    timer.stage("parsing")
+    event = timer.stage("embedding")
+    assert event["previous"] == "parsing" and event["previous_seconds"] is not None
+    assert bus.latest_status() == "embedding"
+
+
+def test_slow_subscriber_keeps_newest_events():
+    bus = EventBus(max_queue=2)
+    q = bus.subscribe()
+    for n in range(3):
+        bus.publish("tick", n=n)
+    assert [q.get_nowait()["n"] for _ in range(2)] == [1, 2]
+
+
+def test_listener_errors_do_not_stop_publishing():
+    bus = EventBus()
+    seen = []
+    bus.add_listener("tick", lambda event: 1 / 0)
+    bus.add_listener("tick", seen.append)
+    q = bus.subscribe()
+    bus.publish("tick", n=1)
+    assert seen[0]["n"] == 1 and q.get_nowait()["n"] == 1
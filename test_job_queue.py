@@ -0,0 +1,50 @@
+import threading
+from job_queue import JobQueue, JobCancelled, PRIORITY_INTERACTIVE, PRIORITY_BATCH
+
+
+def test_identical_key_is_deduplicated_and_reprioritized():
+    queue = JobQueue()
+    first = queue.submit("a.pdf", lambda job: None, priority=PRIORITY_BATCH)
+    second = queue.submit("a.pdf", lambda job: None, priority=PRIORITY_INTERACTIVE)
+    assert second is first
+    assert first.priority == PRIORITY_INTERACTIVE
+    assert queue.metrics()["deduplicated"] == 1
+    assert queue.metrics()["queue_depth"] == 1
+
+
+def test_interactive_jobs_run_first():
+    queue = JobQueue()
+    order, done = [], threading.Event()
+    queue.submit("batch.pdf", lambda job: order.append("batch"), priority=PRIORITY_BATCH)
+    queue.submit("upload.pdf", lambda job: order.append("upload"), priority=PRIORITY_INTERACTIVE)
+    queue.submit("last.pdf", lambda job: done.set(), priority=PRIORITY_BATCH)
+    queue.start()
+    assert done.wait(5)
+    assert order == ["upload", "batch"]
+
+
+def test_new_job_in_group_cancels_queued_and_running():
+    queue = JobQueue()
+    started, release, finished = threading.Event(), threading.Event(), threading.Event()
+    outcome = {}
+
+    def slow(job):
+        started.set()
+        release.wait(5)
+        try:
+            job.check_cancelled()
+            outcome["slow"] = "finished"
+        except JobCancelled:
+            outcome["slow"] = "cancelled"
+            raise
+
+    queue.start()
+    running = queue.submit("one.pdf", slow, group="interactive")
+    assert started.wait(5)
+    queued = queue.submit("two.pdf", lambda job: outcome.setdefault("two", "ran"), group="interactive")
+    queue.submit("three.pdf", lambda job: finished.set(), group="interactive")
+    release.set()
+    assert finished.wait(5)
+    assert running.cancelled and queued.cancelled
+    assert outcome == {"slow": "cancelled"}
+    assert queue.metrics()["cancelled"] == 2
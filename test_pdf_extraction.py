@@ -0,0 +1,46 @@
+import pytest
+
+fitz = pytest.importorskip("fitz")
+pytest.importorskip("pdfplumber")
+from pdf_extraction import extract_page_records, merge_tables
+
+
+def make_pdf(path):
+    """One page: a heading, a ruled 2x3 table and a closing paragraph."""
+    doc = fitz.open()
+    page = doc.new_page()
+    page.insert_text((72, 60), "Bid Details", fontsize=12)
+    cells = [["EMD Amount", "Rs 50,000"], ["Bid End Date", "22-05-2025"], ["Turnover", "Rs 1 Crore"]]
+    top, row_height, columns = 100, 30, (72, 272, 472)
+    for y in range(top, top + row_height * len(cells) + 1, row_height):
+        page.draw_line((columns[0], y), (columns[-1], y))
+    for x in columns:
+        page.draw_line((x, top), (x, top + row_height * len(cells)))
+    for i, row in enumerate(cells):
+        for j, cell in enumerate(row):
+            page.insert_text((columns[j] + 5, top + row_height * i + 20), cell, fontsize=10)
+    page.insert_text((72, 260), "Bidders must upload all documents.", fontsize=10)
+    doc.save(str(path))
+    doc.close()
+
+
+def test_table_text_replaces_cell_blocks(tmp_path):
+    path = tmp_path / "bid.pdf"
+    make_pdf(path)
+    record = extract_page_records(str(path), [1])[1]
+    assert record["tier"] == "table"
+    text = record["text"]
+    assert text.count("Rs 50,000") == 1
+    assert "EMD Amount | Rs 50,000" in text
+    # Reading order is kept around the table
+    assert text.index("Bid Details") < text.index("EMD Amount") < text.index("Bidders must upload")
+    assert [el["type"] for el in record["elements"]] == ["Text", "Table", "Text"]
+
+
+def test_merge_tables_keeps_blocks_outside_tables():
+    table = {"type": "Table", "text": "a | b", "bbox": [50, 100, 300, 200]}
+    above = {"type": "Text", "text": "above", "bbox": [50, 40, 300, 60]}
+    cell = {"type": "Text", "text": "a", "bbox": [60, 110, 100, 130]}
+    beside = {"type": "Text", "text": "beside", "bbox": [320, 110, 500, 130]}
+    merged = merge_tables([above, cell, beside], [table])
+    assert [el["text"] for el in merged] == ["above", "a | b", "beside"]
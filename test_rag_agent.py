@@ -0,0 +1,47 @@
+import pytest
+
+for module in ("fitz", "pdfplumber", "pytesseract", "faiss", "langchain", "langchain_community", "langchain_ollama"):
+    pytest.importorskip(module)
+from rag_agent import ThinkFilter
+
+
+def run(chunks):
+    think_filter = ThinkFilter()
+    visible, events = "", []
+    for chunk in chunks:
+        text, chunk_events = think_filter.feed(chunk)
+        visible += text
+        events += chunk_events
+    return visible + think_filter.flush(), events
+
+
+def test_reasoning_is_dropped():
+    assert run(["<think>EMD is on page 2</think>\n\nThe EMD is Rs 50,000."]) == \
+        ("The EMD is Rs 50,000.", ["think_start", "think_end"])
+
+
+def test_tags_split_across_chunks():
+    chunks = ["<th", "ink>reason", "ing</thi", "nk>", "\n", "Answer: ", "yes"]
+    assert run(chunks) == ("Answer: yes", ["think_start", "think_end"])
+
+
+def test_text_without_think_block_passes_through():
+    assert run(["The bid ", "ends on 22-05-2025 <b>", "6 PM"]) == ("The bid ends on 22-05-2025 <b>6 PM", [])
+
+
+def test_partial_tag_at_end_is_flushed():
+    assert run(["Answer is 5 <thi"]) == ("Answer is 5 <thi", [])
+
+
+def test_unclosed_think_block_emits_nothing():
+    assert run(["<think>still reasoning when the stream stopped"]) == ("", ["think_start"])
+
+
+def test_documents_are_grouped_by_bid(monkeypatch):
+    import rag_agent
+    bids = {"linked_pdfs/GeM-Bidding-101.pdf": "GEM/2025/B/101", "linked_pdfs/GeM-Bidding-101-v2.pdf": "GEM/2025/B/101"}
+    monkeypatch.setattr(rag_agent, "lookup_bid_metadata",
+                        lambda path: {"bid_number": bids.get(path, ""), "department": ""})
+    assert rag_agent.document_group("linked_pdfs/GeM-Bidding-101.pdf") == \
+        rag_agent.document_group("linked_pdfs/GeM-Bidding-101-v2.pdf") == "bid:GEM/2025/B/101"
+    assert rag_agent.document_group("uploads/tender.pdf") == "doc:tender"
@@ -0,0 +1,101 @@
+import time
+import pytest
+
+for module in ("cv2", "numpy", "pytesseract", "pdf2image"):
+    pytest.importorskip(module)
+from concurrent.futures import ThreadPoolExecutor
+import read_img_pdf
+
+PAGE_COUNT = 12
+
+
+class CountingExecutor(ThreadPoolExecutor):
+    """Thread stand-in for the process pool that records how many pages were submitted."""
+    submitted = 0
+
+    def submit(self, fn, *args, **kwargs):
+        CountingExecutor.submitted += 1
+        return super().submit(fn, *args, **kwargs)
+
+
+def fake_ocr_page(pdf_path, page_number, dpi):
+    # Later pages finish first, so ordering comes from the generator, not completion order
+    time.sleep(0.002 * (PAGE_COUNT - page_number))
+    return [f"{pdf_path} page {page_number} at {dpi} dpi"]
+
+
+@pytest.fixture
+def fake_pool(monkeypatch):
+    CountingExecutor.submitted = 0
+    monkeypatch.setattr(read_img_pdf, "ProcessPoolExecutor", CountingExecutor)
+    monkeypatch.setattr(read_img_pdf, "pdfinfo_from_path", lambda path: {"Pages": PAGE_COUNT})
+
+
+def test_pages_come_back_in_order_with_bounded_in_flight(fake_pool):
+    pages = []
+    for page_number, lines in read_img_pdf.ocr_pdf_pages("tender.pdf", dpi=200, workers=2, max_in_flight=3,
+                                                         ocr_func=fake_ocr_page):
+        # Pages submitted but not yet handed out never exceed max_in_flight
+        assert CountingExecutor.submitted - len(pages) <= 3
+        pages.append(page_number)
+        assert lines == [f"tender.pdf page {page_number} at 200 dpi"]
+    assert pages == list(range(1, PAGE_COUNT + 1))
+    assert CountingExecutor.submitted == PAGE_COUNT
+
+
+def test_pages_are_rasterized_lazily(fake_pool):
+    pages = read_img_pdf.ocr_pdf_pages("tender.pdf", workers=2, ocr_func=fake_ocr_page)
+    assert next(pages)[0] == 1
+    assert CountingExecutor.submitted == 4  # default max_in_flight is workers * 2
+    pages.close()
+
+
+# Words on a fake page: (left, top, width, height, text, line_num)
+WORDS = [
+    (20, 102, 60, 6, "EMD", 1), (90, 102, 80, 6, "Amount", 1), (300, 102, 70, 6, "49,000", 1),
+    (20, 125, 90, 8, "between", 2), (120, 125, 80, 8, "rulings", 2),  # below the +10 crop of row 1
+    (20, 152, 50, 6, "Bid", 3), (80, 152, 60, 6, "Type", 3), (300, 152, 60, 6, "Two", 3),
+    (500, 152, 60, 6, "outside", 3),  # right of the row boxes
+]
+ROWS = [(10, 100, 400, 2), (10, 150, 400, 2), (10, 200, 400, 2), (10, 250, 400, 2)]
+
+
+def page_image():
+    # Pixels hold their own coordinates, so a cropped ROI knows where it came from
+    np = pytest.importorskip("numpy")
+    ys, xs = np.mgrid[0:300, 0:600]
+    return np.stack([ys, xs, np.zeros_like(ys)], axis=2)
+
+
+def words_in(image):
+    y0, x0 = int(image[0, 0, 0]), int(image[0, 0, 1])
+    y1, x1 = y0 + image.shape[0], x0 + image.shape[1]
+    return [w for w in WORDS if y0 <= w[1] + w[3] / 2 < y1 and x0 <= w[0] + w[2] / 2 <= x1]
+
+
+def fake_image_to_string(image, config=None):
+    words = sorted(words_in(image), key=lambda w: (w[5], w[0]))
+    return " ".join(w[4] for w in words) + "\n"
+
+
+def fake_image_to_data(image, output_type=None, config=None):
+    words = words_in(image)
+    return {
+        "text": [w[4] for w in words], "left": [w[0] for w in words], "top": [w[1] for w in words],
+        "width": [w[2] for w in words], "height": [w[3] for w in words],
+        "block_num": [1] * len(words), "par_num": [1] * len(words), "line_num": [w[5] for w in words],
+    }
+
+
+def test_batched_and_per_row_paths_give_the_same_lines(monkeypatch):
+    monkeypatch.setattr(read_img_pdf.pytesseract, "image_to_string", fake_image_to_string)
+    monkeypatch.setattr(read_img_pdf.pytesseract, "image_to_data", fake_image_to_data)
+    image = page_image()
+    per_row = read_img_pdf.extract_table_lines(image, ROWS, mode="per_row")
+    assert per_row == ["EMD Amount 49,000", "Bid Type Two"]
+    assert read_img_pdf.extract_table_lines(image, ROWS, mode="batched") == per_row
+
+
+def test_row_bands_match_the_per_row_crop():
+    assert read_img_pdf.row_bands([(10, 100, 400, 2), (10, 295, 400, 2)], 300) == \
+        [(10, 100, 410, 112), (10, 295, 410, 300)]
@@ -0,0 +1,66 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("rapidfuzz")
+pytest.importorskip("langchain_core")
+from relevance import RelevanceScorer
+
+PROFILES = [
+    {"name": "Software development", "description": "software", "keywords": ["software", "web development"]},
+    {"name": "Cyber security", "description": "security", "keywords": ["cyber security"]},
+]
+# Tiny vocabulary embedding: one dimension per topic word
+VOCABULARY = ["software", "security", "furniture"]
+
+
+class StubEmbedding:
+    def __init__(self):
+        self.calls = 0
+
+    def embed_documents(self, texts):
+        self.calls += 1
+        return [[1.0 if word in text.lower() else 0.0 for word in VOCABULARY] + [0.1] for text in texts]
+
+
+def scorer(**kwargs):
+    return RelevanceScorer(profiles=PROFILES, embedding=StubEmbedding(), **kwargs)
+
+
+def test_ranking_and_profile_matching():
+    s = scorer()
+    texts = ["Custom Software Development", "Cyber Security Audit services", "Office furniture"]
+    results = s.score_texts(texts)
+    assert [r["profile"] for r in results[:2]] == ["Software development", "Cyber security"]
+    assert results[0]["keyword"] == "software" and results[1]["keyword"] == "cyber security"
+    assert results[2]["fuzzy"] == 0.0 and results[2]["keyword"] == ""
+    assert results[0]["score"] > results[2]["score"] and results[1]["score"] > results[2]["score"]
+
+
+def test_score_blends_semantic_and_fuzzy():
+    s = scorer(semantic_weight=0.75)
+    result = s.score_texts(["Software licences"])[0]
+    assert result["score"] == pytest.approx(0.75 * result["semantic"] + 0.25 * result["fuzzy"])
+    assert result["fuzzy"] == 1.0
+    # A near-miss spelling still counts as a fuzzy keyword hit
+    assert s.score_texts(["Sofware maintenance"])[0]["fuzzy"] >= 0.85
+
+
+def test_threshold():
+    s = scorer(threshold=0.6)
+    relevant, unrelated = s.score_texts(["Software development", "Office furniture"])
+    assert s.is_relevant(relevant) and not s.is_relevant(unrelated)
+    assert not scorer(threshold=1.01).is_relevant(relevant)
+
+
+def test_profiles_are_embedded_once():
+    s = scorer()
+    s.score_texts(["Software"])
+    s.score_rows([{"Items": "Cyber security"}, {"Items": None}])
+    assert s.embedding.calls == 3  # profiles once, then one call per batch
+    assert s.score_texts([]) == []
+
+
+def test_fingerprint_follows_settings():
+    assert scorer().fingerprint() == scorer().fingerprint()
+    assert scorer(threshold=0.7).fingerprint() != scorer().fingerprint()
+    assert scorer(semantic_weight=0.5).fingerprint() != scorer().fingerprint()
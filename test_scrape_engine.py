@@ -0,0 +1,37 @@
+import pytest
+
+pytest.importorskip("selenium")
+import scrape_engine
+from scrape_engine import DriverPool, merge_results
+from selenium.common.exceptions import WebDriverException
+
+
+class FakeDriver:
+    def quit(self):
+        pass
+
+
+def test_driver_start_failure_raises_instead_of_waiting(monkeypatch):
+    def broken(headless):
+        raise WebDriverException("geckodriver not found")
+    monkeypatch.setattr(scrape_engine, "make_driver", broken)
+    pool = DriverPool(size=1)
+    with pytest.raises(WebDriverException):
+        pool._get(timeout=0.1)
+    assert pool._created == 0
+
+
+def test_waiting_for_busy_driver_times_out(monkeypatch):
+    monkeypatch.setattr(scrape_engine, "make_driver", lambda headless: FakeDriver())
+    pool = DriverPool(size=1)
+    with pool.driver():
+        with pytest.raises(WebDriverException):
+            pool._get(timeout=0.1)
+    assert isinstance(pool._get(timeout=0.1), FakeDriver)
+
+
+def test_merge_results_keeps_first_row_per_bid():
+    first = [{"Bid Number": "GEM/2025/B/1", "Items": "a"}, {"Bid Number": "Not Found", "Items": "x"}]
+    second = [{"Bid Number": "GEM/2025/B/1", "Items": "b"}, {"Bid Number": "Not Found", "Items": "y"}]
+    merged = merge_results([first, None, second])
+    assert [row["Items"] for row in merged] == ["a", "x", "y"]
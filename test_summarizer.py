@@ -0,0 +1,80 @@
+import pytest
+
+pytest.importorskip("langchain")
+from summarizer import MapReduceSummarizer, SummaryCache, strip_think
+
+
+class FakeLLM:
+    """Answers like deepseek-r1: a reasoning block, then a short summary of the prompt."""
+
+    def __init__(self):
+        self.prompts = []
+
+    def invoke(self, prompt):
+        self.prompts.append(prompt)
+        text = prompt.split("\n\n", 1)[1]
+        return f"<think>\n{'Let me think about this. ' * 200}\n</think>\n\nSUMMARY({len(text)})"
+
+
+def summarizer(tmp_path, max_combine_chars=6000):
+    return MapReduceSummarizer(FakeLLM(), "deepseek-r1", concurrency=2,
+                               max_combine_chars=max_combine_chars, cache=SummaryCache(str(tmp_path)))
+
+
+def test_strip_think():
+    assert strip_think("<think>\nreasoning\n</think>\n\nThe answer.") == "The answer."
+    assert strip_think("The answer.<think>cut off") == "The answer."
+
+
+def test_think_blocks_never_reach_cache_or_combine_prompts(tmp_path):
+    s = summarizer(tmp_path)
+    final, chunk_summaries = s.summarize([f"chunk {i} " * 100 for i in range(6)])
+    assert all(summary.startswith("SUMMARY(") for summary in chunk_summaries)
+    assert final.startswith("SUMMARY(")
+    assert not any("<think>" in p for p in s.llm.prompts)
+
+    again = summarizer(tmp_path)
+    assert again.summarize([f"chunk {i} " * 100 for i in range(6)]) == (final, chunk_summaries)
+    assert again.llm.prompts == []
+
+
+def test_oversized_summaries_are_split_not_truncated(tmp_path):
+    s = summarizer(tmp_path, max_combine_chars=100)
+    long_summary = ". ".join(f"Sentence number {i}" for i in range(30)) + ". LAST FACT."
+    s.reduce([long_summary, long_summary])
+    combined = "".join(p.split("\n\n", 1)[1] for p in s.llm.prompts)
+    assert "LAST FACT." in combined
+    assert all(len(p.split("\n\n", 1)[1]) <= 100 for p in s.llm.prompts)
+
+
+def test_cancel_check_stops_between_llm_calls(tmp_path):
+    s = summarizer(tmp_path)
+    s.concurrency = 1
+
+    class Cancelled(Exception):
+        pass
+
+    def check_cancelled():
+        if len(s.llm.prompts) >= 2:
+            raise Cancelled()
+
+    with pytest.raises(Cancelled):
+        s.summarize([f"chunk {i} " * 100 for i in range(6)], check_cancelled=check_cancelled)
+    assert len(s.llm.prompts) == 2
+
+
+class EchoLLM(FakeLLM):
+    """A model whose "summary" is as long as its input, so reduce never converges."""
+
+    def invoke(self, prompt):
+        self.prompts.append(prompt)
+        return prompt.split("\n\n", 1)[1]
+
+
+def test_every_combine_prompt_stays_within_budget(tmp_path):
+    s = summarizer(tmp_path, max_combine_chars=100)
+    s.llm = EchoLLM()
+    summaries = [". ".join(f"Part {i} sentence {j}" for j in range(8)) + "." for i in range(12)]
+    final = s.reduce(summaries)
+    assert final
+    assert all(len(p.split("\n\n", 1)[1]) <= 100 for p in s.llm.prompts)